@@ -0,0 +1,106 @@
+"""
+Ticket check-in throughput.
+
+    python benchmarks/bench_checkin.py --houses 20 --batch 50
+
+Measures HMAC token verification alone, then full check-in batches through
+the API against a throwaway SQLite database: first entry for full IMAX houses
+(160 seats, 2-seat bookings), then the same tickets scanned again, which is
+answered from memory.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Always a scratch database, never the one configured in .env
+_tmp = tempfile.mkdtemp(prefix="cinex-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+
+from fastapi.testclient import TestClient
+from database import Base, SessionLocal, engine
+import models
+from routers import checkin
+from fastapi import FastAPI
+from utils.ticket_tokens import sign_ticket, verify_ticket
+
+IMAX_SEATS = [f"{row}{col}" for row in "ABCDEFGHIJ" for col in range(1, 17)]
+
+
+def seed(houses: int):
+    """One show per house, each sold out in 2-seat bookings. Returns [(show_id, token)]."""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    movie = models.Movie(title="Bench", duration_mins=120)
+    cinema = models.Cinema(name="Bench Cinema", location="Colombo")
+    db.add_all([movie, cinema])
+    db.commit()
+
+    tickets = []
+    start = datetime.now() + timedelta(hours=1)
+    for _ in range(houses):
+        show = models.Show(movie_id=movie.movie_id, cinema_id=cinema.cinema_id,
+                           screen_name="IMAX Hall", start_time=start, ticket_price=1000)
+        db.add(show)
+        db.commit()
+        bookings = [
+            models.Booking(show_id=show.show_id, show_date=start.date(), total_amount=2300,
+                           contact_email="bench@example.com", contact_phone="0", status="confirmed")
+            for _ in range(0, len(IMAX_SEATS), 2)
+        ]
+        db.add_all(bookings)
+        db.commit()
+        for booking, i in zip(bookings, range(0, len(IMAX_SEATS), 2)):
+            tickets.append((show.show_id, sign_ticket(booking.booking_id, show.show_id, IMAX_SEATS[i:i + 2])))
+    db.close()
+    return tickets
+
+
+def run_batches(client, tickets, batch: int):
+    by_show = {}
+    for show_id, token in tickets:
+        by_show.setdefault(show_id, []).append(token)
+    statuses = {}
+    started = time.perf_counter()
+    for show_id, tokens in by_show.items():
+        for i in range(0, len(tokens), batch):
+            response = client.post("/checkin/scans", json={
+                "show_id": show_id,
+                "scanner_id": "bench",
+                "scans": [{"token": t} for t in tokens[i:i + batch]],
+            })
+            for result in response.json():
+                statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+    return len(tickets) / (time.perf_counter() - started), statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--houses", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=50)
+    parser.add_argument("--tokens", type=int, default=100000)
+    args = parser.parse_args()
+
+    tokens = [sign_ticket(100000 + i, 42, ["F7", "F8"]) for i in range(args.tokens)]
+    started = time.perf_counter()
+    for token in tokens:
+        verify_ticket(token)
+    print(f"Token verification:  {args.tokens / (time.perf_counter() - started):10.0f} scans/s")
+
+    tickets = seed(args.houses)
+    app = FastAPI()
+    app.include_router(checkin.router)
+    client = TestClient(app)
+
+    rate, statuses = run_batches(client, tickets, args.batch)
+    print(f"First entry (API):   {rate:10.0f} scans/s  {statuses}  ({args.houses} houses, batches of {args.batch})")
+    rate, statuses = run_batches(client, tickets, args.batch)
+    print(f"Repeat scans (API):  {rate:10.0f} scans/s  {statuses}")
+
+
+if __name__ == "__main__":
+    main()
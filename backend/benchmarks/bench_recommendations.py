@@ -0,0 +1,89 @@
+"""
+Similar-movies index build time.
+
+    python benchmarks/bench_recommendations.py --movies 50000 --users 200000
+
+Builds the index for a synthetic catalog (skewed genres and audiences), then
+times an incremental refresh after a batch of new bookings, compares its
+lists with a full rebuild, and measures lookups per second.
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.recommendations import SimilarityIndex
+
+GENRES = [
+    "Action", "Adventure", "Animation", "Biography", "Comedy", "Crime", "Documentary",
+    "Drama", "Family", "Fantasy", "History", "Horror", "Music", "Musical", "Mystery",
+    "Romance", "Sci-Fi", "Sport", "Thriller", "War", "Western", "Tamil", "Sinhala",
+    "Hindi", "Korean",
+]
+
+
+def make_catalog(rng, movies: int) -> dict:
+    weights = 1.0 / np.arange(1, len(GENRES) + 1)
+    weights /= weights.sum()
+    catalog = {}
+    for movie_id in range(1, movies + 1):
+        count = rng.integers(1, 4)
+        catalog[movie_id] = frozenset(rng.choice(GENRES, size=count, replace=False, p=weights))
+    return catalog
+
+
+def make_pairs(rng, movies: int, users: int, bookings: int, user_offset: int = 0):
+    # A few titles draw most of the audience
+    popularity = 1.0 / np.arange(1, movies + 1) ** 0.8
+    popularity /= popularity.sum()
+    movie_ids = rng.choice(np.arange(1, movies + 1), size=bookings, p=popularity)
+    user_ids = rng.integers(0, users, size=bookings) + user_offset
+    return [(f"user_{u}", int(m)) for u, m in zip(user_ids, movie_ids)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--movies", type=int, default=50000)
+    parser.add_argument("--users", type=int, default=200000)
+    parser.add_argument("--bookings", type=int, default=1000000)
+    parser.add_argument("--new-bookings", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    catalog = make_catalog(rng, args.movies)
+    pairs = make_pairs(rng, args.movies, args.users, args.bookings)
+    print(f"{args.movies} movies, {args.users} users, {len(pairs)} booking pairs")
+
+    index = SimilarityIndex()
+    started = time.perf_counter()
+    index.rebuild(catalog, pairs, watermark=len(pairs))
+    print(f"Full build:          {time.perf_counter() - started:8.2f} s")
+
+    new_pairs = make_pairs(rng, args.movies, args.users, args.new_bookings)
+    started = time.perf_counter()
+    rescored = index.update(catalog, new_pairs, watermark=len(pairs) + len(new_pairs))
+    print(f"Incremental refresh: {time.perf_counter() - started:8.2f} s  ({rescored} titles re-scored)")
+
+    reference = SimilarityIndex()
+    reference.rebuild(catalog, pairs + new_pairs, watermark=0)
+    sample = rng.choice(np.arange(1, args.movies + 1), size=min(2000, args.movies), replace=False)
+    overlap = np.mean([
+        len(set(index.similar(int(m))) & set(reference.similar(int(m)))) / max(len(reference.similar(int(m))), 1)
+        for m in sample
+    ])
+    print(f"Top-{index.top_k} overlap with a full rebuild: {overlap * 100:.1f}%")
+
+    lookups = rng.integers(1, args.movies + 1, size=200000).tolist()
+    started = time.perf_counter()
+    for movie_id in lookups:
+        index.similar(movie_id, 10)
+    elapsed = time.perf_counter() - started
+    print(f"Lookups:             {len(lookups) / elapsed:8.0f} /s  ({elapsed / len(lookups) * 1e6:.1f} us each)")
+
+
+if __name__ == "__main__":
+    main()
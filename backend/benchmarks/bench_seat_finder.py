@@ -0,0 +1,87 @@
+"""
+Best-available seat search latency.
+
+    python benchmarks/bench_seat_finder.py --rows 20 --cols 25 --occupancy 0.95
+
+Fills a screen (20 x 25 = 500 seats by default) to the given occupancy,
+either at random or the way a house really fills (every booking takes the
+best block left), then times find_best_block for common group sizes against
+a plain Python scan of the same grid.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.seat_layouts import CompiledLayout
+from utils.seat_finder import find_best_block, _position_scores
+
+
+def python_scan(layout, unavailable, size):
+    """Reference: try every start position seat by seat, same scoring (no orphan penalty)."""
+    scores = _position_scores(layout.rows, layout.cols, size)
+    best, best_score = None, -np.inf
+    for row in range(layout.rows):
+        for start in range(layout.cols - size + 1):
+            base = row * layout.cols + start
+            if all(not unavailable[base + i] for i in range(size)) and scores[row, start] > best_score:
+                best, best_score = (row, start), scores[row, start]
+    return best
+
+
+def fill_random(layout, occupancy, rng):
+    taken = np.zeros(layout.size, dtype=bool)
+    taken[rng.choice(layout.size, int(layout.size * occupancy), replace=False)] = True
+    return taken
+
+
+def fill_by_bookings(layout, occupancy, rng):
+    """Groups of 1-6 each take the best block left until the house is full enough."""
+    taken = np.zeros(layout.size, dtype=bool)
+    while taken.sum() < layout.size * occupancy:
+        block = find_best_block(layout, taken, int(rng.integers(1, 7)))
+        if block is None:
+            block = find_best_block(layout, taken, 1)
+        taken[block["indices"]] = True
+    return taken
+
+
+def time_calls(fn, repeat):
+    timings = np.empty(repeat)
+    for i in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings[i] = time.perf_counter() - started
+    return np.percentile(timings, 50) * 1e6, np.percentile(timings, 99) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--cols", type=int, default=25)
+    parser.add_argument("--occupancy", type=float, default=0.95)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    layout = CompiledLayout("BENCH", args.rows, args.cols, vip_rows=2, premium_rows=4)
+    print(f"{layout.size} seats, {args.occupancy:.0%} occupied")
+
+    for fill_name, fill in (("random", fill_random), ("bookings", fill_by_bookings)):
+        taken = fill(layout, args.occupancy, rng)
+        print(f"\n{fill_name} fill ({int(taken.sum())} taken)")
+        for size in (2, 4, 6, 8):
+            block = find_best_block(layout, taken, size)
+            p50, p99 = time_calls(lambda: find_best_block(layout, taken, size), args.repeat)
+            py50, _ = time_calls(lambda: python_scan(layout, taken, size), max(args.repeat // 20, 10))
+            found = "none" if block is None else ("split " if block["split"] else "") + ",".join(block["seats"])
+            print(f"  {size} seats: p50 {p50:7.1f} us  p99 {p99:7.1f} us  (python scan {py50:8.1f} us)  {found}")
+
+
+if __name__ == "__main__":
+    main()
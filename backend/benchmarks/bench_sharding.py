@@ -0,0 +1,173 @@
+"""
+Booking write throughput with 1, 2 and 4 booking shards.
+
+    python benchmarks/bench_sharding.py --cinemas 8 --workers 8 --bookings 2000
+
+Each shard count runs in its own process against fresh SQLite files (one
+primary for the catalog plus one file per shard), with DATABASE_URL and
+SHARD_DATABASE_URLS set before the app is imported. Worker processes (like
+API workers) create single-seat bookings through the booking service,
+spread evenly over one show per cinema, so the only contention between them
+is the booking stores' write locks.
+
+A local SQLite write takes microseconds, so on its own the run measures the
+CPU rather than the locks. --lock-latency-ms adds a sleep right after each
+booking takes its store's write lock (the seat version bump), standing in for
+the network round trips and fsync a database server spends inside that
+transaction; those waits are what one store serializes and more shards
+overlap. Use 0 to time the bare SQLite writes. Workers wait for a store in
+turn on a per-store lock (as they would queue on a server's row lock)
+instead of in SQLite's polling busy handler, which starves waiters once the
+lock is held for milliseconds.
+With a single shard configured, sharding is off and bookings use the primary.
+Pass --shard-urls to run one shard count against real databases instead
+(no added latency unless asked for).
+"""
+import argparse
+import itertools
+import os
+import multiprocessing
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set by run_child before the workers fork: show_id -> store index, one lock per store
+STORE_OF_SHOW = {}
+STORE_LOCKS = []
+
+
+def run_child(args):
+    """Seed a catalog, then time concurrent bookings (imports the app with this process' env)."""
+    from database import Base, SessionLocal, engine, shard_router
+    import models
+    import schemas
+    from routers.bookings import _create_booking
+    from utils import availability
+    from utils.seat_layouts import layout_for_show
+    from utils.partitions import ensure_partitions
+
+    Base.metadata.create_all(bind=engine)
+    ensure_partitions(engine)
+    shard_router.prepare(create=True)
+    for shard_engine in shard_router.engines:
+        ensure_partitions(shard_engine)
+
+    db = SessionLocal()
+    movie = models.Movie(title="Bench", duration_mins=120)
+    cinemas = [models.Cinema(name=f"Bench Cinema {i}", location="Colombo") for i in range(args.cinemas)]
+    db.add_all([movie, *cinemas])
+    db.commit()
+    start = datetime.now() + timedelta(days=1)
+    shows = [
+        models.Show(movie_id=movie.movie_id, cinema_id=cinema.cinema_id,
+                    screen_name="IMAX Hall", start_time=start, ticket_price=1000)
+        for cinema in cinemas
+    ]
+    db.add_all(shows)
+    db.commit()
+
+    # Every (show, seat) once, interleaved across shows so all shards stay busy
+    requests = []
+    for show in shows:
+        layout = layout_for_show(show)
+        requests.append([
+            schemas.BookingCreate(
+                show_id=show.show_id, seat_numbers=[seat], contact_email="bench@example.com", contact_phone="0",
+                total_amount=layout.total_amount(layout.seat_indices([seat]), show.ticket_price)
+            )
+            for seat in layout.labels
+        ])
+    for show in shows:
+        shard = shard_router.shard_for_cinema(show.cinema_id) if shard_router.enabled else 0
+        STORE_OF_SHOW[show.show_id] = shard
+    STORE_LOCKS.extend(multiprocessing.Lock() for _ in range(max(len(shard_router.engines), 1)))
+    db.close()
+    queue = [r for group in itertools.zip_longest(*requests) for r in group if r is not None][:args.bookings]
+    engine.dispose()
+    for shard_engine in shard_router.engines:
+        shard_engine.dispose()
+
+    if args.lock_latency_ms:
+        bump_seats_version = availability.bump_seats_version
+
+        def slow_bump(db, show_id):
+            version = bump_seats_version(db, show_id)
+            time.sleep(args.lock_latency_ms / 1000)
+            return version
+
+        # Workers are forked, so they inherit the patched function
+        availability.bump_seats_version = slow_bump
+
+    context = multiprocessing.get_context("fork")
+    started = time.perf_counter()
+    with context.Pool(args.workers) as pool:
+        errors = sum(pool.map(book, [queue[i::args.workers] for i in range(args.workers)]))
+    elapsed = time.perf_counter() - started
+    print(f"{len(queue) / elapsed:10.0f} bookings/s  ({len(queue)} bookings in {elapsed:.2f} s, {errors} errors)")
+
+
+def book(requests):
+    """One worker process: its own connections, bookings one after another. Returns the error count."""
+    from database import SessionLocal
+    from fastapi import HTTPException
+    from routers.bookings import _create_booking
+
+    errors = 0
+    session = SessionLocal()
+    try:
+        for request in requests:
+            try:
+                with STORE_LOCKS[STORE_OF_SHOW[request.show_id]]:
+                    _create_booking(request, session)
+            except HTTPException:
+                errors += 1
+                session.rollback()
+    finally:
+        session.close()
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--cinemas", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--bookings", type=int, default=2000)
+    parser.add_argument("--lock-latency-ms", type=float, default=None,
+                        help="Time each booking holds its store's write lock (default 10, or 0 with --shard-urls)")
+    parser.add_argument("--shard-urls", help="Comma-separated shard URLs (uses DATABASE_URL as the primary)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    if args.lock_latency_ms is None:
+        args.lock_latency_ms = 0 if args.shard_urls else 10
+    child_args = [sys.executable, os.path.abspath(__file__), "--child",
+                  "--cinemas", str(args.cinemas), "--workers", str(args.workers), "--bookings", str(args.bookings),
+                  "--lock-latency-ms", str(args.lock_latency_ms)]
+    env = dict(os.environ, SMTP_USERNAME="", OUTBOX_RELAY_SECONDS="0", AUTO_CREATE_TABLES="true")
+
+    if args.shard_urls:
+        print(f"{len(args.shard_urls.split(','))} shards: ", end="", flush=True)
+        subprocess.run(child_args, env=dict(env, SHARD_DATABASE_URLS=args.shard_urls), check=True)
+        return
+
+    for count in args.shards:
+        # Always scratch databases, never the ones configured in .env
+        tmp = tempfile.mkdtemp(prefix="cinex-bench-")
+        urls = [f"sqlite:///{os.path.join(tmp, f'shard{i}.db')}" for i in range(count)] if count > 1 else []
+        print(f"{count} shard{'s' if count > 1 else ' '}: ", end="", flush=True)
+        subprocess.run(child_args, env=dict(
+            env, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'primary.db')}", SHARD_DATABASE_URLS=",".join(urls)
+        ), check=True)
+
+
+if __name__ == "__main__":
+    main()
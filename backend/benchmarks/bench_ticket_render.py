@@ -0,0 +1,62 @@
+"""
+E-ticket rendering throughput.
+
+    python benchmarks/bench_ticket_render.py --tickets 400
+
+Renders synthetic tickets on one core, then through the process pool used by
+the API, and reports tickets per second per core for both.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.tickets import render_ticket_pdf, TICKET_RENDER_WORKERS
+
+
+def make_ticket(i: int) -> dict:
+    return {
+        "booking_id": 100000 + i,
+        "status": "confirmed",
+        "movie_title": "Dune: Part Two",
+        "cinema_name": "Scope Cinemas - Colombo City Centre",
+        "cinema_location": "Colombo 02",
+        "screen_name": "IMAX Hall",
+        "screen_type": "IMAX",
+        "start_time": "2026-03-01T19:30:00",
+        "seats": [f"F{n}" for n in range(1, 2 + i % 6)],
+        "total_amount": 4500.0 + i,
+        "qr_data": f"BK{100000 + i}",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=TICKET_RENDER_WORKERS)
+    args = parser.parse_args()
+
+    tickets = [make_ticket(i) for i in range(args.tickets)]
+
+    # Single core, in-process
+    render_ticket_pdf(tickets[0])  # warm up imports
+    started = time.perf_counter()
+    sizes = [len(render_ticket_pdf(t)) for t in tickets]
+    single = args.tickets / (time.perf_counter() - started)
+    print(f"1 core:      {single:8.1f} tickets/s  (avg {sum(sizes) / len(sizes) / 1024:.1f} KiB/ticket)")
+
+    # Process pool
+    with ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        list(pool.map(render_ticket_pdf, tickets[:args.workers]))  # warm up workers
+        started = time.perf_counter()
+        list(pool.map(render_ticket_pdf, tickets, chunksize=8))
+        pooled = args.tickets / (time.perf_counter() - started)
+    print(f"{args.workers} workers:  {pooled:8.1f} tickets/s  ({pooled / args.workers:.1f} tickets/s per core)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,190 @@
-from sqlalchemy import create_engine
+from sqlalchemy import MetaData, create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from fastapi import Request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import os
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Optional read replica for catalog reads (defaults to the primary)
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+
+# Optional booking shards (comma-separated URLs): a cinema's bookings live in
+# shard cinema_id % N; the catalog (movies, cinemas, shows, users) stays on DATABASE_URL.
+# Changing the number of shards moves cinemas, so it needs a data migration.
+SHARD_DATABASE_URLS = [url.strip() for url in os.getenv("SHARD_DATABASE_URLS", "").split(",") if url.strip()]
+# Booking ids are strided to stay unique across shards: shard i issues ids i+1, i+1+STRIDE, ...
+# Must not change once bookings exist; caps the number of shards.
+SHARD_ID_STRIDE = int(os.getenv("SHARD_ID_STRIDE", 16))
+
+# "production" skips DDL on boot: the schema is managed by database/schema.sql
+APP_ENV = os.getenv("APP_ENV", "development")
+AUTO_CREATE_TABLES = os.getenv(
+    "AUTO_CREATE_TABLES", "false" if APP_ENV == "production" else "true"
+).lower() == "true"
+
+# Connection pool settings (ignored for SQLite)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_WARM = int(os.getenv("DB_POOL_WARM", 2))
+
+def _engine_options(url):
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_pre_ping": True,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": 1800,
+    }
 
 # Create Database Engine
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+
+# Read replica engine (same as the primary when no replica is configured)
+replica_engine = (
+    create_engine(DATABASE_REPLICA_URL, **_engine_options(DATABASE_REPLICA_URL))
+    if DATABASE_REPLICA_URL else engine
+)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
+# Tables that live in the booking shards (when sharding is on)
+SHARDED_TABLES = ("bookings", "booking_seats", "checkins", "outbox_events", "show_seat_versions")
+
+
+class ShardRouter:
+    """
+    Picks the database that owns a cinema's bookings.
+
+    With no shards configured every lookup answers the primary session it was
+    given, so callers use one code path either way. A booking id also tells
+    which shard issued it (see SHARD_ID_STRIDE).
+    """
+
+    def __init__(self, urls, stride: int = SHARD_ID_STRIDE):
+        if len(urls) > stride:
+            raise RuntimeError(f"At most SHARD_ID_STRIDE={stride} booking shards are supported")
+        self.stride = stride
+        self.engines = [create_engine(url, **_engine_options(url)) for url in urls]
+        self._sessions = [sessionmaker(autocommit=False, autoflush=False, bind=e) for e in self.engines]
+        self._pool = ThreadPoolExecutor(max_workers=len(urls), thread_name_prefix="shard") if urls else None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.engines)
+
+    def shard_for_cinema(self, cinema_id: int) -> int:
+        return cinema_id % len(self.engines)
+
+    def shard_for_booking(self, booking_id: int):
+        """Shard that issued a booking id, or None if no shard could have."""
+        shard = (booking_id - 1) % self.stride
+        return shard if shard < len(self.engines) else None
+
+    @contextmanager
+    def session(self, db, cinema_id: int = None, booking_id: int = None):
+        """
+        Session for the bookings of a cinema (or of a booking id): `db` itself
+        when sharding is off, else a new session on the owning shard.
+        """
+        if not self.enabled:
+            yield db
+            return
+        shard = self.shard_for_cinema(cinema_id) if cinema_id is not None else self.shard_for_booking(booking_id)
+        if shard is None:
+            yield None
+            return
+        with self.shard_session(shard) as shard_db:
+            yield shard_db
+
+    @contextmanager
+    def shard_session(self, shard: int):
+        shard_db = self._sessions[shard]()
+        try:
+            yield shard_db
+        finally:
+            shard_db.close()
+
+    def scatter(self, db, fn, args=None):
+        """
+        fn(session) against every booking store, in parallel across shards;
+        results in shard order. With `args` (one per store), fn(session, arg).
+        fn must return plain data, not ORM objects.
+        """
+        if not self.enabled:
+            return [fn(db) if args is None else fn(db, args[0])]
+
+        def run(shard):
+            with self.shard_session(shard) as shard_db:
+                return fn(shard_db) if args is None else fn(shard_db, args[shard])
+        return list(self._pool.map(run, range(len(self.engines))))
+
+    def next_booking_id(self, db, shard: int):
+        """
+        Id for a new booking on a SQLite shard (Postgres shards use a strided
+        sequence, see prepare). Called after the show's seat version was bumped,
+        which holds SQLite's write lock, so MAX() can't race another booking.
+        """
+        if not self.enabled or db.get_bind().dialect.name != "sqlite":
+            return None
+        (highest,) = db.execute(text("SELECT COALESCE(MAX(booking_id), 0) FROM bookings")).one()
+        return _next_strided(highest, shard, self.stride)
+
+    def prepare(self, create: bool):
+        """Create the sharded tables (without foreign keys into the catalog) and stride booking id sequences."""
+        metadata = _shard_metadata()
+        for shard, shard_engine in enumerate(self.engines):
+            if create:
+                metadata.create_all(bind=shard_engine)
+            if shard_engine.dialect.name == "postgresql":
+                with shard_engine.begin() as conn:
+                    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('cinex_booking_ids'))"))
+                    increment = conn.execute(text(
+                        "SELECT increment_by FROM pg_sequences WHERE sequencename = 'bookings_booking_id_seq'"
+                    )).scalar()
+                    if increment is not None and increment != self.stride:
+                        highest = conn.execute(text("SELECT COALESCE(MAX(booking_id), 0) FROM bookings")).scalar()
+                        conn.execute(text(
+                            f"ALTER SEQUENCE bookings_booking_id_seq INCREMENT BY {self.stride} "
+                            f"RESTART WITH {_next_strided(highest, shard, self.stride)}"
+                        ))
+
+
+def _next_strided(highest: int, shard: int, stride: int) -> int:
+    """Smallest id above `highest` that belongs to `shard`."""
+    candidate = highest + 1
+    return candidate + (shard + 1 - candidate) % stride
+
+
+def _shard_metadata() -> MetaData:
+    """The sharded tables, minus foreign keys to catalog tables that aren't on the shards."""
+    metadata = MetaData()
+    for name in SHARDED_TABLES:
+        table = Base.metadata.tables[name].to_metadata(metadata)
+        for constraint in list(table.foreign_key_constraints):
+            if constraint.elements[0].target_fullname.split(".")[0] not in SHARDED_TABLES:
+                table.constraints.discard(constraint)
+                table.foreign_keys.difference_update(constraint.elements)
+                for column in constraint.columns:
+                    column.foreign_keys.difference_update(constraint.elements)
+    return metadata
+
+
+shard_router = ShardRouter(SHARD_DATABASE_URLS)
+
+# After a client writes, its reads go to the primary for this long (read-your-writes)
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", 10))
+PRIMARY_UNTIL_COOKIE = "cinex_primary_until"
+PRIMARY_UNTIL_HEADER = "X-Primary-Until"
 
 # Base class for models
 Base = declarative_base()
@@ -25,3 +196,71 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def _reads_from_primary(request) -> bool:
+    """True while the client is inside its read-your-writes window."""
+    marker = request.headers.get(PRIMARY_UNTIL_HEADER) or request.cookies.get(PRIMARY_UNTIL_COOKIE)
+    try:
+        return marker is not None and float(marker) > time.time()
+    except ValueError:
+        return False
+
+# Dependency for read-only handlers: replica session, or the primary right after the client wrote
+def get_read_db(request: Request):
+    if replica_engine is engine or _reads_from_primary(request):
+        db = SessionLocal()
+    else:
+        db = ReplicaSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def mark_primary_reads(response):
+    """Pin the client's following reads to the primary (cookie for browsers, header for other clients)."""
+    until = str(int(time.time()) + READ_YOUR_WRITES_SECONDS)
+    response.set_cookie(
+        PRIMARY_UNTIL_COOKIE, until,
+        max_age=READ_YOUR_WRITES_SECONDS, httponly=True, samesite="lax"
+    )
+    response.headers[PRIMARY_UNTIL_HEADER] = until
+
+
+# --- Startup & health helpers ---
+def create_tables():
+    """Create missing tables; serialized across workers with an advisory lock on Postgres."""
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('cinex_create_tables'))"))
+        Base.metadata.create_all(bind=conn)
+    # Local replicas (e.g. a second SQLite file) need the tables too
+    if replica_engine is not engine and replica_engine.dialect.name == "sqlite":
+        Base.metadata.create_all(bind=replica_engine)
+
+def warm_pool(size: int = DB_POOL_WARM):
+    """Open `size` connections up front so the first requests don't pay for connecting."""
+    engines = [engine] if replica_engine is engine else [engine, replica_engine]
+    connections = [e.connect() for e in engines for _ in range(max(size, 1))]
+    try:
+        for conn in connections:
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in connections:
+            conn.close()
+
+def check_database(target=None):
+    """Round trip to the database (the primary by default); raises if it is unreachable."""
+    with (target or engine).connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+def pool_status():
+    """Snapshot of the connection pool (QueuePool exposes counters, SQLite pools may not)."""
+    pool = engine.pool
+    status = {"class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        counter = getattr(pool, name, None)
+        if callable(counter):
+            status[name] = counter()
+    if "size" in status:
+        status["capacity"] = status["size"] + DB_MAX_OVERFLOW
+    return status
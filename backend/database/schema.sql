@@ -35,8 +35,21 @@ CREATE TABLE cinemas (
     -- e.g. "Scope Cinemas - CCC"
     location VARCHAR(255) NOT NULL
 );
+-- 4b. Screen Layouts (per cinema screen; screens without a row use the built-in templates)
+CREATE TABLE screen_layouts (
+    layout_id SERIAL PRIMARY KEY,
+    cinema_id INTEGER NOT NULL REFERENCES cinemas(cinema_id) ON DELETE CASCADE,
+    screen_name VARCHAR(50) NOT NULL,
+    rows INTEGER NOT NULL CHECK (rows BETWEEN 1 AND 26),
+    cols INTEGER NOT NULL CHECK (cols > 0),
+    vip_rows INTEGER DEFAULT 0,
+    -- Back rows
+    premium_rows INTEGER DEFAULT 0,
+    -- Rows in front of the VIP rows
+    CONSTRAINT uq_screen_layouts_cinema_screen UNIQUE (cinema_id, screen_name)
+);
 -- 5. Shows Table (Scheduling)
--- Assuming universal seat structure, so no separate screens table needed
+-- Seat structure comes from screen_layouts (by cinema + screen_name) or a built-in template
 CREATE TABLE shows (
     show_id SERIAL PRIMARY KEY,
     movie_id INTEGER REFERENCES movies(movie_id) ON DELETE CASCADE,
@@ -48,26 +61,88 @@ CREATE TABLE shows (
     start_time TIMESTAMP NOT NULL,
     -- Combined Date + Time
     ticket_price DECIMAL(10, 2) NOT NULL,
+    seats_version INTEGER NOT NULL DEFAULT 0,
+    -- Bumped on every booking/cancellation of the show (seat availability version)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 -- 6. Bookings Table
+-- Range-partitioned by show date (one partition per month) so seat lookups and
+-- reports only touch the partitions for the shows they ask about.
+-- Monthly partitions are created ahead of time by backend/utils/partitions.py.
 CREATE TABLE bookings (
-    booking_id SERIAL PRIMARY KEY,
+    booking_id SERIAL,
     user_id VARCHAR(255) REFERENCES users(user_id) ON DELETE
     SET NULL,
         show_id INTEGER REFERENCES shows(show_id) ON DELETE RESTRICT,
         -- Don't delete shows if they have bookings
+        show_date DATE NOT NULL,
+        -- Partition key: calendar date of the show's start_time
         booking_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         total_amount DECIMAL(10, 2) NOT NULL,
         status VARCHAR(20) DEFAULT 'confirmed' CHECK (status IN ('confirmed', 'cancelled', 'pending')),
         contact_email VARCHAR(255) NOT NULL,
-        contact_phone VARCHAR(20) NOT NULL
-);
+        contact_phone VARCHAR(20) NOT NULL,
+        seats_version INTEGER NOT NULL DEFAULT 0,
+        -- Show's seats_version when booked
+        cancelled_version INTEGER,
+        -- Show's seats_version when cancelled
+        PRIMARY KEY (booking_id, show_date)
+) PARTITION BY RANGE (show_date);
+CREATE INDEX ix_bookings_show_id_show_date ON bookings (show_id, show_date);
+-- "My bookings": a user's bookings newest first
+CREATE INDEX ix_bookings_user_id_booking_date ON bookings (user_id, booking_date);
 -- 7. Booking Seats (3NF: Atomic seat storage)
+-- Carries the booking's show_date so it is partitioned the same way as bookings.
 CREATE TABLE booking_seats (
-    booking_seat_id SERIAL PRIMARY KEY,
-    booking_id INTEGER REFERENCES bookings(booking_id) ON DELETE CASCADE,
+    booking_seat_id SERIAL,
+    booking_id INTEGER NOT NULL,
+    show_date DATE NOT NULL,
     seat_number VARCHAR(10) NOT NULL,
     -- e.g. "A1", "B5"
-    UNIQUE(booking_id, seat_number) -- Prevent duplicate seats in same booking
-);
\ No newline at end of file
+    PRIMARY KEY (booking_seat_id, show_date),
+    FOREIGN KEY (booking_id, show_date) REFERENCES bookings(booking_id, show_date) ON DELETE CASCADE,
+    UNIQUE(booking_id, seat_number, show_date) -- Prevent duplicate seats in same booking
+) PARTITION BY RANGE (show_date);
+CREATE INDEX ix_booking_seats_booking_id_show_date ON booking_seats (booking_id, show_date);
+-- 8. Check-ins (one row per admitted booking; its primary key catches repeat scans)
+CREATE TABLE checkins (
+    booking_id INTEGER PRIMARY KEY,
+    show_date DATE NOT NULL,
+    show_id INTEGER NOT NULL REFERENCES shows(show_id),
+    scanned_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    scanner_id VARCHAR(50),
+    FOREIGN KEY (booking_id, show_date) REFERENCES bookings(booking_id, show_date) ON DELETE CASCADE
+);
+CREATE INDEX ix_checkins_show_id ON checkins (show_id);
+-- 9. Outbox (booking/show changes written in the same transaction; the change feed)
+CREATE TABLE outbox_events (
+    event_id BIGSERIAL PRIMARY KEY,
+    event_type VARCHAR(50) NOT NULL,
+    -- e.g. 'booking.created', 'booking.cancelled', 'show.updated'
+    entity_id INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    -- JSON
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    relayed_at TIMESTAMP,
+    -- Set once the event's side effect (confirmation email) is done
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    -- Retry backoff
+    last_error TEXT,
+    feed_position BIGINT UNIQUE
+    -- Change feed order: numbered by the relay after the event committed
+);
+CREATE INDEX ix_outbox_events_pending ON outbox_events (event_id) WHERE relayed_at IS NULL;
+CREATE INDEX ix_outbox_events_unsequenced ON outbox_events (event_id) WHERE feed_position IS NULL;
+-- 10. Show seat versions (booking shards only)
+-- With SHARD_DATABASE_URLS set, bookings, booking_seats, checkins,
+-- outbox_events and this table live in the shard that owns the show's cinema
+-- (cinema_id % number of shards); the catalog (users, movies, cinemas, shows)
+-- stays here. On the shards the foreign keys into catalog tables are dropped,
+-- this table takes over shows.seats_version as the per-show booking lock, and
+-- bookings_booking_id_seq is altered to INCREMENT BY SHARD_ID_STRIDE starting
+-- at the shard's number + 1, so a booking id names its shard.
+CREATE TABLE show_seat_versions (
+    show_id INTEGER PRIMARY KEY,
+    seats_version INTEGER NOT NULL DEFAULT 0
+);
@@ -1,12 +1,132 @@
-from fastapi import FastAPI
+import time
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine, Base
-from routers import movies, bookings, shows
+from database import (
+    engine, replica_engine, SessionLocal, ReplicaSessionLocal, AUTO_CREATE_TABLES,
+    create_tables, warm_pool, mark_primary_reads, shard_router
+)
+# numpy (seat layouts, availability, seat finder, recommendations) is imported
+# with the routers on purpose: warm_caches() compiles the seat layouts with it
+# during startup anyway, so deferring it would only move ~70 ms from imports
+# to startup. scipy, reportlab and the SMTP stack load on first use.
+from routers import movies, bookings, shows, users, health, checkin, changes
+from utils.partitions import ensure_partitions
+from utils.seat_layouts import load_layouts
+from utils.tickets import shutdown_pool as shutdown_ticket_pool
+from utils.periodic import PeriodicTask
+from utils.recommendations import refresh_recommendations, RECOMMENDATION_REFRESH_SECONDS
+from utils.ticket_tokens import forget_ended_shows
+from utils import trending, outbox
+
+_import_ms = (time.perf_counter() - _import_started) * 1000
+
+
+def warm_caches():
+    """Fill in-memory caches before the first request needs them."""
+    db = SessionLocal()
+    try:
+        load_layouts(db)
+    finally:
+        db.close()
+
+
+def refresh_similar_movies():
+    db = ReplicaSessionLocal()
+    try:
+        refresh_recommendations(db)
+    finally:
+        db.close()
+
+
+def resync_trending():
+    db = ReplicaSessionLocal()
+    try:
+        trending.resync(db)
+    finally:
+        db.close()
+
+
+def relay_outbox():
+    db = SessionLocal()
+    try:
+        outbox.relay_all(db)
+    finally:
+        db.close()
+
+
+def prune():
+    db = SessionLocal()
+    try:
+        outbox.prune_all(db)
+        forget_ended_shows(db)
+    finally:
+        db.close()
 
-# Initialize Database Tables
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="CineX API", version="1.0.0")
+# Builds the similar-movies index off the request path, then keeps it current
+recommendations_refresher = PeriodicTask("similar-movies", RECOMMENDATION_REFRESH_SECONDS, refresh_similar_movies)
+# Loads the trending counters, then merges in bookings taken by other workers
+trending_resync = PeriodicTask("trending", trending.TRENDING_RESYNC_SECONDS, resync_trending)
+# Sends confirmation emails queued in the outbox; bookings wake it so they go out at once
+outbox_relay = PeriodicTask("outbox-relay", outbox.OUTBOX_RELAY_SECONDS, relay_outbox)
+outbox.wake_relay = outbox_relay.wake
+# Hourly: deletes relayed outbox events and forgets check-ins of shows that have ended
+pruner = PeriodicTask("prune", 3600, prune)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    error = None
+    try:
+        # Tables are only created outside production; there the schema is
+        # managed separately so workers never race each other running DDL
+        if AUTO_CREATE_TABLES:
+            create_tables()
+        # Open a few pooled connections so the first requests skip the connect cost
+        warm_pool()
+        # Create this month's and upcoming monthly booking partitions (Postgres only)
+        ensure_partitions(engine)
+        if shard_router.enabled:
+            # Booking shards: their tables (when auto-creating), strided booking ids, partitions
+            shard_router.prepare(AUTO_CREATE_TABLES)
+            for shard_engine in shard_router.engines:
+                ensure_partitions(shard_engine)
+        warm_caches()
+        print("\n✅ Database Connected Successfully!\n")
+    except Exception as e:
+        # Keep serving; /readyz reports not ready until the database answers
+        error = str(e)
+        print(f"\n❌ Database Connection Failed: {e}\n")
+
+    if RECOMMENDATION_REFRESH_SECONDS > 0:
+        recommendations_refresher.start()
+    if trending.TRENDING_RESYNC_SECONDS > 0:
+        trending_resync.start()
+    if outbox.OUTBOX_RELAY_SECONDS > 0:
+        outbox_relay.start()
+    pruner.start()
+
+    startup_ms = (time.perf_counter() - started) * 1000
+    health.mark_started(import_ms=_import_ms, startup_ms=startup_ms, error=error)
+    print(f"🚀 Startup finished in {startup_ms:.0f} ms (imports {_import_ms:.0f} ms)")
+
+    yield
+
+    recommendations_refresher.stop()
+    trending_resync.stop()
+    outbox_relay.stop()
+    pruner.stop()
+    shutdown_ticket_pool()
+    engine.dispose()
+    for shard_engine in shard_router.engines:
+        shard_engine.dispose()
+
+
+app = FastAPI(title="CineX API", version="1.0.0", lifespan=lifespan)
 
 # CORS (Cross-Origin Resource Sharing) - Allow Frontend to talk to Backend
 origins = [
@@ -24,23 +144,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "X-Queue-Position", "X-Queue-Wait-Ms", "Idempotent-Replayed", "X-Primary-Until"],
 )
 
+# Read-your-writes: after a successful write, the client's reads stick to the primary for a while
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    response = await call_next(request)
+    if (
+        replica_engine is not engine
+        and request.method not in ("GET", "HEAD", "OPTIONS")
+        and response.status_code < 400
+    ):
+        mark_primary_reads(response)
+    return response
+
 # Register Routers
+app.include_router(health.router)
 app.include_router(movies.router)
 app.include_router(bookings.router)
 app.include_router(shows.router)
-
-@app.on_event("startup")
-def startup_event():
-    try:
-        # Test connection
-        with engine.connect() as conn:
-            print("\n✅ Database Connected Successfully!\n")
-    except Exception as e:
-        print(f"\n❌ Database Connection Failed: {e}\n")
+app.include_router(users.router)
+app.include_router(checkin.router)
+app.include_router(changes.router)
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to CineX Backend API! 🎬"}
-
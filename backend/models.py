@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Date, TIMESTAMP, Numeric, ForeignKey, DECIMAL
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Date, TIMESTAMP, Numeric, ForeignKey, DECIMAL, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -46,6 +46,24 @@ class Cinema(Base):
     location = Column(String(255), nullable=False)
 
     shows = relationship("Show", back_populates="cinema")
+    screen_layouts = relationship("ScreenLayout", back_populates="cinema", cascade="all, delete-orphan")
+
+class ScreenLayout(Base):
+    __tablename__ = "screen_layouts"
+
+    layout_id = Column(Integer, primary_key=True, index=True)
+    cinema_id = Column(Integer, ForeignKey("cinemas.cinema_id"), nullable=False)
+    screen_name = Column(String(50), nullable=False)
+    rows = Column(Integer, nullable=False)
+    cols = Column(Integer, nullable=False)
+    vip_rows = Column(Integer, default=0)      # Back rows
+    premium_rows = Column(Integer, default=0)  # Rows in front of the VIP rows
+
+    cinema = relationship("Cinema", back_populates="screen_layouts")
+
+    __table_args__ = (
+        UniqueConstraint("cinema_id", "screen_name", name="uq_screen_layouts_cinema_screen"),
+    )
 
 class Show(Base):
     __tablename__ = "shows"
@@ -57,6 +75,7 @@ class Show(Base):
     screen_type = Column(String(50))
     start_time = Column(TIMESTAMP, nullable=False)
     ticket_price = Column(DECIMAL(10, 2), nullable=False)
+    seats_version = Column(Integer, nullable=False, default=0, server_default="0")  # Bumped on every booking/cancellation
     created_at = Column(TIMESTAMP, server_default=func.now())
 
     movie = relationship("Movie", back_populates="shows")
@@ -69,21 +88,91 @@ class Booking(Base):
     booking_id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String(255), ForeignKey("users.user_id"), nullable=True)
     show_id = Column(Integer, ForeignKey("shows.show_id"))
+    show_date = Column(Date, nullable=False)  # Partition key (monthly partitions on Postgres)
     booking_date = Column(TIMESTAMP, server_default=func.now())
     total_amount = Column(DECIMAL(10, 2), nullable=False)
     status = Column(String(20), default="confirmed")
     contact_email = Column(String(255), nullable=False)
     contact_phone = Column(String(20), nullable=False)
+    seats_version = Column(Integer, nullable=False, default=0, server_default="0")  # Show's seats_version when booked
+    cancelled_version = Column(Integer, nullable=True)  # Show's seats_version when cancelled
 
     show = relationship("Show", back_populates="bookings")
     user = relationship("User")
     seats = relationship("BookingSeat", back_populates="booking", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_bookings_show_id_show_date", "show_id", "show_date"),
+        Index("ix_bookings_user_id_booking_date", "user_id", "booking_date"),
+    )
+
 class BookingSeat(Base):
     __tablename__ = "booking_seats"
 
     booking_seat_id = Column(Integer, primary_key=True, index=True)
     booking_id = Column(Integer, ForeignKey("bookings.booking_id"))
+    show_date = Column(Date, nullable=False)  # Copied from the booking so seat lookups prune partitions
     seat_number = Column(String(10), nullable=False)
 
     booking = relationship("Booking", back_populates="seats")
+
+    __table_args__ = (
+        Index("ix_booking_seats_booking_id_show_date", "booking_id", "show_date"),
+    )
+
+class ShowSeatVersion(Base):
+    """
+    Seat availability version of a show whose bookings live in a booking shard.
+
+    Plays the part of shows.seats_version there (the shows table stays on the
+    primary): bumping it locks the row, serializing bookings of the show.
+    """
+    __tablename__ = "show_seat_versions"
+
+    show_id = Column(Integer, primary_key=True, autoincrement=False)
+    seats_version = Column(Integer, nullable=False, default=0, server_default="0")
+
+class Checkin(Base):
+    __tablename__ = "checkins"
+
+    booking_id = Column(Integer, ForeignKey("bookings.booking_id"), primary_key=True)  # One admission per booking
+    show_date = Column(Date, nullable=False)
+    show_id = Column(Integer, ForeignKey("shows.show_id"), nullable=False, index=True)
+    scanned_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+    scanner_id = Column(String(50))
+
+class OutboxEvent(Base):
+    """
+    Booking and show changes, written in the same transaction as the change.
+
+    Ordered by feed_position, they are the change feed (/changes): the relay
+    numbers events after they commit, so positions follow commit order even
+    when event_ids don't. Events with a side effect (e.g. the confirmation
+    email) start with relayed_at unset until the outbox relay has carried it out.
+    """
+    __tablename__ = "outbox_events"
+
+    event_id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    event_type = Column(String(50), nullable=False)  # e.g. "booking.created"
+    entity_id = Column(Integer, nullable=False)      # booking_id or show_id
+    payload = Column(Text, nullable=False)            # JSON
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+    relayed_at = Column(TIMESTAMP)
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(TIMESTAMP, nullable=False, server_default=func.now())  # Retry backoff
+    last_error = Column(Text)
+    feed_position = Column(BigInteger().with_variant(Integer, "sqlite"), unique=True)  # Set by the relay after commit
+
+    # Small indexes the relay polls: only events still waiting for their side effect / feed position
+    __table_args__ = (
+        Index(
+            "ix_outbox_events_pending", "event_id",
+            postgresql_where=relayed_at.is_(None),
+            sqlite_where=relayed_at.is_(None)
+        ),
+        Index(
+            "ix_outbox_events_unsequenced", "event_id",
+            postgresql_where=feed_position.is_(None),
+            sqlite_where=feed_position.is_(None)
+        ),
+    )
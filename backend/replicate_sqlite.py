@@ -0,0 +1,56 @@
+"""
+Local stand-in for streaming replication when testing read/write splitting
+with two SQLite files, e.g.:
+
+    DATABASE_URL=sqlite:///./primary.db
+    DATABASE_REPLICA_URL=sqlite:///./replica.db
+
+    python replicate_sqlite.py --interval 2
+
+Copies the primary into the replica every `interval` seconds, so reads from
+the replica lag behind writes like they would against a real replica.
+"""
+import argparse
+import os
+import sqlite3
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _sqlite_path(url: str) -> str:
+    if not url or not url.startswith("sqlite:///"):
+        raise SystemExit(f"Expected a sqlite:/// URL, got: {url}")
+    return url[len("sqlite:///"):]
+
+
+def replicate_once(primary_path: str, replica_path: str):
+    source = sqlite3.connect(primary_path)
+    target = sqlite3.connect(replica_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy the primary SQLite database into the replica.")
+    parser.add_argument("--interval", type=float, default=2.0, help="Seconds between copies (replica lag)")
+    parser.add_argument("--once", action="store_true", help="Copy once and exit")
+    args = parser.parse_args()
+
+    primary = _sqlite_path(os.getenv("DATABASE_URL"))
+    replica = _sqlite_path(os.getenv("DATABASE_REPLICA_URL"))
+
+    print(f"🔁 Replicating {primary} -> {replica} every {args.interval}s")
+    while True:
+        replicate_once(primary, replica)
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,161 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from datetime import datetime
+from itertools import islice
+import heapq
+import numpy as np
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, joinedload
-from typing import List
-from database import get_db
+from typing import List, Optional, Union
+from database import get_db, shard_router
 import models
 import schemas
-from utils.email_service import send_booking_confirmation
+from utils.partitions import ensure_partition_for, partition_key
+from utils import idempotency, admission, availability, tickets, trending, outbox
+from utils.users import ensure_user, remember_user
+from utils.ticket_tokens import sign_ticket, checkins
+from utils.seat_layouts import layout_for_show, SEAT_TYPES
+from utils.seat_finder import find_best_block
+from utils.seat_holds import seat_holds
 
 router = APIRouter(
     prefix="/bookings",
     tags=["bookings"]
 )
 
+# Results of completed booking requests, keyed by (client, Idempotency-Key)
+booking_results = idempotency.IdempotencyStore()
+
+# Per-show waiting room that keeps an on-sale rush from exhausting DB connections
+booking_admission = admission.ShowAdmissionController()
+
+
+def _booked_seat_numbers(db: Session, show_id: int, show_date):
+    """Seat numbers held by active bookings of a show, pruned to the show's partition."""
+    rows = db.query(models.BookingSeat.seat_number).join(
+        models.Booking,
+        and_(
+            models.Booking.booking_id == models.BookingSeat.booking_id,
+            models.Booking.show_date == models.BookingSeat.show_date
+        )
+    ).filter(
+        models.Booking.show_id == show_id,
+        models.Booking.show_date == show_date,
+        models.BookingSeat.show_date == show_date,
+        models.Booking.status != "cancelled"
+    ).all()
+    return {seat_number for (seat_number,) in rows}
+
+
+def _seat_changes_since(db: Session, show_id: int, show_date, since: int):
+    """Seats booked and released after availability version `since`."""
+    rows = db.query(
+        models.BookingSeat.seat_number,
+        models.Booking.seats_version,
+        models.Booking.cancelled_version
+    ).join(
+        models.Booking,
+        and_(
+            models.Booking.booking_id == models.BookingSeat.booking_id,
+            models.Booking.show_date == models.BookingSeat.show_date
+        )
+    ).filter(
+        models.Booking.show_id == show_id,
+        models.Booking.show_date == show_date,
+        models.BookingSeat.show_date == show_date,
+        or_(models.Booking.seats_version > since, models.Booking.cancelled_version > since)
+    ).all()
+    
+    booked, released = set(), set()
+    for seat_number, booked_version, cancelled_version in rows:
+        if cancelled_version is None:
+            booked.add(seat_number)
+        elif booked_version <= since:
+            released.add(seat_number)
+        # Booked and cancelled after `since`: no net change
+    
+    # A released seat that was booked again is simply booked
+    return booked, released - booked
+
+
 @router.post("/", response_model=schemas.Booking, status_code=201)
-def create_booking(
+async def create_booking(
     booking: schemas.BookingCreate, 
-    background_tasks: BackgroundTasks, 
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db)
 ):
     """
-    Create a new booking and send confirmation email.
+    Create a new booking; its confirmation email goes out through the outbox.
+
+    Clients may send an `Idempotency-Key` header. Retrying a request with the
+    same key and body returns the original booking without touching the seat
+    tables; reusing a key for a different body is rejected.
+
+    Attempts for the same show go through a FIFO waiting room. The position the
+    request had in line is returned in `X-Queue-Position`; when the line is full
+    the API answers 503 with a `Retry-After` header.
+    """
+    if not idempotency_key:
+        return await _admit_and_create_booking(booking, response, db)
+
+    # Scope keys per client so two users can't collide on the same key
+    key = (booking.user_id or booking.contact_email, idempotency_key)
+    outcome, stored = booking_results.begin(key, idempotency.fingerprint(booking.model_dump_json()))
+
+    if outcome == idempotency.REPLAY:
+        return JSONResponse(status_code=201, content=stored, headers={"Idempotent-Replayed": "true"})
+    if outcome == idempotency.IN_PROGRESS:
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still being processed")
+    if outcome == idempotency.MISMATCH:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different booking request")
+
+    try:
+        created = await _admit_and_create_booking(booking, response, db)
+    except BaseException:
+        booking_results.release(key)
+        raise
+
+    booking_results.complete(key, created.model_dump(mode="json"))
+    return created
+
+
+async def _admit_and_create_booking(booking, response, db) -> schemas.Booking:
+    """Wait for a slot in the show's waiting room, then book on a worker thread."""
+    try:
+        async with booking_admission.admit(booking.show_id) as ticket:
+            response.headers["X-Queue-Position"] = str(ticket.position)
+            response.headers["X-Queue-Wait-Ms"] = str(round(ticket.waited_ms))
+            return await run_in_threadpool(_create_booking, booking, db)
+    except admission.QueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Too many booking attempts for this show right now. Please retry in {e.retry_after}s.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+@router.get("/show/{show_id}/queue")
+def get_booking_queue(show_id: int):
+    """Current waiting-room state for a show's booking attempts."""
+    return booking_admission.status(show_id)
+
+
+def _create_booking(booking: schemas.BookingCreate, db: Session) -> schemas.Booking:
+    """
+    Create a new booking and queue its confirmation email.
     
     Steps:
     1. Validate that the show exists (and fetch movie/cinema details for email)
-    2. Check if requested seats are already booked for that show
-    3. If user_id provided, ensure user exists in DB
-    4. Create the booking record
-    5. Create individual seat records
-    6. Send confirmation email (background task)
+    2. Validate seats against the screen layout and compute the total server-side
+    3. Check if requested seats are already booked for that show
+    4. If user_id provided, ensure user exists in DB
+    5. Create the booking record
+    6. Create individual seat records and a booking.created outbox event
+       (same transaction: the outbox relay sends the email, even if this
+       worker dies right after the commit)
     7. Return the created booking
     """
     
@@ -39,16 +168,48 @@ def create_booking(
     if not show:
         raise HTTPException(status_code=404, detail="Show not found")
     
-    # 2. Check for already booked seats
-    existing_bookings = db.query(models.Booking).filter(
-        models.Booking.show_id == booking.show_id,
-        models.Booking.status != "cancelled"
-    ).all()
+    # 2. Validate seats against the screen layout and price them from its
+    #    precomputed price table (the client's total is only cross-checked)
+    layout = layout_for_show(show)
+    seat_indices = layout.seat_indices(booking.seat_numbers)
+    
+    if seat_indices.size == 0:
+        raise HTTPException(status_code=400, detail="At least one seat is required")
     
-    booked_seats = set()
-    for existing_booking in existing_bookings:
-        for seat in existing_booking.seats:
-            booked_seats.add(seat.seat_number)
+    invalid = np.flatnonzero(seat_indices < 0)
+    if invalid.size:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid seats for this screen: {', '.join(booking.seat_numbers[i] for i in invalid)}"
+        )
+    
+    if np.unique(seat_indices).size != seat_indices.size:
+        raise HTTPException(status_code=400, detail="Duplicate seats in booking")
+    
+    total_amount = layout.total_amount(seat_indices, show.ticket_price)
+    if abs(total_amount - booking.total_amount) > 0.5:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Total amount mismatch: expected {total_amount:.2f}"
+        )
+    
+    with shard_router.session(db, cinema_id=show.cinema_id) as booking_db:
+        return _store_booking(booking, show, total_amount, db, booking_db)
+
+
+def _store_booking(booking: schemas.BookingCreate, show, total_amount: float, db: Session, booking_db: Session) -> schemas.Booking:
+    """
+    Steps 3-7 of _create_booking, against the store holding the show's
+    bookings: `booking_db` is `db` itself unless bookings are sharded.
+    """
+    # 3. Check for already booked seats (filtered on the partition key so only
+    #    the show's monthly partition is scanned). Taking the next availability
+    #    version first serializes this check with other bookings of the show,
+    #    and with a move to another day: re-read the date once it's taken.
+    seats_version = availability.bump_seats_version(booking_db, booking.show_id)
+    db.refresh(show, ["start_time"])
+    show_date = ensure_partition_for(booking_db, show.start_time)
+    booked_seats = _booked_seat_numbers(booking_db, booking.show_id, show_date)
     
     requested_seats = set(booking.seat_numbers)
     conflicts = requested_seats.intersection(booked_seats)
@@ -59,124 +220,447 @@ def create_booking(
             detail=f"Seats already booked: {', '.join(sorted(conflicts))}"
         )
     
-    # 3. If user_id is provided, ensure user exists in DB (auto-create for Clerk users)
+    held = requested_seats.intersection(seat_holds.held_seats(booking.show_id, exclude=booking.hold_id))
+    if held:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Seats are being held by another customer: {', '.join(sorted(held))}"
+        )
+    
+    # 4. If user_id is provided, ensure user exists in DB (auto-create for Clerk users).
+    #    Known users are skipped; new ones are upserted inside the booking transaction
+    #    (with booking shards, in a primary transaction committed only once the
+    #    booking is, so a failed booking leaves no user behind).
     if booking.user_id:
-        existing_user = db.query(models.User).filter(models.User.user_id == booking.user_id).first()
-        if not existing_user:
-            email_name = booking.contact_email.split('@')[0] if booking.contact_email else 'User'
-            new_user = models.User(
-                user_id=booking.user_id,
-                first_name=email_name,
-                last_name='',
-                email=booking.contact_email or '',
-                role='customer'
-            )
-            db.add(new_user)
-            db.commit()
-    
-    # 4. Create the booking record
+        try:
+            ensure_user(db, booking.user_id, booking.contact_email)
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Contact email is already registered to another user")
+    
+    # 5. Create the booking record (on a SQLite shard the strided id is picked here)
+    shard = shard_router.shard_for_cinema(show.cinema_id) if shard_router.enabled else None
     db_booking = models.Booking(
+        booking_id=shard_router.next_booking_id(booking_db, shard),
         user_id=booking.user_id,
         show_id=booking.show_id,
-        total_amount=booking.total_amount,
+        show_date=show_date,
+        total_amount=total_amount,
         contact_email=booking.contact_email,
         contact_phone=booking.contact_phone,
-        status="confirmed"
+        status="confirmed",
+        seats_version=seats_version
     )
-    db.add(db_booking)
-    db.commit()
-    db.refresh(db_booking)
-    
-    # 5. Create seat records
-    for seat_number in booking.seat_numbers:
-        db_seat = models.BookingSeat(
-            booking_id=db_booking.booking_id,
-            seat_number=seat_number
-        )
-        db.add(db_seat)
     
-    db.commit()
-    db.refresh(db_booking)
+    # 6. Create seat records and the outbox event (same transaction, one commit)
+    db_booking.seats = [
+        models.BookingSeat(show_date=show_date, seat_number=seat_number)
+        for seat_number in booking.seat_numbers
+    ]
+    booking_db.add(db_booking)
+    booking_db.flush()
+    outbox.add_event(booking_db, "booking.created", db_booking.booking_id, outbox.booking_payload(db_booking, booking.seat_numbers))
+    booking_db.commit()
+    if booking_db is not db:
+        db.commit()
+    outbox.wake_relay()
+    booking_db.refresh(db_booking)
     
-    # 6. Send confirmation email (Background Task)
-    if booking.contact_email:
-        background_tasks.add_task(
-            send_booking_confirmation,
-            contact_email=booking.contact_email,
-            movie_title=show.movie.title,
-            cinema_name=show.cinema.name,
-            screen_name=show.screen_name,
-            show_time_obj=show.start_time,
-            seat_numbers=booking.seat_numbers,
-            booking_id=db_booking.booking_id,
-            total_amount=booking.total_amount
-        )
+    if booking.user_id:
+        remember_user(booking.user_id)
+    if booking.hold_id:
+        seat_holds.release(booking.hold_id)
+    trending.record_booking(show, len(booking.seat_numbers), db_booking.booking_date)
     
-    return db_booking
+    # 7. Serialize here, on the worker thread, so relationship loads stay off the event loop
+    created = schemas.Booking.model_validate(db_booking)
+    created.ticket_token = sign_ticket(db_booking.booking_id, show.show_id, booking.seat_numbers)
+    return created
 
 
-@router.get("/user/{user_id}", response_model=List[schemas.BookingWithShow])
-def get_user_bookings(user_id: str, db: Session = Depends(get_db)):
-    """Get all bookings for a specific user with show details."""
-    bookings = db.query(models.Booking).options(
-        joinedload(models.Booking.show).joinedload(models.Show.cinema),
-        joinedload(models.Booking.show).joinedload(models.Show.movie),
-        joinedload(models.Booking.seats)
-    ).filter(
-        models.Booking.user_id == user_id
-    ).order_by(models.Booking.booking_date.desc()).all()
-    return bookings
+# Booking columns read by listings; rows stay plain after their (shard) session closes
+_LISTING_COLUMNS = (
+    models.Booking.booking_id,
+    models.Booking.show_id,
+    models.Booking.show_date,
+    models.Booking.user_id,
+    models.Booking.status,
+    models.Booking.booking_date,
+    models.Booking.total_amount,
+    models.Booking.contact_email,
+    models.Booking.contact_phone,
+)
+
+
+def _shows_started_today(db: Session, now: datetime):
+    """Ids of today's shows that have already started (few: today's schedule only)."""
+    today = datetime.combine(now.date(), datetime.min.time())
+    return [show_id for (show_id,) in db.query(models.Show.show_id).filter(
+        models.Show.start_time >= today,
+        models.Show.start_time < now
+    ).all()]
+
+
+def _user_bookings_query(booking_db: Session, user_id: str, view: str, now: datetime, started_today):
+    """
+    A user's bookings (served by the (user_id, booking_date) index).
+
+    "upcoming" is confirmed bookings whose show hasn't started; the show_date
+    filter also skips partitions of past months. "past" is everything else.
+    Shows live on the primary, so instead of joining them, today's shows
+    that already started are passed in as `started_today`.
+    """
+    query = booking_db.query(models.Booking).filter(models.Booking.user_id == user_id)
+
+    if view == "upcoming":
+        query = query.filter(
+            models.Booking.status == "confirmed",
+            models.Booking.show_date >= now.date(),
+            models.Booking.show_id.notin_(started_today)
+        )
+    elif view == "past":
+        query = query.filter(or_(
+            models.Booking.status != "confirmed",
+            models.Booking.show_date < now.date(),
+            models.Booking.show_id.in_(started_today)
+        ))
+    return query
+
+
+def _seat_numbers_by_booking(db: Session, rows):
+    """Seat numbers for a page of bookings in one query, pruned to their partitions."""
+    if not rows:
+        return {}
+    seats = db.query(models.BookingSeat.booking_id, models.BookingSeat.seat_number).filter(
+        models.BookingSeat.booking_id.in_([row.booking_id for row in rows]),
+        models.BookingSeat.show_date.in_({row.show_date for row in rows})
+    ).order_by(models.BookingSeat.booking_seat_id).all()
+    by_booking = {}
+    for booking_id, seat_number in seats:
+        by_booking.setdefault(booking_id, []).append(seat_number)
+    return by_booking
+
+
+def _gather_bookings(db: Session, make_query, skip: int, limit: int):
+    """
+    A page of bookings, newest first, as [(row, seat_numbers)].
+
+    `make_query(booking_db)` filters bookings in one store. With booking
+    shards, every shard returns its newest skip + limit and the pages are
+    merged; otherwise the page is read directly.
+    """
+    def page(booking_db):
+        query = make_query(booking_db).with_entities(*_LISTING_COLUMNS).order_by(
+            models.Booking.booking_date.desc(), models.Booking.booking_id.desc()
+        )
+        rows = (query.limit(skip + limit) if shard_router.enabled else query.offset(skip).limit(limit)).all()
+        seat_numbers = _seat_numbers_by_booking(booking_db, rows)
+        return [(row, seat_numbers.get(row.booking_id, [])) for row in rows]
+
+    pages = shard_router.scatter(db, page)
+    if not shard_router.enabled:
+        return pages[0]
+    merged = heapq.merge(
+        *pages, key=lambda item: (item[0].booking_date or datetime.min, item[0].booking_id), reverse=True
+    )
+    return list(islice(merged, skip, skip + limit))
+
+
+def _shows_by_id(db: Session, show_ids):
+    shows = db.query(models.Show).options(
+        joinedload(models.Show.movie),
+        joinedload(models.Show.cinema)
+    ).filter(models.Show.show_id.in_(set(show_ids))).all()
+    return {show.show_id: show for show in shows}
+
+
+def _booking_with_show(row, seat_numbers, show) -> schemas.BookingWithShow:
+    return schemas.BookingWithShow(
+        **{key: value for key, value in row._mapping.items() if key != "show_date"},
+        seats=[schemas.BookingSeat(seat_number=seat_number) for seat_number in seat_numbers],
+        show=schemas.Show.model_validate(show) if show is not None else None
+    )
+
+
+@router.get("/user/{user_id}", response_model=Union[List[schemas.BookingSummary], List[schemas.BookingWithShow]])
+def get_user_bookings(
+    user_id: str,
+    view: str = Query("all", pattern="^(all|upcoming|past)$"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    detail: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    A page of a user's bookings, newest first.
+
+    Returns flat summaries by default; `detail=true` returns full bookings
+    with show, movie and cinema. Either way the page's shows are loaded in
+    one query, and with booking shards the page is gathered from all shards.
+    """
+    now = datetime.now()
+    started_today = _shows_started_today(db, now) if view != "all" else []
+    page = _gather_bookings(
+        db, lambda booking_db: _user_bookings_query(booking_db, user_id, view, now, started_today), skip, limit
+    )
+    shows = _shows_by_id(db, [row.show_id for row, _ in page])
+
+    if detail:
+        return [_booking_with_show(row, seat_numbers, shows.get(row.show_id)) for row, seat_numbers in page]
+
+    return [
+        schemas.BookingSummary(
+            booking_id=row.booking_id,
+            status=row.status,
+            booking_date=row.booking_date,
+            total_amount=row.total_amount,
+            show_id=row.show_id,
+            start_time=show.start_time,
+            screen_name=show.screen_name,
+            movie_id=show.movie.movie_id,
+            movie_title=show.movie.title,
+            poster_url=show.movie.poster_url,
+            cinema_name=show.cinema.name,
+            seat_numbers=seat_numbers
+        )
+        for row, seat_numbers in page
+        if (show := shows.get(row.show_id)) is not None and show.movie and show.cinema
+    ]
 
 
 @router.get("/", response_model=List[schemas.BookingWithShow])
 def get_all_bookings(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all bookings (admin endpoint)."""
-    bookings = db.query(models.Booking).options(
-        joinedload(models.Booking.show).joinedload(models.Show.cinema),
-        joinedload(models.Booking.show).joinedload(models.Show.movie),
-        joinedload(models.Booking.seats)
-    ).order_by(
-        models.Booking.booking_date.desc()
-    ).offset(skip).limit(limit).all()
-    return bookings
+    """Get all bookings (admin endpoint), gathered from every booking shard."""
+    page = _gather_bookings(db, lambda booking_db: booking_db.query(models.Booking), skip, limit)
+    shows = _shows_by_id(db, [row.show_id for row, _ in page])
+    return [_booking_with_show(row, seat_numbers, shows.get(row.show_id)) for row, seat_numbers in page]
+
+
+def _seat_snapshot(booking_db: Session, show, layout, version: int):
+    """Cached booked seats of a show at `version`, read from its booking store on a miss."""
+    snapshot = availability.snapshots.get(show.show_id, version, layout)
+    if snapshot is None:
+        snapshot = availability.snapshots.put(
+            show.show_id, version, _booked_seat_numbers(booking_db, show.show_id, partition_key(show.start_time)), layout
+        )
+    return snapshot
 
 
 @router.get("/show/{show_id}/booked-seats")
-def get_booked_seats(show_id: int, db: Session = Depends(get_db)):
-    """Get all booked seat numbers for a specific show."""
+def get_booked_seats(
+    show_id: int,
+    request: Request,
+    format: str = "list",
+    since: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get booked seats for a specific show, tagged with its availability version.
+
+    - `format=list` (default): booked seat labels.
+    - `format=bitset`: base64 bitset in seat-map order, one bit per seat
+      (most significant bit first), set for booked seats.
+    - `since=<version>`: only the seats booked or released after that version
+      (labels for `list`, seat-map indices for `bitset`), with the current
+      layout and seat count: if those no longer match the client's base, it
+      must fetch the full seats again.
+
+    Responses carry an ETag of the version; polling with `If-None-Match` or a
+    current `since` answers 304 without reading any seats.
+    """
+    if format not in ("list", "bitset"):
+        raise HTTPException(status_code=400, detail="format must be 'list' or 'bitset'")
     
     show = db.query(models.Show).filter(models.Show.show_id == show_id).first()
     if not show:
         raise HTTPException(status_code=404, detail="Show not found")
     
-    bookings = db.query(models.Booking).filter(
-        models.Booking.show_id == show_id,
-        models.Booking.status != "cancelled"
-    ).all()
+    with shard_router.session(db, cinema_id=show.cinema_id) as booking_db:
+        return _booked_seats_response(show, request, format, since, db, booking_db)
+
+
+def _booked_seats_response(show, request: Request, format: str, since: Optional[int], db: Session, booking_db: Session):
+    show_id = show.show_id
+    version = availability.seats_versions(booking_db, [show])[show_id]
+    tag = availability.etag(show_id, version)
+    if request.headers.get("if-none-match") == tag or since == version:
+        return Response(status_code=304, headers={"ETag": tag})
+    
+    layout = layout_for_show(show)
+    show_date = partition_key(show.start_time)
+    
+    if since is not None and since < version:
+        booked, released = _seat_changes_since(booking_db, show_id, show_date, since)
+        if format == "bitset":
+            booked = sorted(int(i) for i in layout.seat_indices(list(booked)) if i >= 0)
+            released = sorted(int(i) for i in layout.seat_indices(list(released)) if i >= 0)
+        else:
+            booked, released = sorted(booked), sorted(released)
+        body = {
+            "show_id": show_id,
+            "format": format,
+            "since": since,
+            "version": version,
+            "layout": layout.key,
+            "seat_count": layout.size,
+            "booked": booked,
+            "released": released
+        }
+        return JSONResponse(content=body, headers={"ETag": tag})
     
-    booked_seats = []
-    for booking in bookings:
-        for seat in booking.seats:
-            booked_seats.append(seat.seat_number)
+    snapshot = _seat_snapshot(booking_db, show, layout, version)
     
-    return {"booked_seats": booked_seats}
+    if format == "bitset":
+        body = {
+            "show_id": show_id,
+            "format": "bitset",
+            "version": version,
+            "layout": snapshot["layout"],
+            "seat_count": snapshot["seat_count"],
+            "bitset": snapshot["bitset"]
+        }
+    else:
+        body = {"booked_seats": snapshot["booked_seats"], "version": version}
+    return JSONResponse(content=body, headers={"ETag": tag})
 
 
-@router.patch("/{booking_id}/cancel")
-def cancel_booking(booking_id: int, db: Session = Depends(get_db)):
-    """Cancel a booking by ID."""
+@router.post("/show/{show_id}/best-seats", response_model=schemas.BestSeats)
+def find_best_seats(show_id: int, request: schemas.BestSeatsRequest, db: Session = Depends(get_db)):
+    """
+    Pick the best `count` adjacent seats still available for a show and (by
+    default) hold them for SEAT_HOLD_SECONDS.
+
+    Seats are chosen from the cached occupancy mask of the show plus seats
+    other customers are holding: one row, as central and as close to the
+    ideal row as possible, else split over two adjacent rows. Pass the
+    returned `hold_id` when booking; pass it as `release_hold_id` to ask again.
+    """
+    if request.seat_type is not None and request.seat_type not in SEAT_TYPES:
+        raise HTTPException(status_code=400, detail=f"seat_type must be one of: {', '.join(SEAT_TYPES)}")
+    
+    show = db.query(models.Show).filter(models.Show.show_id == show_id).first()
+    if not show:
+        raise HTTPException(status_code=404, detail="Show not found")
     
-    booking = db.query(models.Booking).filter(
-        models.Booking.booking_id == booking_id
-    ).first()
+    if request.release_hold_id:
+        seat_holds.release(request.release_hold_id)
     
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
+    layout = layout_for_show(show)
+    with shard_router.session(db, cinema_id=show.cinema_id) as booking_db:
+        version = availability.seats_versions(booking_db, [show])[show_id]
+        snapshot = _seat_snapshot(booking_db, show, layout, version)
+    
+    # A concurrent request may hold the same block first; search again without it
+    for _ in range(3):
+        held = seat_holds.held_seats(show_id)
+        unavailable = snapshot["mask"] | availability.occupancy_mask(layout, held) if held else snapshot["mask"]
+        block = find_best_block(layout, unavailable, request.count, request.seat_type)
+        if block is None:
+            raise HTTPException(status_code=409, detail=f"No {request.count} adjacent seats available")
+        if not request.hold:
+            hold = (None, None)
+            break
+        hold = seat_holds.claim(show_id, block["seats"])
+        if hold is not None:
+            break
+    else:
+        raise HTTPException(status_code=409, detail="Seats are in high demand, please try again")
+    
+    return schemas.BestSeats(
+        show_id=show_id,
+        seat_numbers=block["seats"],
+        split=block["split"],
+        score=block["score"],
+        total_amount=layout.total_amount(np.array(block["indices"]), show.ticket_price),
+        hold_id=hold[0],
+        hold_expires_at=hold[1]
+    )
+
+
+@router.delete("/holds/{hold_id}")
+def release_seat_hold(hold_id: str):
+    """Give up held seats (e.g. the customer went back to pick seats by hand)."""
+    if not seat_holds.release(hold_id):
+        raise HTTPException(status_code=404, detail="Hold not found or expired")
+    return {"message": "Hold released", "hold_id": hold_id}
+
+
+def _is_booking_holder(booking, user_id: Optional[str], email: Optional[str]) -> bool:
+    """Whether the caller named the booking's user or its contact email."""
+    if user_id and booking.user_id == user_id:
+        return True
+    return bool(email) and (booking.contact_email or "").lower() == email.strip().lower()
+
+
+def _load_ticket_data(db: Session, booking_id: int, user_id: Optional[str], email: Optional[str]) -> dict:
+    with shard_router.session(db, booking_id=booking_id) as booking_db:
+        booking = booking_db.query(models.Booking).options(
+            joinedload(models.Booking.seats)
+        ).filter(models.Booking.booking_id == booking_id).first() if booking_db is not None else None
+        
+        # Same answer for someone else's booking as for a missing one, so ids can't be probed
+        if not booking or not _is_booking_holder(booking, user_id, email):
+            raise HTTPException(status_code=404, detail="Booking not found")
+        
+        if booking.status == "cancelled":
+            raise HTTPException(status_code=400, detail="Booking is cancelled")
+        
+        # The show comes from the primary: with booking shards it isn't next to the booking
+        show = _shows_by_id(db, [booking.show_id]).get(booking.show_id)
+        return tickets.ticket_data(booking, show)
+
+
+@router.get("/{booking_id}/ticket.pdf")
+async def get_booking_ticket(
+    booking_id: int,
+    user_id: Optional[str] = None,
+    email: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Download the PDF e-ticket of a booking (rendered in a process pool, cached on disk).
+
+    Its QR code admits the holder, so pass the booking's `user_id` or its
+    contact `email`; other callers get 404.
+    """
+    data = await run_in_threadpool(_load_ticket_data, db, booking_id, user_id, email)
+    pdf = await tickets.get_ticket_pdf_async(data)
+    return Response(
+        content=pdf,
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f'inline; filename="CineX-BK{booking_id}.pdf"',
+            "ETag": f'"{booking_id}-{tickets.ticket_version(data)}"'
+        }
+    )
+
+
+@router.patch("/{booking_id}/cancel")
+def cancel_booking(booking_id: int, db: Session = Depends(get_db)):
+    """Cancel a booking by ID (on the booking shard that issued the id)."""
     
-    if booking.status == "cancelled":
-        raise HTTPException(status_code=400, detail="Booking is already cancelled")
+    with shard_router.session(db, booking_id=booking_id) as booking_db:
+        booking = booking_db.query(models.Booking).filter(
+            models.Booking.booking_id == booking_id
+        ).first() if booking_db is not None else None
+        
+        if not booking:
+            raise HTTPException(status_code=404, detail="Booking not found")
+        
+        if booking.status == "cancelled":
+            raise HTTPException(status_code=400, detail="Booking is already cancelled")
+        
+        booking.status = "cancelled"
+        booking.cancelled_version = availability.bump_seats_version(booking_db, booking.show_id)
+        seat_numbers = [seat.seat_number for seat in booking.seats]
+        outbox.add_event(booking_db, "booking.cancelled", booking_id, outbox.booking_payload(booking, seat_numbers))
+        booking_db.commit()
+        show_id, booked_at = booking.show_id, booking.booking_date
     
-    booking.status = "cancelled"
-    db.commit()
+    show = db.query(models.Show).filter(models.Show.show_id == show_id).first()
+    if show:
+        trending.record_cancellation(show, len(seat_numbers), booked_at)
+    # Its signed ticket still verifies, so door scanners must be told it's void
+    checkins.revoke(show_id, booking_id)
     
     return {"message": "Booking cancelled successfully", "booking_id": booking_id}
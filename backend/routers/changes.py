@@ -0,0 +1,57 @@
+import json
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from database import get_db, shard_router
+import schemas
+from utils import outbox
+
+router = APIRouter(
+    prefix="/changes",
+    tags=["changes"]
+)
+
+
+@router.get("/", response_model=schemas.ChangeFeed)
+def get_changes(
+    after: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    shard: Optional[int] = Query(None, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    Booking and show changes after cursor `after`, oldest first.
+
+    Start from 0 (or a cursor saved earlier) and keep calling with
+    `after=next_after`; an empty page means the feed is caught up. Events are
+    delivered in the order they committed (their `position`, given by the
+    outbox relay within OUTBOX_RELAY_SECONDS of the commit), so a cursor
+    never passes an event that is still to appear. Reads the primary, where
+    positions are assigned.
+
+    With booking shards each shard has its own feed (and its own positions):
+    pass `shard` to read a booking shard, omit it for the primary's show
+    events. Keep one cursor per feed.
+    """
+    if shard is None:
+        events = outbox.read_feed(db, after, limit)
+    else:
+        if shard >= len(shard_router.engines):
+            raise HTTPException(status_code=400, detail=f"No booking shard {shard}")
+        with shard_router.shard_session(shard) as shard_db:
+            events = outbox.read_feed(shard_db, after, limit)
+    return schemas.ChangeFeed(
+        events=[
+            schemas.ChangeEvent(
+                position=event.feed_position,
+                event_id=event.event_id,
+                event_type=event.event_type,
+                entity_id=event.entity_id,
+                created_at=event.created_at,
+                payload=json.loads(event.payload)
+            )
+            for event in events
+        ],
+        next_after=events[-1].feed_position if events else after,
+        has_more=len(events) == limit
+    )
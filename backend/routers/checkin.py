@@ -0,0 +1,129 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from typing import List
+from database import get_db, shard_router
+import models
+import schemas
+from utils.ticket_tokens import verify_ticket, InvalidTicket, checkins
+
+router = APIRouter(
+    prefix="/checkin",
+    tags=["checkin"]
+)
+
+
+def _insert(db):
+    """Dialect-specific INSERT for checkins (both dialects support ON CONFLICT ... RETURNING)."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(models.Checkin)
+
+
+@router.post("/scans", response_model=List[schemas.ScanResult])
+def record_scans(batch: schemas.ScanBatch, db: Session = Depends(get_db)):
+    """
+    Check in a batch of ticket scans for one show.
+
+    Tokens are verified in memory (HMAC), and repeat scans or revoked tickets
+    this worker has already seen are answered from memory too. The remaining
+    tickets cost three small queries per batch rather than one per guest:
+    look up their bookings, insert the confirmed ones into checkins, and
+    (only if any were already there) read when they were admitted.
+    Results come back in the order of the submitted scans.
+
+    With booking shards, those queries go to the shard of the show's cinema.
+    """
+    now = datetime.now()
+    results = [None] * len(batch.scans)
+    pending = {}  # booking_id -> [(index, seats, scanned_at)] still to settle against the DB
+
+    for index, scan in enumerate(batch.scans):
+        try:
+            booking_id, show_id, seats = verify_ticket(scan.token)
+        except InvalidTicket as e:
+            results[index] = schemas.ScanResult(index=index, status="invalid", detail=str(e))
+            continue
+
+        if show_id != batch.show_id:
+            results[index] = schemas.ScanResult(
+                index=index, status="wrong_show", booking_id=booking_id, seats=seats,
+                detail=f"Ticket is for show {show_id}"
+            )
+        elif checkins.is_revoked(show_id, booking_id):
+            results[index] = schemas.ScanResult(index=index, status="cancelled", booking_id=booking_id, seats=seats)
+        elif checkins.admitted_at(show_id, booking_id) is not None:
+            results[index] = schemas.ScanResult(
+                index=index, status="duplicate", booking_id=booking_id, seats=seats,
+                first_scanned_at=checkins.admitted_at(show_id, booking_id)
+            )
+        else:
+            pending.setdefault(booking_id, []).append((index, seats, scan.scanned_at or now))
+
+    if pending:
+        cinema_id = db.query(models.Show.cinema_id).filter(models.Show.show_id == batch.show_id).scalar()
+        if cinema_id is None:
+            for booking_id, scans in pending.items():
+                for index, seats, _ in scans:
+                    results[index] = schemas.ScanResult(index=index, status="not_found", booking_id=booking_id, seats=seats)
+        else:
+            with shard_router.session(db, cinema_id=cinema_id) as booking_db:
+                _settle(booking_db, batch, pending, results)
+
+    return results
+
+
+def _settle(db: Session, batch: schemas.ScanBatch, pending: dict, results: list):
+    """Admit the pending scans against the checkins table of the store holding the show's bookings."""
+    rows = db.query(models.Booking.booking_id, models.Booking.status, models.Booking.show_date).filter(
+        models.Booking.booking_id.in_(list(pending)),
+        models.Booking.show_id == batch.show_id
+    ).all()
+    bookings = {booking_id: status for booking_id, status, _ in rows}
+    show_dates = {booking_id: show_date for booking_id, _, show_date in rows}
+
+    confirmed = [booking_id for booking_id, status in bookings.items() if status == "confirmed"]
+    admitted = {}
+    if confirmed:
+        # The first scan of a booking in this batch is the one that gets in
+        stmt = _insert(db).values([
+            {
+                "booking_id": booking_id,
+                "show_date": show_dates[booking_id],
+                "show_id": batch.show_id,
+                "scanned_at": pending[booking_id][0][2],
+                "scanner_id": batch.scanner_id,
+            }
+            for booking_id in confirmed
+        ]).on_conflict_do_nothing().returning(models.Checkin.booking_id, models.Checkin.scanned_at)
+        admitted = dict(db.execute(stmt).all())
+
+        # Confirmed but not inserted: someone (maybe another worker) admitted them earlier
+        earlier = [booking_id for booking_id in confirmed if booking_id not in admitted]
+        if earlier:
+            first_scans = dict(db.query(models.Checkin.booking_id, models.Checkin.scanned_at).filter(
+                models.Checkin.booking_id.in_(earlier)
+            ).all())
+        db.commit()
+
+        for booking_id, scanned_at in admitted.items():
+            checkins.admit(batch.show_id, booking_id, scanned_at)
+        for booking_id in earlier:
+            checkins.admit(batch.show_id, booking_id, first_scans.get(booking_id))
+
+    for booking_id, scans in pending.items():
+        status = bookings.get(booking_id)
+        if status is not None and status != "confirmed":
+            checkins.revoke(batch.show_id, booking_id)
+        for position, (index, seats, scanned_at) in enumerate(scans):
+            result = schemas.ScanResult(index=index, status="admitted", booking_id=booking_id, seats=seats)
+            if status is None:
+                result.status = "not_found"
+            elif status != "confirmed":
+                result.status = "cancelled"
+            elif booking_id not in admitted or position > 0:
+                result.status = "duplicate"
+                result.first_scanned_at = checkins.admitted_at(batch.show_id, booking_id)
+            results[index] = result
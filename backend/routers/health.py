@@ -0,0 +1,70 @@
+import time
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from database import check_database, pool_status, engine, replica_engine
+
+router = APIRouter(tags=["health"])
+
+# Filled in by the lifespan handler in main.py once startup has finished
+startup_info = {
+    "started": False,
+    "started_at": None,
+    "import_ms": None,
+    "startup_ms": None,
+    "startup_error": None,
+}
+
+
+def mark_started(import_ms: float, startup_ms: float, error: str = None):
+    startup_info.update(
+        started=True,
+        started_at=time.time(),
+        import_ms=round(import_ms, 1),
+        startup_ms=round(startup_ms, 1),
+        startup_error=error,
+    )
+
+
+@router.get("/healthz")
+def liveness():
+    """Liveness probe: the process is up and serving requests."""
+    uptime = time.time() - startup_info["started_at"] if startup_info["started_at"] else 0
+    return {
+        "status": "ok",
+        "uptime_seconds": round(uptime, 1),
+        "import_ms": startup_info["import_ms"],
+        "startup_ms": startup_info["startup_ms"],
+    }
+
+
+@router.get("/readyz")
+def readiness():
+    """Readiness probe: startup finished, the database answers and the pool has room."""
+    checks = {"startup": startup_info["started"]}
+    ready = startup_info["started"]
+
+    # Inspect the pool first: with every connection checked out, a DB probe would
+    # just sit waiting for a free connection
+    pool = pool_status()
+    checks["pool"] = pool
+    if "capacity" in pool and pool.get("checkedout", 0) >= pool["capacity"]:
+        pool["exhausted"] = True
+        checks["database"] = "skipped"
+        ready = False
+    else:
+        try:
+            check_database()
+            checks["database"] = "ok"
+        except Exception as e:
+            checks["database"] = f"error: {e}"
+            ready = False
+        if replica_engine is not engine:
+            try:
+                check_database(replica_engine)
+                checks["replica"] = "ok"
+            except Exception as e:
+                checks["replica"] = f"error: {e}"
+                ready = False
+
+    body = {"status": "ready" if ready else "not_ready", "checks": checks}
+    return JSONResponse(status_code=200 if ready else 503, content=body)
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional
-from database import get_db
+from database import get_db, get_read_db
 import models
 import schemas
+from utils import availability, trending
+from utils.schedules import schedules
+from utils.recommendations import similar_index, RECOMMENDATION_TOP_K
 
 router = APIRouter(
     prefix="/movies",
@@ -16,7 +20,7 @@ def get_movies(
     limit: int = 100, 
     search: Optional[str] = None,
     genre: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     query = db.query(models.Movie)
     
@@ -29,16 +33,68 @@ def get_movies(
     movies = query.offset(skip).limit(limit).all()
     return movies
 
+@router.get("/trending", response_model=List[schemas.TrendingMovie])
+def get_trending_movies(
+    limit: int = Query(10, ge=1, le=trending.TRENDING_TOP_N),
+    cinema_id: Optional[int] = None,
+    by: str = Query("seats", pattern="^(seats|bookings)$"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Movies ranked by recent bookings (time-decayed), overall or at one cinema.
+
+    Served from in-memory counters; the rendered list is cached for a few seconds.
+    """
+    key = (cinema_id, by, limit)
+    body = trending.rankings.get(key)
+    if body is None:
+        ranked = trending.trending_counters.top(limit, cinema_id=cinema_id, by=by)
+        movies = db.query(models.Movie).options(
+            selectinload(models.Movie.genres)
+        ).filter(models.Movie.movie_id.in_([movie_id for movie_id, _, _ in ranked])).all()
+        by_id = {movie.movie_id: movie for movie in movies}
+        body = trending.rankings.put(key, json.dumps([
+            schemas.TrendingMovie(
+                movie=by_id[movie_id], bookings=round(bookings, 2), seats=round(seats, 2)
+            ).model_dump(mode="json")
+            for movie_id, bookings, seats in ranked
+            if movie_id in by_id
+        ]).encode("utf-8"))
+    # Already-encoded JSON, so a cache hit does no serialization at all
+    return Response(content=body, media_type="application/json")
+
 @router.get("/{movie_id}", response_model=schemas.Movie)
-def get_movie(movie_id: int, db: Session = Depends(get_db)):
+def get_movie(movie_id: int, db: Session = Depends(get_read_db)):
     movie = db.query(models.Movie).filter(models.Movie.movie_id == movie_id).first()
     if movie is None:
         raise HTTPException(status_code=404, detail="Movie not found")
     return movie
 
-@router.get("/{movie_id}/shows", response_model=List[schemas.Show])
-def get_movie_shows(movie_id: int, db: Session = Depends(get_db)):
-    """Get all shows for a specific movie."""
+@router.get("/{movie_id}/similar", response_model=List[schemas.Movie])
+def get_similar_movies(
+    movie_id: int,
+    limit: int = Query(10, ge=1, le=RECOMMENDATION_TOP_K),
+    db: Session = Depends(get_read_db)
+):
+    """Movies most similar to this one by genre and audience, from the precomputed index."""
+    similar_ids = similar_index.similar(movie_id, limit)
+    if similar_ids is None:
+        # Not indexed yet (new title, or the first build is still running)
+        if db.query(models.Movie.movie_id).filter(models.Movie.movie_id == movie_id).first() is None:
+            raise HTTPException(status_code=404, detail="Movie not found")
+        return []
+    if not similar_ids:
+        return []
+
+    movies = db.query(models.Movie).options(
+        selectinload(models.Movie.genres)
+    ).filter(models.Movie.movie_id.in_(similar_ids)).all()
+    by_id = {movie.movie_id: movie for movie in movies}
+    return [by_id[i] for i in similar_ids if i in by_id]
+
+@router.get("/{movie_id}/shows", response_model=List[schemas.ShowWithAvailability])
+def get_movie_shows(movie_id: int, db: Session = Depends(get_read_db)):
+    """Get all upcoming shows for a specific movie, with seats left for each."""
     movie = db.query(models.Movie).filter(models.Movie.movie_id == movie_id).first()
     if not movie:
         raise HTTPException(status_code=404, detail="Movie not found")
@@ -51,7 +107,15 @@ def get_movie_shows(movie_id: int, db: Session = Depends(get_db)):
         models.Show.movie_id == movie_id,
         models.Show.start_time >= datetime.now()  # Only future shows
     ).order_by(models.Show.start_time).all()
-    return shows
+    
+    # Seat counts for every listed show in a single grouped query
+    summaries = availability.summarize(db, shows)
+    results = []
+    for show in shows:
+        result = schemas.ShowWithAvailability.model_validate(show)
+        result.availability = schemas.ShowAvailability(**summaries[show.show_id])
+        results.append(result)
+    return results
 
 @router.post("/", response_model=schemas.Movie, status_code=201)
 def create_movie(movie: schemas.MovieCreate, db: Session = Depends(get_db)):
@@ -89,6 +153,8 @@ def delete_movie(movie_id: int, db: Session = Depends(get_db)):
     
     db.delete(movie)
     db.commit()
+    # Cinema schedules embed movie summaries
+    schedules.clear()
     return {"message": "Movie deleted successfully", "movie_id": movie_id}
 
 
@@ -116,10 +182,6 @@ def update_movie(movie_id: int, movie_update: schemas.MovieCreate, db: Session =
         db.add(db_genre)
     
     db.commit()
+    schedules.clear()
     db.refresh(db_movie)
     return db_movie
-
-@router.get("/{movie_id}/shows", response_model=List[schemas.Show])
-def get_movie_shows(movie_id: int, db: Session = Depends(get_db)):
-    shows = db.query(models.Show).filter(models.Show.movie_id == movie_id).all()
-    return shows
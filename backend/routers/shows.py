@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from datetime import date, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session, joinedload
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
-from database import get_db
+from database import get_db, get_read_db, shard_router
 import models
 import schemas
+from utils.partitions import ensure_partition_for, partition_key, rekey_show_bookings
+from utils.seat_layouts import layout_for_show, load_layouts
+from utils import availability, outbox, schedules
 
 router = APIRouter(
     prefix="/shows",
@@ -12,13 +17,58 @@ router = APIRouter(
 )
 
 @router.get("/", response_model=List[schemas.Show])
-def get_all_shows(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_all_shows(skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
     """Get all shows with pagination."""
     shows = db.query(models.Show).options(joinedload(models.Show.cinema)).offset(skip).limit(limit).all()
     return shows
 
+@router.get("/availability", response_model=List[schemas.ShowAvailability])
+def get_shows_availability(show_ids: List[int] = Query(...), db: Session = Depends(get_read_db)):
+    """Seats left and sell-through for several shows in one round trip."""
+    if len(show_ids) > 200:
+        raise HTTPException(status_code=400, detail="At most 200 shows per request")
+    shows = db.query(models.Show).filter(models.Show.show_id.in_(show_ids)).all()
+    summaries = availability.summarize(db, shows)
+    return [summaries[show.show_id] for show in shows]
+
+@router.get("/schedule", response_model=schemas.CinemaSchedule)
+def get_cinema_schedule(
+    cinema_id: int,
+    date_from: date,
+    date_to: Optional[date] = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    What's on at a cinema from `date_from` to `date_to` (default: that one
+    day), per day grouped by movie and screen.
+
+    Each cinema-day is built once into a cached snapshot and reused until a
+    show of that day is created, changed or deleted. The cinema is read from
+    the replica; only rebuilds of missing days go to the primary, so a
+    snapshot never bakes in replica lag.
+    """
+    date_to = date_to or date_from
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to must not be before date_from")
+    if date_to - date_from >= timedelta(days=schedules.SCHEDULE_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"At most {schedules.SCHEDULE_MAX_DAYS} days per request")
+
+    cinema = db.query(models.Cinema).filter(models.Cinema.cinema_id == cinema_id).first()
+    if not cinema:
+        raise HTTPException(status_code=404, detail="Cinema not found")
+
+    body = {
+        "cinema": schemas.Cinema.model_validate(cinema).model_dump(mode="json"),
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "days": schedules.cinema_schedule(cinema_id, date_from, date_to),
+    }
+    # Snapshots are already JSON-ready; skip re-validating them
+    return Response(content=json.dumps(body), media_type="application/json")
+
+
 @router.get("/{show_id}", response_model=schemas.Show)
-def get_show(show_id: int, db: Session = Depends(get_db)):
+def get_show(show_id: int, db: Session = Depends(get_read_db)):
     """Get a single show by ID with cinema details."""
     show = db.query(models.Show).filter(models.Show.show_id == show_id).first()
     if not show:
@@ -26,6 +76,15 @@ def get_show(show_id: int, db: Session = Depends(get_db)):
     return show
 
 
+@router.get("/{show_id}/seat-map")
+def get_show_seat_map(show_id: int, db: Session = Depends(get_read_db)):
+    """Seat map of the show's screen with per-seat types and prices."""
+    show = db.query(models.Show).filter(models.Show.show_id == show_id).first()
+    if not show:
+        raise HTTPException(status_code=404, detail="Show not found")
+    return layout_for_show(show).seat_map(show.ticket_price)
+
+
 @router.post("/", response_model=schemas.Show, status_code=201)
 def create_show(show: schemas.ShowCreate, db: Session = Depends(get_db)):
     """Create a new show."""
@@ -39,6 +98,9 @@ def create_show(show: schemas.ShowCreate, db: Session = Depends(get_db)):
     if not cinema:
         raise HTTPException(status_code=404, detail="Cinema not found")
     
+    # Make sure bookings for this show have a partition to land in
+    ensure_partition_for(db, show.start_time)
+    
     db_show = models.Show(
         movie_id=show.movie_id,
         cinema_id=show.cinema_id,
@@ -48,7 +110,10 @@ def create_show(show: schemas.ShowCreate, db: Session = Depends(get_db)):
         ticket_price=show.ticket_price
     )
     db.add(db_show)
+    db.flush()
+    outbox.add_event(db, "show.created", db_show.show_id, outbox.show_payload(db_show))
     db.commit()
+    schedules.show_changed(db_show.cinema_id, db_show.start_time)
     db.refresh(db_show)
     return db_show
 
@@ -71,6 +136,7 @@ def create_shows_batch(batch: schemas.BatchShowCreate, db: Session = Depends(get
     
     created_shows = []
     for start_time in batch.start_times:
+        ensure_partition_for(db, start_time)
         db_show = models.Show(
             movie_id=batch.movie_id,
             cinema_id=batch.cinema_id,
@@ -82,7 +148,12 @@ def create_shows_batch(batch: schemas.BatchShowCreate, db: Session = Depends(get
         db.add(db_show)
         created_shows.append(db_show)
     
+    db.flush()
+    for db_show in created_shows:
+        outbox.add_event(db, "show.created", db_show.show_id, outbox.show_payload(db_show))
     db.commit()
+    for start_time in batch.start_times:
+        schedules.show_changed(batch.cinema_id, start_time)
     for show in created_shows:
         db.refresh(show)
     
@@ -106,14 +177,55 @@ def update_show(show_id: int, show_update: schemas.ShowCreate, db: Session = Dep
     if not cinema:
         raise HTTPException(status_code=404, detail="Cinema not found")
     
+    old_date, new_date = partition_key(db_show.start_time), partition_key(show_update.start_time)
+    
+    # Bookings stay in the shard of the cinema they were made at
+    if shard_router.enabled and (
+        shard_router.shard_for_cinema(show_update.cinema_id) != shard_router.shard_for_cinema(db_show.cinema_id)
+    ):
+        with shard_router.session(db, cinema_id=db_show.cinema_id) as booking_db:
+            booked = booking_db.query(models.Booking.booking_id).filter(models.Booking.show_id == show_id).first()
+        if booked:
+            raise HTTPException(status_code=400, detail="Show has bookings and can't move to a cinema in another booking shard")
+    
+    ensure_partition_for(db, show_update.start_time)
+    
+    # A new screen, cinema or date changes the show's layout or where its
+    # bookings are keyed: take a new seat version so cached seat snapshots
+    # (and their ETags) are dropped. Bookings follow a date change in the
+    # same transaction (with booking shards, in the shard's, below).
+    seats_changed = (show_update.cinema_id, show_update.screen_name, show_update.start_time) != (
+        db_show.cinema_id, db_show.screen_name, db_show.start_time
+    )
+    if seats_changed and not shard_router.enabled:
+        availability.bump_seats_version(db, show_id)
+        if new_date != old_date:
+            rekey_show_bookings(db, show_id, old_date, new_date)
+    
+    previous = (db_show.cinema_id, db_show.start_time)
     db_show.movie_id = show_update.movie_id
     db_show.cinema_id = show_update.cinema_id
     db_show.screen_name = show_update.screen_name
     db_show.screen_type = show_update.screen_type
     db_show.start_time = show_update.start_time
     db_show.ticket_price = show_update.ticket_price
+    outbox.add_event(db, "show.updated", show_id, outbox.show_payload(db_show))
     
-    db.commit()
+    if seats_changed and shard_router.enabled:
+        # The version and the bookings live on the shard. The bump holds the
+        # show's bookings off until the shard commits, after the primary, so
+        # a booking waiting on it reads the new date.
+        with shard_router.session(db, cinema_id=show_update.cinema_id) as booking_db:
+            availability.bump_seats_version(booking_db, show_id)
+            if new_date != old_date:
+                ensure_partition_for(booking_db, show_update.start_time)
+                rekey_show_bookings(booking_db, show_id, old_date, new_date)
+            db.commit()
+            booking_db.commit()
+    else:
+        db.commit()
+    schedules.show_changed(*previous)
+    schedules.show_changed(show_update.cinema_id, show_update.start_time)
     db.refresh(db_show)
     return db_show
 
@@ -125,14 +237,17 @@ def delete_show(show_id: int, db: Session = Depends(get_db)):
     if not show:
         raise HTTPException(status_code=404, detail="Show not found")
     
+    outbox.add_event(db, "show.deleted", show_id, outbox.show_payload(show))
+    cinema_id, start_time = show.cinema_id, show.start_time
     db.delete(show)
     db.commit()
+    schedules.show_changed(cinema_id, start_time)
     return {"message": "Show deleted successfully", "show_id": show_id}
 
 
 # --- Cinemas ---
 @router.get("/cinemas/all", response_model=List[schemas.Cinema])
-def get_all_cinemas(db: Session = Depends(get_db)):
+def get_all_cinemas(db: Session = Depends(get_read_db)):
     """Get all cinemas."""
     cinemas = db.query(models.Cinema).all()
     return cinemas
@@ -202,3 +317,55 @@ def update_cinema(cinema_id: int, cinema_update: CinemaCreate, db: Session = Dep
     db.commit()
     db.refresh(db_cinema)
     return db_cinema
+
+
+# --- Screen Layouts ---
+@router.get("/cinemas/{cinema_id}/layouts", response_model=List[schemas.ScreenLayout])
+def get_screen_layouts(cinema_id: int, db: Session = Depends(get_read_db)):
+    """Get the saved screen layouts of a cinema."""
+    return db.query(models.ScreenLayout).filter(models.ScreenLayout.cinema_id == cinema_id).all()
+
+
+@router.put("/cinemas/{cinema_id}/layouts", response_model=schemas.ScreenLayout)
+def save_screen_layout(cinema_id: int, layout: schemas.ScreenLayoutBase, db: Session = Depends(get_db)):
+    """Create or replace the layout of one of a cinema's screens."""
+    cinema = db.query(models.Cinema).filter(models.Cinema.cinema_id == cinema_id).first()
+    if not cinema:
+        raise HTTPException(status_code=404, detail="Cinema not found")
+    
+    if layout.vip_rows + layout.premium_rows > layout.rows:
+        raise HTTPException(status_code=400, detail="VIP and premium rows exceed the number of rows")
+    
+    db_layout = db.query(models.ScreenLayout).filter(
+        models.ScreenLayout.cinema_id == cinema_id,
+        models.ScreenLayout.screen_name == layout.screen_name
+    ).first()
+    if not db_layout:
+        db_layout = models.ScreenLayout(cinema_id=cinema_id, screen_name=layout.screen_name)
+        db.add(db_layout)
+    
+    db_layout.rows = layout.rows
+    db_layout.cols = layout.cols
+    db_layout.vip_rows = layout.vip_rows
+    db_layout.premium_rows = layout.premium_rows
+    
+    # The screen's shows get new seats: retire their cached seat snapshots
+    show_ids = [show_id for (show_id,) in db.query(models.Show.show_id).filter(
+        models.Show.cinema_id == cinema_id,
+        models.Show.screen_name == layout.screen_name
+    ).all()]
+    if not shard_router.enabled:
+        for show_id in show_ids:
+            availability.bump_seats_version(db, show_id)
+    
+    db.commit()
+    db.refresh(db_layout)
+    if show_ids and shard_router.enabled:
+        with shard_router.session(db, cinema_id=cinema_id) as booking_db:
+            for show_id in show_ids:
+                availability.bump_seats_version(booking_db, show_id)
+            booking_db.commit()
+    
+    # Recompile the in-memory layouts so new bookings are validated against it
+    load_layouts(db)
+    return db_layout
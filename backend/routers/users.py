@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from database import get_db
+import schemas
+from utils.users import sync_users
+
+router = APIRouter(
+    prefix="/users",
+    tags=["users"]
+)
+
+
+@router.post("/sync")
+def sync_clerk_users(payload: schemas.UserSync, db: Session = Depends(get_db)):
+    """Import Clerk users in batches (insert new users, refresh names and emails of existing ones)."""
+    try:
+        batches = sync_users(db, payload.users)
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"User sync failed: {e.orig}")
+    return {"message": "Users synced successfully", "users": len(payload.users), "batches": batches}
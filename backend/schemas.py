@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import date, datetime
 from decimal import Decimal
@@ -20,6 +20,10 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+class UserSync(BaseModel):
+    """Batch of Clerk users to import."""
+    users: List[UserCreate]
+
 # --- Genres ---
 class MovieGenreBase(BaseModel):
     genre: str
@@ -51,6 +55,11 @@ class Movie(MovieBase):
     class Config:
         from_attributes = True
 
+class TrendingMovie(BaseModel):
+    movie: Movie
+    bookings: float  # Time-decayed counts
+    seats: float
+
 # --- Cinemas & Shows ---
 class CinemaBase(BaseModel):
     name: str
@@ -62,6 +71,20 @@ class Cinema(CinemaBase):
     class Config:
         from_attributes = True
 
+class ScreenLayoutBase(BaseModel):
+    screen_name: str
+    rows: int = Field(..., ge=1, le=26)
+    cols: int = Field(..., ge=1, le=60)
+    vip_rows: int = Field(0, ge=0)
+    premium_rows: int = Field(0, ge=0)
+
+class ScreenLayout(ScreenLayoutBase):
+    layout_id: int
+    cinema_id: int
+
+    class Config:
+        from_attributes = True
+
 class ShowBase(BaseModel):
     screen_name: str
     screen_type: Optional[str] = None
@@ -95,6 +118,49 @@ class Show(ShowBase):
     class Config:
         from_attributes = True
 
+class ScheduleMovie(BaseModel):
+    movie_id: int
+    title: str
+    duration_mins: int
+    language: Optional[str] = None
+    rating: Optional[float] = None
+    poster_url: Optional[str] = None
+
+class ScheduleShow(BaseModel):
+    show_id: int
+    start_time: datetime
+    screen_type: Optional[str] = None
+    ticket_price: float
+
+class ScheduleScreen(BaseModel):
+    screen_name: str
+    shows: List[ScheduleShow]  # By start time
+
+class ScheduleMovieShows(BaseModel):
+    movie: ScheduleMovie
+    screens: List[ScheduleScreen]
+
+class ScheduleDay(BaseModel):
+    date: date
+    movies: List[ScheduleMovieShows]  # In order of each movie's first show
+
+class CinemaSchedule(BaseModel):
+    cinema: Cinema
+    date_from: date
+    date_to: date
+    days: List[ScheduleDay]  # Every day of the range, including days without shows
+
+class ShowAvailability(BaseModel):
+    show_id: int
+    total_seats: int
+    booked_seats: int
+    seats_left: int
+    sell_through: float  # Percent of seats sold
+    status: str          # "available", "almost_full" or "sold_out"
+
+class ShowWithAvailability(Show):
+    availability: Optional[ShowAvailability] = None
+
 # --- Bookings ---
 class BookingBase(BaseModel):
     contact_email: str
@@ -105,6 +171,22 @@ class BookingCreate(BookingBase):
     user_id: Optional[str] = None
     seat_numbers: List[str]
     total_amount: float
+    hold_id: Optional[str] = None  # From best-seats: these seats may be booked despite the hold
+
+class BestSeatsRequest(BaseModel):
+    count: int = Field(..., ge=1, le=10)
+    seat_type: Optional[str] = None  # "standard", "premium" or "vip"; any type if omitted
+    hold: bool = True
+    release_hold_id: Optional[str] = None  # Previous hold to give up (asking again)
+
+class BestSeats(BaseModel):
+    show_id: int
+    seat_numbers: List[str]
+    split: bool  # Spread over two adjacent rows (no single row had room)
+    score: float
+    total_amount: float
+    hold_id: Optional[str] = None
+    hold_expires_at: Optional[datetime] = None
 
 class BookingSeat(BaseModel):
     seat_number: str
@@ -120,6 +202,7 @@ class Booking(BookingBase):
     status: str
     booking_date: Optional[datetime] = None
     seats: List[BookingSeat] = []
+    ticket_token: Optional[str] = None  # Signed QR payload; only set on the booking response
 
     class Config:
         from_attributes = True
@@ -128,3 +211,49 @@ class Booking(BookingBase):
 class BookingWithShow(Booking):
     show: Optional[Show] = None
 
+# Flat booking summary (default for a user's bookings list)
+class BookingSummary(BaseModel):
+    booking_id: int
+    status: str
+    booking_date: Optional[datetime] = None
+    total_amount: float
+    show_id: int
+    start_time: datetime
+    screen_name: str
+    movie_id: int
+    movie_title: str
+    poster_url: Optional[str] = None
+    cinema_name: str
+    seat_numbers: List[str] = []
+
+# --- Check-in ---
+class ScanEvent(BaseModel):
+    token: str
+    scanned_at: Optional[datetime] = None  # When the scanner read it; defaults to upload time
+
+class ScanBatch(BaseModel):
+    show_id: int
+    scanner_id: Optional[str] = None
+    scans: List[ScanEvent] = Field(..., max_length=1000)
+
+class ScanResult(BaseModel):
+    index: int  # Position in the submitted batch
+    status: str  # "admitted", "duplicate", "cancelled", "wrong_show", "not_found" or "invalid"
+    booking_id: Optional[int] = None
+    seats: List[str] = []
+    first_scanned_at: Optional[datetime] = None  # For duplicates: when the booking was admitted
+    detail: Optional[str] = None
+
+# --- Change feed ---
+class ChangeEvent(BaseModel):
+    position: int  # Feed order (commit order); pass the last one back as `after`
+    event_id: int
+    event_type: str  # booking.created, booking.cancelled, show.created, show.updated, show.deleted
+    entity_id: int
+    created_at: datetime
+    payload: dict
+
+class ChangeFeed(BaseModel):
+    events: List[ChangeEvent]
+    next_after: int  # Cursor for the next call
+    has_more: bool
@@ -0,0 +1,136 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+# Booking attempts allowed to run against the database at once for one show
+BOOKING_CONCURRENCY_PER_SHOW = int(os.getenv("BOOKING_CONCURRENCY_PER_SHOW", 4))
+# Attempts allowed to wait behind them before new ones are shed
+BOOKING_QUEUE_LIMIT = int(os.getenv("BOOKING_QUEUE_LIMIT", 200))
+# Longest a queued attempt waits for its turn
+BOOKING_QUEUE_TIMEOUT_SECONDS = float(os.getenv("BOOKING_QUEUE_TIMEOUT_SECONDS", 20))
+
+
+class QueueFull(Exception):
+    """Raised when a show's waiting room is full or a queued attempt timed out."""
+
+    def __init__(self, show_id: int, waiting: int, retry_after: int):
+        super().__init__(f"Booking queue for show {show_id} is full")
+        self.show_id = show_id
+        self.waiting = waiting
+        self.retry_after = retry_after
+
+
+class Admission:
+    """Handed to an admitted request: where it stood in line and how long it waited."""
+
+    def __init__(self, position: int, waited_ms: float):
+        self.position = position
+        self.waited_ms = waited_ms
+
+
+class _ShowQueue:
+    def __init__(self):
+        self.active = 0
+        self.waiters = deque()  # FIFO of futures, resolved when a slot is handed over
+
+
+class ShowAdmissionController:
+    """
+    Per-show waiting room for booking attempts.
+
+    At most `concurrency` attempts per show run at once; the rest wait in FIFO
+    order without holding a worker thread or a database connection. When a
+    running attempt finishes, its slot is handed straight to the oldest waiter.
+    Once `queue_limit` attempts are waiting, new ones are rejected with a
+    Retry-After estimate instead of piling onto the same rows.
+
+    State lives in the event loop of the worker process and is only touched
+    from coroutines, so no locking is needed.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = BOOKING_CONCURRENCY_PER_SHOW,
+        queue_limit: int = BOOKING_QUEUE_LIMIT,
+        timeout_seconds: float = BOOKING_QUEUE_TIMEOUT_SECONDS,
+    ):
+        self.concurrency = concurrency
+        self.queue_limit = queue_limit
+        self.timeout_seconds = timeout_seconds
+        self._shows = {}
+        # Moving average of how long an admitted attempt holds its slot
+        self._avg_service_seconds = 0.05
+
+    def _retry_after(self, waiting: int) -> int:
+        return max(1, math.ceil((waiting + 1) / self.concurrency * self._avg_service_seconds))
+
+    def status(self, show_id: int):
+        queue = self._shows.get(show_id)
+        active = queue.active if queue else 0
+        waiting = len(queue.waiters) if queue else 0
+        return {
+            "show_id": show_id,
+            "active": active,
+            "waiting": waiting,
+            "concurrency": self.concurrency,
+            "queue_limit": self.queue_limit,
+            "estimated_wait_seconds": round(waiting / self.concurrency * self._avg_service_seconds, 2),
+        }
+
+    @asynccontextmanager
+    async def admit(self, show_id: int):
+        queue = self._shows.get(show_id)
+        if queue is None:
+            queue = self._shows[show_id] = _ShowQueue()
+
+        enqueued = time.perf_counter()
+        position = 0
+        if queue.active < self.concurrency and not queue.waiters:
+            queue.active += 1
+        else:
+            if len(queue.waiters) >= self.queue_limit:
+                raise QueueFull(show_id, len(queue.waiters), self._retry_after(len(queue.waiters)))
+
+            waiter = asyncio.get_running_loop().create_future()
+            queue.waiters.append(waiter)
+            position = len(queue.waiters)
+            try:
+                await asyncio.wait_for(waiter, self.timeout_seconds)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                if waiter.done() and not waiter.cancelled():
+                    # The slot was handed over just as we gave up: pass it on
+                    self._release(show_id, queue)
+                else:
+                    try:
+                        queue.waiters.remove(waiter)
+                    except ValueError:
+                        pass
+                    self._forget_if_idle(show_id, queue)
+                if isinstance(e, asyncio.TimeoutError):
+                    raise QueueFull(show_id, len(queue.waiters), self._retry_after(len(queue.waiters)))
+                raise
+
+        started = time.perf_counter()
+        try:
+            yield Admission(position, (started - enqueued) * 1000)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._avg_service_seconds = 0.9 * self._avg_service_seconds + 0.1 * elapsed
+            self._release(show_id, queue)
+
+    def _release(self, show_id: int, queue: _ShowQueue):
+        while queue.waiters:
+            waiter = queue.waiters.popleft()
+            if not waiter.done():
+                # Hand the slot to the next in line; `active` stays the same
+                waiter.set_result(None)
+                return
+        queue.active -= 1
+        self._forget_if_idle(show_id, queue)
+
+    def _forget_if_idle(self, show_id: int, queue: _ShowQueue):
+        if queue.active == 0 and not queue.waiters and self._shows.get(show_id) is queue:
+            del self._shows[show_id]
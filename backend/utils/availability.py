@@ -0,0 +1,212 @@
+import base64
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from sqlalchemy import and_, func, update
+from database import shard_router
+import models
+from utils.partitions import partition_key
+from utils.seat_layouts import layout_for_show
+
+# Booked-seat snapshots kept per worker, one per show at its latest version
+AVAILABILITY_CACHE_SIZE = int(os.getenv("AVAILABILITY_CACHE_SIZE", 2000))
+
+# Sell-through (percent) from which a show is reported as almost full
+ALMOST_FULL_PERCENT = float(os.getenv("ALMOST_FULL_PERCENT", 80))
+
+
+def occupancy_mask(layout, seat_numbers) -> np.ndarray:
+    """Boolean mask in layout order with True for every booked seat."""
+    mask = np.zeros(layout.size, dtype=bool)
+    indices = layout.seat_indices(list(seat_numbers))
+    mask[indices[indices >= 0]] = True
+    return mask
+
+
+def encode_bitset(mask: np.ndarray) -> str:
+    """
+    Base64 bitset of a seat mask: seat `i` is bit `7 - i % 8` of byte `i // 8`
+    (most significant bit first), padded with zero bits to a whole byte.
+    """
+    return base64.b64encode(np.packbits(mask).tobytes()).decode("ascii")
+
+
+def etag(show_id: int, version: int) -> str:
+    return f'W/"show-{show_id}-v{version}"'
+
+
+class SnapshotCache:
+    """
+    Bounded LRU of (version, booked seat numbers, occupancy mask, encoded bitset)
+    per show. A snapshot is only served for the layout shape it was built with,
+    so a worker that recompiles a resized screen never reuses an old mask.
+    """
+
+    def __init__(self, max_size: int = AVAILABILITY_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, show_id: int, version: int, layout=None):
+        with self._lock:
+            entry = self._entries.get(show_id)
+            if entry is None or entry["version"] != version:
+                return None
+            if layout is not None and entry["shape"] != layout.shape:
+                return None
+            self._entries.move_to_end(show_id)
+            return entry
+
+    def put(self, show_id: int, version: int, booked_seats, layout):
+        mask = occupancy_mask(layout, booked_seats)
+        mask.setflags(write=False)
+        entry = {
+            "version": version,
+            "booked_seats": sorted(booked_seats),
+            "mask": mask,
+            "bitset": encode_bitset(mask),
+            "layout": layout.key,
+            "seat_count": layout.size,
+            "shape": layout.shape,
+        }
+        with self._lock:
+            current = self._entries.get(show_id)
+            # Never replace a newer snapshot with an older one
+            if current is None or current["version"] <= version:
+                self._entries[show_id] = entry
+                self._entries.move_to_end(show_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+
+
+snapshots = SnapshotCache()
+
+
+def seats_versions(booking_db, shows) -> dict:
+    """
+    Current seat availability version per show_id. `booking_db` is the store
+    holding the shows' bookings: with booking shards the version lives there
+    (show_seat_versions), otherwise on the show row itself.
+    """
+    if not shard_router.enabled:
+        return {show.show_id: show.seats_version or 0 for show in shows}
+    versions = dict(booking_db.query(models.ShowSeatVersion.show_id, models.ShowSeatVersion.seats_version).filter(
+        models.ShowSeatVersion.show_id.in_([show.show_id for show in shows])
+    ).all())
+    return {show.show_id: versions.get(show.show_id, 0) for show in shows}
+
+
+def _insert_seat_version(db):
+    """Dialect-specific INSERT for show_seat_versions (both dialects support ON CONFLICT ... RETURNING)."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(models.ShowSeatVersion)
+
+
+def bump_seats_version(db, show_id: int) -> int:
+    """
+    Take the show's next seat availability version.
+
+    The UPDATE also locks the show row until commit, so concurrent bookings
+    of the same show check and claim seats one at a time. Edits that change
+    which seats a show has or where its bookings are keyed take one too, so
+    cached snapshots of the old state are retired. On a booking shard the
+    show row isn't there: its show_seat_versions row plays that part.
+    """
+    if shard_router.enabled:
+        stmt = _insert_seat_version(db).values(show_id=show_id, seats_version=1)
+        return db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["show_id"],
+                set_={"seats_version": models.ShowSeatVersion.seats_version + 1}
+            ).returning(models.ShowSeatVersion.seats_version)
+        ).scalar_one()
+    return db.execute(
+        update(models.Show)
+        .where(models.Show.show_id == show_id)
+        .values(seats_version=models.Show.seats_version + 1)
+        .returning(models.Show.seats_version)
+        .execution_options(synchronize_session=False)
+    ).scalar_one()
+
+
+def booked_seat_counts(db, shows):
+    """Booked seat count per show, one pass per booking shard involved."""
+    by_shard = {}
+    for show in shows:
+        shard = shard_router.shard_for_cinema(show.cinema_id) if shard_router.enabled else 0
+        by_shard.setdefault(shard, []).append(show)
+    counts = {}
+    for group in by_shard.values():
+        with shard_router.session(db, cinema_id=group[0].cinema_id) as booking_db:
+            counts.update(_booked_seat_counts(booking_db, group))
+    return counts
+
+
+def _booked_seat_counts(booking_db, shows):
+    """
+    Shows whose cached snapshot matches their current seats_version are
+    answered from memory; the rest are counted in one grouped query.
+    """
+    counts = {}
+    missing = []
+    versions = seats_versions(booking_db, shows)
+    for show in shows:
+        snapshot = snapshots.get(show.show_id, versions[show.show_id])
+        if snapshot is not None:
+            counts[show.show_id] = len(snapshot["booked_seats"])
+        else:
+            missing.append(show)
+
+    if missing:
+        show_ids = [show.show_id for show in missing]
+        show_dates = {partition_key(show.start_time) for show in missing}
+        rows = booking_db.query(
+            models.Booking.show_id,
+            func.count(models.BookingSeat.booking_seat_id)
+        ).join(
+            models.BookingSeat,
+            and_(
+                models.BookingSeat.booking_id == models.Booking.booking_id,
+                models.BookingSeat.show_date == models.Booking.show_date
+            )
+        ).filter(
+            models.Booking.show_id.in_(show_ids),
+            # Partition keys of the requested shows, so only their months are scanned
+            models.Booking.show_date.in_(show_dates),
+            models.BookingSeat.show_date.in_(show_dates),
+            models.Booking.status != "cancelled"
+        ).group_by(models.Booking.show_id).all()
+        found = dict(rows)
+        for show_id in show_ids:
+            counts[show_id] = found.get(show_id, 0)
+    return counts
+
+
+def summarize(db, shows):
+    """Seats left and sell-through for each show, keyed by show_id."""
+    counts = booked_seat_counts(db, shows)
+    summaries = {}
+    for show in shows:
+        total = layout_for_show(show).size
+        booked = min(counts.get(show.show_id, 0), total)
+        sell_through = round(booked * 100 / total, 1) if total else 100.0
+        if booked >= total:
+            status = "sold_out"
+        elif sell_through >= ALMOST_FULL_PERCENT:
+            status = "almost_full"
+        else:
+            status = "available"
+        summaries[show.show_id] = {
+            "show_id": show.show_id,
+            "total_seats": total,
+            "booked_seats": booked,
+            "seats_left": total - booked,
+            "sell_through": sell_through,
+            "status": status,
+        }
+    return summaries
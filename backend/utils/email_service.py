@@ -1,8 +1,6 @@
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 import os
 from datetime import datetime
+from urllib.parse import quote
 
 # Configuration from environment variables
 SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
@@ -22,15 +20,25 @@ def send_booking_confirmation(
     show_time_obj: datetime,
     seat_numbers: list,
     booking_id: int,
-    total_amount: float
+    total_amount: float,
+    ticket: dict = None
 ):
     """
     Send booking confirmation email with E-Ticket attached.
+
+    `ticket` is the booking's ticket data (utils.tickets.ticket_data); when
+    given, the rendered PDF ticket is attached.
     """
     if not contact_email:
         print("No contact email provided for booking.")
         return
 
+    # Imported lazily: only booking confirmations need the mail stack, not startup
+    import smtplib
+    from email.mime.application import MIMEApplication
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
     try:
         msg = MIMEMultipart()
         msg['From'] = FROM_EMAIL
@@ -43,9 +51,9 @@ def send_booking_confirmation(
         time_str = show_time_obj.strftime("%I:%M %p")
         date_str = show_time_obj.strftime("%A, %B %d, %Y")
         
-        # QR Code URL
-        qr_data = formatted_booking_id
-        qr_url = f"https://api.qrserver.com/v1/create-qr-code/?size=150x150&data={qr_data}"
+        # QR Code URL (the signed ticket token when we have the ticket)
+        qr_data = ticket["qr_data"] if ticket else formatted_booking_id
+        qr_url = f"https://api.qrserver.com/v1/create-qr-code/?size=150x150&data={quote(qr_data)}"
 
         # HTML Body
         html_content = f"""
@@ -81,6 +89,16 @@ def send_booking_confirmation(
 
         msg.attach(MIMEText(html_content, 'html'))
 
+        # PDF E-Ticket (rendered in the ticket process pool, cached on disk)
+        if ticket:
+            try:
+                from utils.tickets import get_ticket_pdf
+                attachment = MIMEApplication(get_ticket_pdf(ticket), _subtype="pdf")
+                attachment.add_header('Content-Disposition', 'attachment', filename=f"CineX-{formatted_booking_id}.pdf")
+                msg.attach(attachment)
+            except Exception as e:
+                print(f"⚠️ Could not attach e-ticket for {formatted_booking_id}: {e}")
+
         # Send Email
         if not SMTP_USERNAME or not SMTP_PASSWORD:
             print("⚠️ SMTP credentials not set. Email simulation:")
@@ -97,3 +115,4 @@ def send_booking_confirmation(
 
     except Exception as e:
         print(f"❌ Failed to send email: {e}")
+        raise  # The outbox relay retries it later
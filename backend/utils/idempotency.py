@@ -0,0 +1,71 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", 10000))
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 24 * 3600))
+
+# Outcomes of IdempotencyStore.begin()
+NEW = "new"                  # First time we see this key: caller must complete() or release()
+REPLAY = "replay"            # Finished earlier: stored response is returned
+IN_PROGRESS = "in_progress"  # Another request with this key is still running
+MISMATCH = "mismatch"        # Key reused with a different request body
+
+
+def fingerprint(payload: str) -> str:
+    """Stable hash of a request body, used to detect keys reused for other requests."""
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Bounded, expiring in-process store of results keyed by Idempotency-Key.
+
+    Entries are kept in insertion order; the oldest are evicted once
+    `max_keys` is reached and any entry older than `ttl_seconds` is ignored.
+    Only successful results are stored: a failed attempt releases its key so
+    the client can retry it.
+    """
+
+    def __init__(self, max_keys: int = IDEMPOTENCY_MAX_KEYS, ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS):
+        self.max_keys = max_keys
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> [fingerprint, created_at, response or None]
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if now - entry[1] < self.ttl_seconds and len(self._entries) <= self.max_keys:
+                break
+            self._entries.popitem(last=False)
+
+    def begin(self, key, request_fingerprint: str):
+        """Claim `key` for a request; returns (outcome, stored_response)."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._entries[key] = [request_fingerprint, now, None]
+                self._expire(now)
+                return NEW, None
+            if entry[0] != request_fingerprint:
+                return MISMATCH, None
+            if entry[2] is None:
+                return IN_PROGRESS, None
+            return REPLAY, entry[2]
+
+    def complete(self, key, response):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[2] = response
+
+    def release(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is None:
+                del self._entries[key]
@@ -0,0 +1,252 @@
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, text, update
+from sqlalchemy.orm import joinedload
+from database import shard_router
+import models
+
+# How often the relay looks for events whose side effects are still to be done
+OUTBOX_RELAY_SECONDS = float(os.getenv("OUTBOX_RELAY_SECONDS", 2))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 50))
+# A failed side effect is retried after 30 s, 60 s, 120 s, ... and given up after this many attempts
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 8))
+OUTBOX_RETRY_SECONDS = 30
+# Relayed events older than this are deleted (and drop out of the feed)
+OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", 30))
+
+
+def wake_relay():
+    """Replaced by main.py with the relay task's wake(), so new events go out right away."""
+
+
+def add_event(db, event_type: str, entity_id: int, payload: dict):
+    """
+    Queue an event in the caller's transaction; it is only visible (and its
+    side effect only runs) if that transaction commits.
+
+    Timestamps come from the app's clock, like every time the relay, pruner
+    and feed compare them with (the database's now() may be in another zone).
+    """
+    now = datetime.now()
+    event = models.OutboxEvent(
+        event_type=event_type,
+        entity_id=entity_id,
+        payload=json.dumps(payload, default=str, separators=(",", ":")),
+        attempts=0,
+        created_at=now,
+        available_at=now,
+        # Nothing to relay: done as soon as it commits
+        relayed_at=None if event_type in HANDLERS else now
+    )
+    db.add(event)
+    return event
+
+
+def booking_payload(booking, seat_numbers) -> dict:
+    return {
+        "booking_id": booking.booking_id,
+        "show_id": booking.show_id,
+        "show_date": booking.show_date,
+        "user_id": booking.user_id,
+        "status": booking.status,
+        "seat_numbers": sorted(seat_numbers),
+        "total_amount": float(booking.total_amount),
+        "seats_version": booking.seats_version,
+        "cancelled_version": booking.cancelled_version,
+    }
+
+
+def show_payload(show) -> dict:
+    return {
+        "show_id": show.show_id,
+        "movie_id": show.movie_id,
+        "cinema_id": show.cinema_id,
+        "screen_name": show.screen_name,
+        "screen_type": show.screen_type,
+        "start_time": show.start_time,
+        "ticket_price": float(show.ticket_price),
+    }
+
+
+def _send_confirmation(db, event, catalog):
+    from utils.email_service import send_booking_confirmation
+    from utils.tickets import ticket_data
+
+    booking = db.query(models.Booking).options(
+        joinedload(models.Booking.seats)
+    ).filter(models.Booking.booking_id == event.entity_id).first()
+    # Cancelled before the relay got to it: nothing to confirm
+    if booking is None or booking.status == "cancelled" or not booking.contact_email:
+        return
+
+    show = catalog.query(models.Show).options(
+        joinedload(models.Show.movie),
+        joinedload(models.Show.cinema)
+    ).filter(models.Show.show_id == booking.show_id).one()
+    send_booking_confirmation(
+        contact_email=booking.contact_email,
+        movie_title=show.movie.title,
+        cinema_name=show.cinema.name,
+        screen_name=show.screen_name,
+        show_time_obj=show.start_time,
+        seat_numbers=sorted(seat.seat_number for seat in booking.seats),
+        booking_id=booking.booking_id,
+        total_amount=float(booking.total_amount),
+        ticket=ticket_data(booking, show)
+    )
+
+
+# Side effects run by the relay, per event type, as handler(db, event, catalog):
+# `catalog` is the primary (shows, movies), `db` the store the event is in.
+# At least once: a crash after the side effect but before the commit repeats it.
+HANDLERS = {
+    "booking.created": _send_confirmation,
+}
+
+
+def relay(db, limit: int = OUTBOX_BATCH_SIZE, catalog=None) -> int:
+    """
+    Carry out the side effects of one batch of pending events, oldest first.
+
+    On Postgres the batch is claimed with FOR UPDATE SKIP LOCKED, so relays
+    on several workers share the backlog without waiting on each other.
+    Elsewhere (SQLite) each event is leased with a conditional UPDATE that
+    only one worker's relay can win; an event whose relay dies mid-way is
+    retried once the lease (OUTBOX_RETRY_SECONDS) runs out.
+    Returns the number of events handled.
+    """
+    now = datetime.now()
+    query = db.query(models.OutboxEvent).filter(
+        models.OutboxEvent.relayed_at.is_(None),
+        models.OutboxEvent.attempts < OUTBOX_MAX_ATTEMPTS,
+        models.OutboxEvent.available_at <= now
+    ).order_by(models.OutboxEvent.event_id).limit(limit)
+    if db.get_bind().dialect.name == "postgresql":
+        events = query.with_for_update(skip_locked=True).all()
+    else:
+        events = _lease(db, query.all(), now)
+
+    for event in events:
+        event.attempts += 1
+        try:
+            HANDLERS[event.event_type](db, event, catalog or db)
+            event.relayed_at = datetime.now()
+            event.last_error = None
+        except Exception as e:
+            event.last_error = str(e)[:500]
+            event.available_at = datetime.now() + timedelta(seconds=OUTBOX_RETRY_SECONDS * 2 ** (event.attempts - 1))
+            if event.attempts >= OUTBOX_MAX_ATTEMPTS:
+                print(f"❌ Outbox event {event.event_id} ({event.event_type}) gave up after {event.attempts} attempts: {e}")
+    db.commit()
+    return len(events)
+
+
+def _lease(db, events, now):
+    """The events this relay won, each pushed out of other relays' reach for OUTBOX_RETRY_SECONDS."""
+    lease_until = now + timedelta(seconds=OUTBOX_RETRY_SECONDS)
+    won = []
+    for event in events:
+        result = db.execute(
+            update(models.OutboxEvent)
+            .where(
+                models.OutboxEvent.event_id == event.event_id,
+                models.OutboxEvent.relayed_at.is_(None),
+                models.OutboxEvent.available_at <= now
+            )
+            .values(available_at=lease_until)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            won.append(event)
+    db.commit()
+    return won
+
+
+def relay_pending(db, catalog=None):
+    """Drain one outbox in batches until nothing is ready."""
+    started = time.perf_counter()
+    handled = 0
+    while True:
+        batch = relay(db, catalog=catalog)
+        handled += batch
+        if batch < OUTBOX_BATCH_SIZE:
+            break
+    if handled:
+        print(f"📤 Outbox relay handled {handled} events in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return handled
+
+
+def sequence(db, limit: int = OUTBOX_BATCH_SIZE * 10) -> int:
+    """
+    Give committed events without one the next feed positions, in event_id order.
+
+    Only committed events are visible here, and numbering runs one worker
+    at a time (an advisory lock on Postgres, the write lock on SQLite), so
+    positions follow commit order: an event whose transaction commits late
+    gets a later position instead of landing behind a consumer's cursor.
+    Returns the number of events numbered.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext('cinex_outbox_feed'))"))
+    event_ids = [event_id for (event_id,) in db.query(models.OutboxEvent.event_id).filter(
+        models.OutboxEvent.feed_position.is_(None)
+    ).order_by(models.OutboxEvent.event_id).limit(limit).all()]
+    if event_ids:
+        last = db.query(func.max(models.OutboxEvent.feed_position)).scalar() or 0
+        db.execute(update(models.OutboxEvent), [
+            {"event_id": event_id, "feed_position": last + i}
+            for i, event_id in enumerate(event_ids, start=1)
+        ])
+    db.commit()
+    return len(event_ids)
+
+
+def _drain(db, catalog=None) -> int:
+    while sequence(db) == OUTBOX_BATCH_SIZE * 10:
+        pass
+    return relay_pending(db, catalog=catalog)
+
+
+def relay_all(db):
+    """
+    Number new events for the feed and relay their side effects: the primary's
+    outbox, then each booking shard's (their handlers read the catalog from `db`).
+    """
+    handled = _drain(db)
+    for shard in range(len(shard_router.engines)):
+        with shard_router.shard_session(shard) as shard_db:
+            handled += _drain(shard_db, catalog=db)
+    return handled
+
+
+def prune_all(db):
+    """prune() on the primary and every booking shard."""
+    prune(db)
+    for shard in range(len(shard_router.engines)):
+        with shard_router.shard_session(shard) as shard_db:
+            prune(shard_db)
+
+
+def prune(db):
+    """Delete relayed (and numbered) events past OUTBOX_RETENTION_DAYS."""
+    cutoff = datetime.now() - timedelta(days=OUTBOX_RETENTION_DAYS)
+    result = db.execute(delete(models.OutboxEvent).where(
+        models.OutboxEvent.created_at < cutoff,
+        models.OutboxEvent.relayed_at.is_not(None),
+        models.OutboxEvent.feed_position.is_not(None)
+    ))
+    db.commit()
+    if result.rowcount:
+        print(f"🧹 Pruned {result.rowcount} outbox events")
+
+
+def read_feed(db, after: int, limit: int):
+    """
+    Events after feed position `after`, in feed order. Events not yet numbered
+    by the relay aren't in the feed yet; they appear later, after `after`.
+    """
+    return db.query(models.OutboxEvent).filter(
+        models.OutboxEvent.feed_position > after
+    ).order_by(models.OutboxEvent.feed_position).limit(limit).all()
@@ -0,0 +1,129 @@
+import os
+import threading
+from datetime import date, datetime
+from sqlalchemy import text
+import models
+
+# Tables partitioned by show date (monthly RANGE partitions on Postgres)
+PARTITIONED_TABLES = ("bookings", "booking_seats")
+
+# How many future months to keep partitions ready for
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", 3))
+
+# (database URL, month) pairs known to have partitions (avoids repeated DDL round trips)
+_known_months = set()
+_lock = threading.Lock()
+
+
+def partition_key(start_time) -> date:
+    """Partition key of a show: the calendar date it starts on."""
+    if isinstance(start_time, datetime):
+        return start_time.date()
+    return start_time
+
+
+def _month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def _add_months(d: date, months: int) -> date:
+    month_index = d.year * 12 + (d.month - 1) + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+def _is_partitioned(conn, table: str) -> bool:
+    result = conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = :table"
+    ), {"table": table})
+    return result.first() is not None
+
+
+def ensure_partitions(engine, start: date = None, months_ahead: int = PARTITION_MONTHS_AHEAD):
+    """
+    Make sure monthly partitions exist from `start`'s month through `months_ahead` months later.
+
+    No-op on databases without declarative partitioning (e.g. SQLite), where
+    bookings and booking_seats are plain tables.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+
+    first_month = _month_start(start or date.today())
+    months = [_add_months(first_month, i) for i in range(months_ahead + 1)]
+    database = str(engine.url)  # Booking shards each have their own partitions
+
+    with _lock:
+        missing = [m for m in months if (database, m) not in _known_months]
+        if not missing:
+            return
+
+        with engine.begin() as conn:
+            # Serialize partition DDL across workers booting at the same time
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('cinex_booking_partitions'))"))
+            partitioned = [t for t in PARTITIONED_TABLES if _is_partitioned(conn, t)]
+            if len(partitioned) != len(PARTITIONED_TABLES):
+                # Schema was created without partitioning; nothing to manage
+                _known_months.update((database, m) for m in missing)
+                return
+
+            for month in missing:
+                next_month = _add_months(month, 1)
+                for table in PARTITIONED_TABLES:
+                    conn.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {_partition_name(table, month)} "
+                        f"PARTITION OF {table} "
+                        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+                    ))
+
+        _known_months.update((database, m) for m in missing)
+
+
+def rekey_show_bookings(db, show_id: int, old_date: date, new_date: date):
+    """
+    Move a show's bookings, seats and check-ins to the partition key of its
+    new date, in the caller's transaction (call when a show changes day).
+
+    On partitioned tables (schema.sql) the composite foreign keys
+    (booking_id, show_date) can't follow an UPDATE of the key, so bookings
+    are copied under the new key, their seats and check-ins repointed, and
+    the old rows deleted; the UPDATE of booking_seats moves each row into its
+    new monthly partition. Plain tables (SQLite, or created by
+    AUTO_CREATE_TABLES) are keyed by booking_id alone and just updated.
+    """
+    params = {"show_id": show_id, "old_date": old_date, "new_date": new_date}
+    partitioned = db.get_bind().dialect.name == "postgresql" and _is_partitioned(db, "bookings")
+    if partitioned:
+        columns = [c.name for c in models.Booking.__table__.columns]
+        selected = ", ".join(":new_date" if c == "show_date" else c for c in columns)
+        db.execute(text(
+            f"INSERT INTO bookings ({', '.join(columns)}) "
+            f"SELECT {selected} FROM bookings WHERE show_id = :show_id AND show_date = :old_date"
+        ), params)
+    db.execute(text(
+        "UPDATE booking_seats SET show_date = :new_date "
+        "WHERE show_date = :old_date AND booking_id IN "
+        "(SELECT booking_id FROM bookings WHERE show_id = :show_id AND show_date = :old_date)"
+    ), params)
+    db.execute(text(
+        "UPDATE checkins SET show_date = :new_date WHERE show_id = :show_id AND show_date = :old_date"
+    ), params)
+    if partitioned:
+        db.execute(text("DELETE FROM bookings WHERE show_id = :show_id AND show_date = :old_date"), params)
+    else:
+        db.execute(text(
+            "UPDATE bookings SET show_date = :new_date WHERE show_id = :show_id AND show_date = :old_date"
+        ), params)
+
+
+def ensure_partition_for(db, show_start) -> date:
+    """Ensure the partition for a show's month exists and return its partition key."""
+    show_date = partition_key(show_start)
+    if (str(db.get_bind().url), _month_start(show_date)) not in _known_months:
+        ensure_partitions(db.get_bind(), start=show_date, months_ahead=0)
+    return show_date
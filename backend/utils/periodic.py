@@ -0,0 +1,47 @@
+import threading
+import time
+
+
+class PeriodicTask:
+    """
+    Runs `fn` on a daemon thread every `interval` seconds until stopped.
+
+    The first run starts immediately; wake() starts the next one early.
+    Errors are printed and the task keeps its schedule, so one failed run
+    doesn't stop later ones.
+    """
+
+    def __init__(self, name: str, interval: float, fn):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        """Run again now rather than at the next interval (e.g. new work was queued)."""
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            started = time.perf_counter()
+            try:
+                self.fn()
+            except Exception as e:
+                print(f"❌ {self.name} failed: {e}")
+            elapsed = time.perf_counter() - started
+            self._wake.wait(max(self.interval - elapsed, 0))
@@ -0,0 +1,351 @@
+import os
+import threading
+import time
+import numpy as np
+from sqlalchemy import func
+from database import shard_router
+import models
+
+# Similar movies kept per title (the most /movies/{id}/similar will return)
+RECOMMENDATION_TOP_K = int(os.getenv("RECOMMENDATION_TOP_K", 20))
+# Share of the score that comes from genre overlap; the rest comes from co-bookings
+RECOMMENDATION_GENRE_WEIGHT = float(os.getenv("RECOMMENDATION_GENRE_WEIGHT", 0.4))
+# How often the refresher picks up new bookings and catalog changes (0 disables it)
+RECOMMENDATION_REFRESH_SECONDS = int(os.getenv("RECOMMENDATION_REFRESH_SECONDS", 600))
+# Incremental refreshes between full rebuilds, which also drop cancelled bookings
+RECOMMENDATION_FULL_REBUILD_EVERY = int(os.getenv("RECOMMENDATION_FULL_REBUILD_EVERY", 12))
+# Rebuild from scratch instead when more than this share of the catalog changed
+RECOMMENDATION_FULL_REBUILD_FRACTION = float(os.getenv("RECOMMENDATION_FULL_REBUILD_FRACTION", 0.2))
+# Movies scored per block; memory is about block size x catalog size x 4 bytes
+RECOMMENDATION_BLOCK_SIZE = int(os.getenv("RECOMMENDATION_BLOCK_SIZE", 256))
+
+# Popularity only breaks ties between otherwise equally similar movies
+POPULARITY_TIEBREAK = 1e-3
+
+
+class SimilarityIndex:
+    """
+    Top-K similar movies for every title, precomputed.
+
+    Similarity is a weighted sum of the cosine similarity of the movies'
+    genre vectors (sparse movie x genre matrix) and of their audiences
+    (co-booking counts from the sparse user x movie matrix, cosine
+    normalised). Rows are scored in blocks against the whole catalog and cut
+    down with argpartition, so memory stays at one block of scores.
+
+    Each title keeps twice RECOMMENDATION_TOP_K candidates so incremental
+    refreshes can re-score only the titles that changed and merge them into
+    everyone else's lists. Lookups are a dict access plus a slice.
+    """
+
+    def __init__(self, top_k: int = RECOMMENDATION_TOP_K,
+                 genre_weight: float = RECOMMENDATION_GENRE_WEIGHT,
+                 block_size: int = RECOMMENDATION_BLOCK_SIZE):
+        self.top_k = top_k
+        self.keep = top_k * 2
+        self.genre_weight = genre_weight
+        self.block_size = block_size
+
+        self.genres = {}             # movie_id -> frozenset of genres
+        self.user_index = {}         # user_id -> column in the user x movie matrix
+        self.pair_users = np.zeros(0, dtype=np.int64)
+        self.pair_movies = np.zeros(0, dtype=np.int64)
+        self.watermark = 0           # highest booking_id already counted (a tuple, one per booking shard)
+        self.refreshes_since_rebuild = 0
+        self.built_at = None
+
+        # Swapped as one tuple so readers always see a consistent index
+        self._state = ({}, np.zeros((0, self.keep), dtype=np.int64), np.zeros((0, self.keep), dtype=np.float32))
+        self._lock = threading.Lock()  # one refresh at a time
+
+    # --- Serving ---
+
+    def similar(self, movie_id: int, limit: int = None):
+        """Ids of the most similar movies, best first; None when the movie isn't indexed."""
+        row_of, neighbor_ids, _ = self._state
+        row = row_of.get(movie_id)
+        if row is None:
+            return None
+        ids = neighbor_ids[row, :min(limit or self.top_k, self.top_k)]
+        return ids[ids >= 0].tolist()
+
+    def __len__(self):
+        return len(self._state[0])
+
+    # --- Building ---
+
+    def rebuild(self, genres: dict, pairs, watermark: int):
+        """Full build from the catalog (movie_id -> genres) and (user_id, movie_id) booking pairs."""
+        with self._lock:
+            self.genres = dict(genres)
+            self.user_index = {}
+            self.pair_users = np.zeros(0, dtype=np.int64)
+            self.pair_movies = np.zeros(0, dtype=np.int64)
+            self._add_pairs(pairs)
+            self.watermark = watermark
+
+            movie_ids = np.array(sorted(self.genres), dtype=np.int64)
+            matrices = self._matrices(movie_ids)
+            neighbor_ids, neighbor_scores = self._top_neighbors(matrices, movie_ids)
+            self._publish(movie_ids, neighbor_ids, neighbor_scores)
+            self.refreshes_since_rebuild = 0
+
+    def update(self, genres: dict, pairs, watermark: int) -> int:
+        """
+        Incremental refresh with the current catalog and the booking pairs seen
+        since the last watermark. Only titles that were added, changed genres
+        or got new bookings are re-scored. Returns how many were.
+        """
+        with self._lock:
+            changed = {m for m, g in genres.items() if self.genres.get(m) != g}
+            removed = set(self.genres) - set(genres)
+            changed.update(movie_id for _, movie_id in pairs if movie_id in genres)
+            if not changed and not removed:
+                self.watermark = watermark
+                return 0
+
+            row_of, old_ids, old_scores = self._state
+            self.genres = dict(genres)
+            self._add_pairs(pairs)
+            self.watermark = watermark
+
+            # Retained titles keep their rows' lists; new titles start empty
+            movie_ids = np.array(sorted(self.genres), dtype=np.int64)
+            neighbor_ids = np.full((len(movie_ids), self.keep), -1, dtype=np.int64)
+            neighbor_scores = np.full((len(movie_ids), self.keep), -np.inf, dtype=np.float32)
+            old_rows = np.array([row_of.get(m, -1) for m in movie_ids.tolist()], dtype=np.int64)
+            kept = old_rows >= 0
+            neighbor_ids[kept] = old_ids[old_rows[kept]]
+            neighbor_scores[kept] = old_scores[old_rows[kept]]
+
+            # Changed titles are offered to a list only if they beat its old last entry;
+            # the margin above top_k absorbs entries dropped here until the next full rebuild
+            thresholds = neighbor_scores[:, -1].copy()
+
+            # Every score involving a changed or removed title is stale
+            stale_ids = np.array(sorted(changed | removed), dtype=np.int64)
+            stale = np.isin(neighbor_ids, stale_ids)
+            neighbor_ids[stale] = -1
+            neighbor_scores[stale] = -np.inf
+            order = np.argsort(-neighbor_scores, axis=1, kind="stable")
+            neighbor_ids = np.take_along_axis(neighbor_ids, order, axis=1)
+            neighbor_scores = np.take_along_axis(neighbor_scores, order, axis=1)
+
+            matrices = self._matrices(movie_ids)
+            popularity = matrices["popularity"]
+            rows = np.searchsorted(movie_ids, np.array(sorted(changed), dtype=np.int64))
+            candidates = []  # (row receiving the candidate, candidate row, score)
+
+            for start in range(0, len(rows), self.block_size):
+                block = rows[start:start + self.block_size]
+                scores = self._block_scores(matrices, block)
+                # Changed titles get fresh lists of their own...
+                top_ids, top_scores = self._top_of(scores, movie_ids, popularity)
+                neighbor_ids[block] = top_ids
+                neighbor_scores[block] = top_scores
+                # ...and are offered to every other title they now beat. Similarity is
+                # symmetric; only the popularity tie-break is swapped to the changed title's
+                similarity = scores - popularity[None, :]
+                offered = similarity + popularity[block][:, None]
+                offered[similarity <= 0] = -np.inf
+                offered[:, rows] = -np.inf
+                src, dst = np.nonzero(offered > thresholds[None, :])
+                candidates.append((dst, block[src], offered[src, dst]))
+
+            if candidates:
+                # Merge all offers at once: each receiving row's current list plus its
+                # offers, sorted by (row, score desc), keeping the first `keep` per row
+                dst = np.concatenate([c[0] for c in candidates])
+                targets = np.unique(dst)
+                merged_rows = np.concatenate([np.repeat(targets, self.keep), dst])
+                merged_ids = np.concatenate([neighbor_ids[targets].ravel()] + [movie_ids[c[1]] for c in candidates])
+                merged_scores = np.concatenate([neighbor_scores[targets].ravel()] + [c[2] for c in candidates])
+                order = np.lexsort((-merged_scores, merged_rows))
+                merged_rows = merged_rows[order]
+                starts = np.searchsorted(merged_rows, targets)
+                rank = np.arange(len(merged_rows)) - np.repeat(starts, np.diff(np.append(starts, len(merged_rows))))
+                best = order[rank < self.keep]
+                neighbor_ids[targets] = merged_ids[best].reshape(-1, self.keep)
+                neighbor_scores[targets] = merged_scores[best].reshape(-1, self.keep)
+
+            self._publish(movie_ids, neighbor_ids, neighbor_scores)
+            self.refreshes_since_rebuild += 1
+            return len(rows)
+
+    def _add_pairs(self, pairs):
+        if not pairs:
+            return
+        users = np.fromiter(
+            (self.user_index.setdefault(user_id, len(self.user_index)) for user_id, _ in pairs),
+            dtype=np.int64, count=len(pairs)
+        )
+        movies = np.fromiter((movie_id for _, movie_id in pairs), dtype=np.int64, count=len(pairs))
+        self.pair_users = np.concatenate([self.pair_users, users])
+        self.pair_movies = np.concatenate([self.pair_movies, movies])
+
+    def _matrices(self, movie_ids: np.ndarray):
+        """Row-normalised genre matrix (dense), cosine co-booking matrix (CSR) and popularity."""
+        from scipy import sparse
+
+        n = len(movie_ids)
+        genre_names = sorted({g for gs in self.genres.values() for g in gs})
+        genre_col = {g: i for i, g in enumerate(genre_names)}
+        g_rows, g_cols = [], []
+        for row, movie_id in enumerate(movie_ids.tolist()):
+            for g in self.genres[movie_id]:
+                g_rows.append(row)
+                g_cols.append(genre_col[g])
+        genre_matrix = sparse.csr_matrix(
+            (np.ones(len(g_rows), dtype=np.float32), (g_rows, g_cols)),
+            shape=(n, max(len(genre_names), 1))
+        )
+        genre_counts = np.asarray(genre_matrix.sum(axis=1)).ravel()
+        genre_norm = np.divide(1.0, np.sqrt(genre_counts), out=np.zeros(n), where=genre_counts > 0)
+        genre_matrix = sparse.diags(genre_norm.astype(np.float32)) @ genre_matrix
+
+        # Audiences: a user counts once per movie however often they booked it
+        rows = np.searchsorted(movie_ids, self.pair_movies)
+        known = np.isin(self.pair_movies, movie_ids)
+        audience = sparse.csr_matrix(
+            (np.ones(int(known.sum()), dtype=np.float32), (self.pair_users[known], rows[known])),
+            shape=(max(len(self.user_index), 1), n)
+        )
+        audience.data[:] = 1.0  # duplicates were summed on construction
+        cobookings = (audience.T @ audience).tocsr()
+        viewers = cobookings.diagonal()
+        viewer_norm = np.divide(1.0, np.sqrt(viewers), out=np.zeros(n), where=viewers > 0)
+        cobookings = (sparse.diags(viewer_norm) @ cobookings @ sparse.diags(viewer_norm)).tocsr()
+        cobookings.setdiag(0)
+        cobookings.eliminate_zeros()
+        cobookings = cobookings.astype(np.float32)
+
+        # Bounded and per title, so unchanged titles keep their tie-break across refreshes
+        popularity = 1.0 - 1.0 / (1.0 + np.log1p(viewers))
+        return {
+            "genres": genre_matrix.tocsr(),
+            "genres_dense": genre_matrix.toarray(),
+            "cobookings": cobookings,
+            "popularity": (POPULARITY_TIEBREAK * popularity).astype(np.float32),
+        }
+
+    def _block_scores(self, matrices, block: np.ndarray) -> np.ndarray:
+        """
+        Scores of the movies in `block` against the whole catalog: similarity
+        plus the popularity tie-break of each column. Columns that share
+        nothing with the row score exactly their tie-break; _top_of drops them.
+        """
+        scores = matrices["genres"][block] @ matrices["genres_dense"].T
+        scores *= self.genre_weight
+        co = matrices["cobookings"][block].tocoo()
+        scores[co.row, co.col] += (1.0 - self.genre_weight) * co.data
+        scores += matrices["popularity"][None, :]
+        scores[np.arange(len(block)), block] = -np.inf
+        return scores
+
+    def _top_of(self, scores: np.ndarray, movie_ids: np.ndarray, popularity: np.ndarray):
+        """Best `keep` similar columns of every row of a score block, sorted best first."""
+        keep = min(self.keep, scores.shape[1])
+        if keep < scores.shape[1]:
+            top = np.argpartition(-scores, keep - 1, axis=1)[:, :keep]
+        else:
+            top = np.tile(np.arange(scores.shape[1]), (len(scores), 1))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        top_scores[top_scores - popularity[top] <= 0] = -np.inf
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        ids = np.full((len(scores), self.keep), -1, dtype=np.int64)
+        padded = np.full((len(scores), self.keep), -np.inf, dtype=np.float32)
+        found = np.isfinite(top_scores)
+        ids[:, :keep] = np.where(found, movie_ids[top], -1)
+        padded[:, :keep] = top_scores
+        return ids, padded
+
+    def _top_neighbors(self, matrices, movie_ids: np.ndarray):
+        n = len(movie_ids)
+        neighbor_ids = np.full((n, self.keep), -1, dtype=np.int64)
+        neighbor_scores = np.full((n, self.keep), -np.inf, dtype=np.float32)
+        for start in range(0, n, self.block_size):
+            block = np.arange(start, min(start + self.block_size, n))
+            ids, scores = self._top_of(self._block_scores(matrices, block), movie_ids, matrices["popularity"])
+            neighbor_ids[block] = ids
+            neighbor_scores[block] = scores
+        return neighbor_ids, neighbor_scores
+
+    def _publish(self, movie_ids, neighbor_ids, neighbor_scores):
+        row_of = {movie_id: row for row, movie_id in enumerate(movie_ids.tolist())}
+        self._state = (row_of, neighbor_ids, neighbor_scores)
+        self.built_at = time.time()
+
+
+similar_index = SimilarityIndex()
+
+
+def _load_catalog(db) -> dict:
+    genres = {movie_id: set() for (movie_id,) in db.query(models.Movie.movie_id).all()}
+    for movie_id, genre in db.query(models.MovieGenre.movie_id, models.MovieGenre.genre).all():
+        if movie_id in genres:
+            genres[movie_id].add(genre)
+    return {movie_id: frozenset(g) for movie_id, g in genres.items()}
+
+
+def _load_pairs(db, after):
+    """
+    Distinct (user_id, movie_id) of live bookings newer than the watermark, and the new watermark.
+
+    The watermark holds the highest booking_id seen per booking shard (ids
+    from different shards interleave); 0 means from the start everywhere.
+    """
+    def newer_bookings(booking_db, after_booking_id):
+        return booking_db.query(
+            models.Booking.user_id,
+            models.Booking.show_id,
+            func.max(models.Booking.booking_id)
+        ).filter(
+            models.Booking.booking_id > after_booking_id,
+            models.Booking.user_id.isnot(None),
+            models.Booking.status != "cancelled"
+        ).group_by(models.Booking.user_id, models.Booking.show_id).all()
+
+    shard_count = max(len(shard_router.engines), 1)
+    after = tuple(after) if isinstance(after, tuple) and len(after) == shard_count else (0,) * shard_count
+    shard_rows = shard_router.scatter(db, newer_bookings, args=after)
+    rows = [row for rows in shard_rows for row in rows]
+    movies = dict(db.query(models.Show.show_id, models.Show.movie_id).filter(
+        models.Show.show_id.in_({show_id for _, show_id, _ in rows})
+    ).all())
+    pairs = {(user_id, movies[show_id]) for user_id, show_id, _ in rows if show_id in movies}
+    watermark = tuple(
+        max((booking_id for _, _, booking_id in rows), default=shard_after)
+        for rows, shard_after in zip(shard_rows, after)
+    )
+    return sorted(pairs), watermark
+
+
+def refresh_recommendations(db, index: SimilarityIndex = similar_index):
+    """
+    Bring the similar-movies index up to date.
+
+    Picks up bookings above the last seen booking_id and the current catalog;
+    periodically (or when much of the catalog changed) rebuilds from scratch,
+    which also drops cancelled bookings and anything committed out of id order.
+    """
+    started = time.perf_counter()
+    genres = _load_catalog(db)
+    full = (
+        index.built_at is None
+        or index.refreshes_since_rebuild >= RECOMMENDATION_FULL_REBUILD_EVERY
+    )
+    if not full:
+        pairs, watermark = _load_pairs(db, index.watermark)
+        touched = len({movie_id for _, movie_id in pairs}) + len(set(genres) ^ set(index.genres))
+        full = touched > RECOMMENDATION_FULL_REBUILD_FRACTION * max(len(genres), 1)
+    if full:
+        pairs, watermark = _load_pairs(db, 0)
+        index.rebuild(genres, pairs, watermark)
+        print(f"🎯 Similar movies rebuilt for {len(genres)} titles in {(time.perf_counter() - started) * 1000:.0f} ms")
+    else:
+        rescored = index.update(genres, pairs, watermark)
+        if rescored:
+            print(f"🎯 Similar movies refreshed for {rescored} titles in {(time.perf_counter() - started) * 1000:.0f} ms")
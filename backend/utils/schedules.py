@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from sqlalchemy.orm import load_only
+from database import SessionLocal
+import models
+
+# Cinema-day schedules kept per worker. Writes on this worker rebuild the days
+# they touch; the TTL bounds how long another worker's changes can go unseen.
+SCHEDULE_CACHE_SECONDS = float(os.getenv("SCHEDULE_CACHE_SECONDS", 60))
+SCHEDULE_CACHE_SIZE = int(os.getenv("SCHEDULE_CACHE_SIZE", 5000))
+# Longest date range one schedule request may cover
+SCHEDULE_MAX_DAYS = int(os.getenv("SCHEDULE_MAX_DAYS", 14))
+
+
+class ScheduleCache:
+    """
+    Bounded LRU of built schedules per (cinema_id, day).
+
+    invalidate() stamps a day with the next value of a cache-wide generation
+    counter. A build takes a token (the counter) before it reads the database
+    and its result is only stored if the day wasn't stamped after that, so a
+    build racing a show change can't cache the schedule from before it.
+    Evicted days are no longer stamped, so their newest stamp is kept in
+    `_evicted` and applies to every day that isn't cached.
+    """
+
+    def __init__(self, ttl: float = SCHEDULE_CACHE_SECONDS, max_size: int = SCHEDULE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # (cinema_id, day) -> (generation, built_at monotonic, schedule or None)
+        self._generation = 0  # Last stamp handed out by invalidate() or clear()
+        self._evicted = 0  # Newest stamp of a day that was evicted or cleared
+        self._lock = threading.Lock()
+
+    def get(self, cinema_id: int, day: date):
+        with self._lock:
+            entry = self._entries.get((cinema_id, day))
+            if entry is None or entry[2] is None or time.monotonic() - entry[1] > self.ttl:
+                return None
+            self._entries.move_to_end((cinema_id, day))
+            return entry[2]
+
+    def token(self) -> int:
+        """Token to hand back to put() for a build starting now."""
+        with self._lock:
+            return self._generation
+
+    def put(self, cinema_id: int, day: date, token: int, schedule):
+        with self._lock:
+            entry = self._entries.get((cinema_id, day))
+            generation = entry[0] if entry else self._evicted
+            if generation > token:
+                return schedule
+            self._entries[(cinema_id, day)] = (generation, time.monotonic(), schedule)
+            self._entries.move_to_end((cinema_id, day))
+            self._evict()
+        return schedule
+
+    def invalidate(self, cinema_id: int, day: date):
+        with self._lock:
+            self._generation += 1
+            self._entries[(cinema_id, day)] = (self._generation, 0, None)
+            self._entries.move_to_end((cinema_id, day))
+            self._evict()
+
+    def clear(self):
+        """Drop every day (e.g. after a movie's details changed)."""
+        with self._lock:
+            self._generation += 1
+            self._evicted = self._generation
+            self._entries = OrderedDict()
+
+    def _evict(self):
+        # Caller holds the lock
+        while len(self._entries) > self.max_size:
+            _, (generation, _, _) = self._entries.popitem(last=False)
+            self._evicted = max(self._evicted, generation)
+
+
+schedules = ScheduleCache()
+
+
+def show_changed(cinema_id: int, start_time: datetime):
+    """
+    Rebuild the cinema-day of a show on its next read. Call after the commit;
+    for a show that moved, once for where it was and once for where it is.
+    """
+    schedules.invalidate(cinema_id, start_time.date())
+
+
+def cinema_schedule(cinema_id: int, date_from: date, date_to: date) -> list:
+    """
+    Schedule of a cinema for each day from `date_from` to `date_to`, as plain
+    JSON-ready dicts: [{"date", "movies": [{"movie", "screens": [{"screen_name",
+    "shows": [...]}]}]}]. Cached days are reused; the missing ones are built
+    on the primary (so a snapshot never bakes in replica lag) with one query
+    for their shows and one for their movies.
+    """
+    days = [date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)]
+    result = {day: schedules.get(cinema_id, day) for day in days}
+    missing = [day for day in days if result[day] is None]
+    if missing:
+        token = schedules.token()
+        db = SessionLocal()
+        try:
+            built = _build_days(db, cinema_id, missing)
+        finally:
+            db.close()
+        for day, schedule in built.items():
+            result[day] = schedules.put(cinema_id, day, token, schedule)
+    return [result[day] for day in days]
+
+
+def _build_days(db, cinema_id: int, days) -> dict:
+    start = datetime.combine(min(days), datetime.min.time())
+    end = datetime.combine(max(days) + timedelta(days=1), datetime.min.time())
+    shows = db.query(models.Show).filter(
+        models.Show.cinema_id == cinema_id,
+        models.Show.start_time >= start,
+        models.Show.start_time < end
+    ).order_by(models.Show.start_time, models.Show.screen_name, models.Show.show_id).all()
+
+    movie_ids = {show.movie_id for show in shows}
+    movies = db.query(models.Movie).options(load_only(
+        models.Movie.movie_id, models.Movie.title, models.Movie.duration_mins,
+        models.Movie.language, models.Movie.rating, models.Movie.poster_url
+    )).filter(models.Movie.movie_id.in_(movie_ids)).all() if movie_ids else []
+    movie_summaries = {
+        movie.movie_id: {
+            "movie_id": movie.movie_id,
+            "title": movie.title,
+            "duration_mins": movie.duration_mins,
+            "language": movie.language,
+            "rating": float(movie.rating) if movie.rating is not None else None,
+            "poster_url": movie.poster_url,
+        }
+        for movie in movies
+    }
+
+    # day -> movie_id -> screen_name -> shows, each level in order of its first show
+    grouped = {day: {} for day in days}
+    for show in shows:
+        movies_of_day = grouped.get(show.start_time.date())
+        if movies_of_day is None or show.movie_id not in movie_summaries:
+            continue
+        movies_of_day.setdefault(show.movie_id, {}).setdefault(show.screen_name, []).append({
+            "show_id": show.show_id,
+            "start_time": show.start_time.isoformat(),
+            "screen_type": show.screen_type,
+            "ticket_price": float(show.ticket_price),
+        })
+
+    return {
+        day: {
+            "date": day.isoformat(),
+            "movies": [
+                {
+                    "movie": movie_summaries[movie_id],
+                    "screens": [
+                        {"screen_name": screen_name, "shows": screen_shows}
+                        for screen_name, screen_shows in screens.items()
+                    ],
+                }
+                for movie_id, screens in movies_of_day.items()
+            ],
+        }
+        for day, movies_of_day in grouped.items()
+    }
@@ -0,0 +1,117 @@
+import os
+from functools import lru_cache
+import numpy as np
+from utils.seat_layouts import SEAT_TYPES
+
+# Where the best row is, as a fraction of the way from the front row to the back
+SEAT_FINDER_IDEAL_ROW = float(os.getenv("SEAT_FINDER_IDEAL_ROW", 0.6))
+# Relative weight of sitting off-centre vs. away from the ideal row
+SEAT_FINDER_CENTRE_WEIGHT = 1.0
+SEAT_FINDER_ROW_WEIGHT = 0.6
+# Leaving a single empty seat next to the block (hard to sell later)
+SEAT_FINDER_ORPHAN_PENALTY = 0.05
+# Splitting a group over two rows, only when no single row has room
+SEAT_FINDER_SPLIT_PENALTY = 0.25
+
+MAX_GROUP_SIZE = 10
+
+
+@lru_cache(maxsize=256)
+def _position_scores(rows: int, cols: int, size: int) -> np.ndarray:
+    """
+    Score of every block position ignoring occupancy: (rows, cols - size + 1),
+    1.0 for a block centred in the ideal row, lower with squared distance.
+    """
+    starts = np.arange(cols - size + 1)
+    centre_offset = np.abs(starts + (size - 1) / 2 - (cols - 1) / 2) / max((cols - 1) / 2, 1)
+    row_offset = np.abs(np.arange(rows) - (rows - 1) * SEAT_FINDER_IDEAL_ROW) / max(rows - 1, 1)
+    scores = 1.0 - (
+        SEAT_FINDER_CENTRE_WEIGHT * centre_offset[None, :] ** 2
+        + SEAT_FINDER_ROW_WEIGHT * row_offset[:, None] ** 2
+    )
+    scores.setflags(write=False)
+    return scores
+
+
+def _block_scores(free: np.ndarray, size: int) -> np.ndarray:
+    """
+    Score of a `size`-seat block starting at every (row, column); -inf where
+    any of its seats is taken. Contiguity comes from running sums of the
+    free-seat grid: a window is free when its sum equals its width.
+    """
+    rows, cols = free.shape
+    if size > cols:
+        return np.full((rows, 0), -np.inf)
+
+    running = np.zeros((rows, cols + 1), dtype=np.int16)
+    np.cumsum(free, axis=1, out=running[:, 1:])
+    fits = (running[:, size:] - running[:, :-size]) == size
+
+    # Single free seat left just outside either end of the block
+    padded = np.zeros((rows, cols + 4), dtype=bool)
+    padded[:, 2:-2] = free
+    width = cols - size + 1
+    orphans = (
+        (padded[:, 1:1 + width] & ~padded[:, 0:width]).astype(np.int8)
+        + (padded[:, size + 2:size + 2 + width] & ~padded[:, size + 3:size + 3 + width])
+    )
+
+    scores = _position_scores(rows, cols, size) - SEAT_FINDER_ORPHAN_PENALTY * orphans
+    return np.where(fits, scores, -np.inf)
+
+
+def find_best_block(layout, unavailable: np.ndarray, size: int, seat_type: str = None):
+    """
+    Best block of `size` adjacent seats on a compiled layout.
+
+    `unavailable` is a boolean mask in layout order (booked or held seats).
+    A block in one row always wins; when no row has room, the best pair of
+    half-blocks in neighbouring rows (aligned one above the other) is used.
+    With `seat_type`, only seats of that type are considered.
+
+    Returns {"seats", "indices", "score", "split"} or None when nothing fits.
+    """
+    free = ~unavailable
+    if seat_type is not None:
+        free = free & (layout.seat_types == SEAT_TYPES.index(seat_type))
+    free = free.reshape(layout.rows, layout.cols)
+
+    scores = _block_scores(free, size)
+    if scores.size and np.isfinite(scores).any():
+        row, start = np.unravel_index(np.argmax(scores), scores.shape)
+        return _result(layout, [(row, start, size)], float(scores[row, start]), split=False)
+
+    if size < 2 or layout.rows < 2:
+        return None
+
+    # Two rows: the larger half over the smaller one, centred under it
+    big, small = (size + 1) // 2, size // 2
+    offset = (big - small) // 2
+    big_scores = _block_scores(free, big)
+    small_scores = _block_scores(free, small)
+    if big_scores.shape[1] == 0:
+        return None
+    width = big_scores.shape[1]
+    small_aligned = small_scores[:, offset:offset + width]
+    combined = np.stack([
+        big * big_scores[:-1] + small * small_aligned[1:],  # big half in front
+        small * small_aligned[:-1] + big * big_scores[1:],  # big half behind
+    ]) / size - SEAT_FINDER_SPLIT_PENALTY
+    if not np.isfinite(combined).any():
+        return None
+
+    arrangement, row, start = np.unravel_index(np.argmax(combined), combined.shape)
+    blocks = [(row, start, big), (row + 1, start + offset, small)]
+    if arrangement == 1:
+        blocks = [(row, start + offset, small), (row + 1, start, big)]
+    return _result(layout, blocks, float(combined[arrangement, row, start]), split=True)
+
+
+def _result(layout, blocks, score: float, split: bool):
+    indices = [int(row) * layout.cols + int(start) + i for row, start, size in blocks for i in range(size)]
+    return {
+        "seats": [layout.labels[i] for i in indices],
+        "indices": indices,
+        "score": round(score, 4),
+        "split": split,
+    }
@@ -0,0 +1,83 @@
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+# How long seats picked by "best seats" stay reserved for the customer
+SEAT_HOLD_SECONDS = int(os.getenv("SEAT_HOLD_SECONDS", 600))
+
+
+class SeatHolds:
+    """
+    Short-lived in-process seat holds, keyed by a random hold id.
+
+    A hold keeps its seats out of other customers' best-seat searches and
+    bookings until it is used, released or expires. Like the idempotency
+    store, holds are per worker: with several workers a hold only protects
+    requests served by the worker that made it, and the booking's own
+    seat check stays the authority.
+    """
+
+    def __init__(self, ttl_seconds: int = SEAT_HOLD_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._holds = {}    # hold_id -> (show_id, seats, expires_at monotonic)
+        self._by_show = {}  # show_id -> {hold_id}
+        self._lock = threading.Lock()
+
+    def _purge(self, show_id: int, now: float):
+        for hold_id in list(self._by_show.get(show_id, ())):
+            if self._holds[hold_id][2] <= now:
+                self._drop(hold_id)
+
+    def _drop(self, hold_id: str):
+        show_id, _, _ = self._holds.pop(hold_id)
+        hold_ids = self._by_show[show_id]
+        hold_ids.discard(hold_id)
+        if not hold_ids:
+            del self._by_show[show_id]
+
+    def held_seats(self, show_id: int, exclude: str = None) -> set:
+        """Seats of a show under live holds, except those of hold `exclude`."""
+        now = time.monotonic()
+        with self._lock:
+            self._purge(show_id, now)
+            held = set()
+            for hold_id in self._by_show.get(show_id, ()):
+                if hold_id != exclude:
+                    held.update(self._holds[hold_id][1])
+            return held
+
+    def claim(self, show_id: int, seats):
+        """
+        Hold `seats` of a show; returns (hold_id, expires_at datetime), or None
+        if another hold got any of them first.
+        """
+        seats = frozenset(seats)
+        now = time.monotonic()
+        with self._lock:
+            self._purge(show_id, now)
+            for hold_id in self._by_show.get(show_id, ()):
+                if seats & self._holds[hold_id][1]:
+                    return None
+            hold_id = uuid.uuid4().hex
+            self._holds[hold_id] = (show_id, seats, now + self.ttl_seconds)
+            self._by_show.setdefault(show_id, set()).add(hold_id)
+        return hold_id, datetime.now() + timedelta(seconds=self.ttl_seconds)
+
+    def get(self, hold_id: str):
+        """(show_id, seats) of a live hold, else None."""
+        hold = self._holds.get(hold_id)
+        if hold is None or hold[2] <= time.monotonic():
+            return None
+        return hold[0], hold[1]
+
+    def release(self, hold_id: str) -> bool:
+        with self._lock:
+            if hold_id not in self._holds:
+                return False
+            self._drop(hold_id)
+            return True
+
+
+seat_holds = SeatHolds()
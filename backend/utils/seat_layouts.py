@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+import numpy as np
+from database import SessionLocal
+import models
+
+# Mirrors frontend/src/data/seats.js so server prices match what the seat map shows
+SEAT_TYPES = ("standard", "premium", "vip")
+SEAT_PRICE_MULTIPLIERS = np.array([1.0, 1.3, 1.5])
+BOOKING_FEE_PER_SEAT = 150
+
+# Built-in layouts, matched against the screen name like the frontend does
+SCREEN_TEMPLATES = {
+    "IMAX": {"rows": 10, "cols": 16, "vip_rows": 2, "premium_rows": 3},
+    "STANDARD": {"rows": 8, "cols": 12, "vip_rows": 1, "premium_rows": 2},
+    "GOLD": {"rows": 6, "cols": 8, "vip_rows": 6, "premium_rows": 0},  # All VIP
+}
+DEFAULT_TEMPLATE = "STANDARD"
+
+ROW_LABELS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# Per-screen layouts stored in the DB are re-read this often (other workers may have saved one)
+LAYOUT_REFRESH_SECONDS = int(os.getenv("LAYOUT_REFRESH_SECONDS", 300))
+
+
+class CompiledLayout:
+    """
+    A screen layout compiled into flat arrays in row-major seat order.
+
+    Seat `i` sits in row `i // cols`, column `i % cols`; `labels[i]` is its
+    label ("A1", ...), `seat_types[i]` an index into SEAT_TYPES and
+    `multipliers[i]` its price multiplier. Price tables per ticket price are
+    computed once and reused.
+    """
+
+    def __init__(self, key: str, rows: int, cols: int, vip_rows: int, premium_rows: int):
+        self.key = key
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.shape = (rows, cols, vip_rows, premium_rows)
+
+        row_types = np.zeros(rows, dtype=np.uint8)
+        row_types[max(rows - vip_rows - premium_rows, 0):] = 1
+        row_types[max(rows - vip_rows, 0):] = 2
+        self.seat_types = np.repeat(row_types, cols)
+        self.multipliers = SEAT_PRICE_MULTIPLIERS[self.seat_types]
+
+        self.labels = [f"{ROW_LABELS[r]}{c}" for r in range(rows) for c in range(1, cols + 1)]
+        self.index = {label: i for i, label in enumerate(self.labels)}
+        self._price_tables = {}
+        self._seat_maps = {}
+
+    def seat_indices(self, seat_numbers) -> np.ndarray:
+        """Positions of the given labels in layout order; -1 for labels not on this screen."""
+        index = self.index
+        return np.fromiter((index.get(s, -1) for s in seat_numbers), dtype=np.int64, count=len(seat_numbers))
+
+    def price_table(self, ticket_price) -> np.ndarray:
+        ticket_price = float(ticket_price)
+        table = self._price_tables.get(ticket_price)
+        if table is None:
+            table = self._price_tables[ticket_price] = ticket_price * self.multipliers
+        return table
+
+    def total_amount(self, indices: np.ndarray, ticket_price) -> float:
+        """Seat total rounded like the frontend (half up), plus the per-seat booking fee."""
+        seat_total = float(np.floor(self.price_table(ticket_price)[indices].sum() + 0.5))
+        return seat_total + BOOKING_FEE_PER_SEAT * len(indices)
+
+    def seat_map(self, ticket_price):
+        ticket_price = float(ticket_price)
+        seat_map = self._seat_maps.get(ticket_price)
+        if seat_map is None:
+            seat_map = self._seat_maps[ticket_price] = self._build_seat_map(ticket_price)
+        return seat_map
+
+    def _build_seat_map(self, ticket_price):
+        prices = self.price_table(ticket_price)
+        return {
+            "layout": self.key,
+            "rows": self.rows,
+            "cols": self.cols,
+            "total_seats": self.size,
+            "booking_fee_per_seat": BOOKING_FEE_PER_SEAT,
+            "seat_rows": [
+                {
+                    "row_label": ROW_LABELS[r],
+                    "seats": [
+                        {
+                            "id": self.labels[i],
+                            "number": i % self.cols + 1,
+                            "type": SEAT_TYPES[self.seat_types[i]],
+                            "price": round(float(prices[i]), 2),
+                        }
+                        for i in range(r * self.cols, (r + 1) * self.cols)
+                    ],
+                }
+                for r in range(self.rows)
+            ],
+        }
+
+
+_compiled = {}       # (cinema_id, screen_name) or template name -> CompiledLayout
+_screen_layouts = {} # (cinema_id, screen_name) -> dims saved in screen_layouts
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+def _compile(cache_key, name: str, dims: dict) -> CompiledLayout:
+    """Compiled layout of one screen (or template), recompiled when its dimensions change."""
+    shape = (dims["rows"], dims["cols"], dims["vip_rows"], dims["premium_rows"])
+    layout = _compiled.get(cache_key)
+    if layout is None or layout.shape != shape:
+        layout = _compiled[cache_key] = CompiledLayout(name, *shape)
+    return layout
+
+
+def _template_for(screen_name: str) -> str:
+    for key in SCREEN_TEMPLATES:
+        if key in (screen_name or ""):
+            return key
+    return DEFAULT_TEMPLATE
+
+
+def load_layouts(db):
+    """
+    (Re)load per-screen layouts and compile every layout in use. `db` must be
+    a primary session: a lagging replica would put an old layout back.
+    """
+    global _loaded_at, _screen_layouts
+    rows = db.query(models.ScreenLayout).all()
+    screens = {
+        (row.cinema_id, row.screen_name): {
+            "rows": row.rows,
+            "cols": row.cols,
+            "vip_rows": row.vip_rows or 0,
+            "premium_rows": row.premium_rows or 0,
+        }
+        for row in rows
+    }
+    with _lock:
+        _screen_layouts = screens
+        for key, dims in SCREEN_TEMPLATES.items():
+            _compile(key, key, dims)
+        for (cinema_id, screen_name), dims in screens.items():
+            _compile((cinema_id, screen_name), screen_name, dims)
+        _loaded_at = time.time()
+
+
+def _refresh_layouts():
+    db = SessionLocal()
+    try:
+        load_layouts(db)
+    finally:
+        db.close()
+
+
+def layout_for(cinema_id: int, screen_name: str) -> CompiledLayout:
+    """
+    Compiled layout of a cinema screen: its saved layout, else the matching
+    template. Periodic refreshes read the primary, whatever session the
+    request itself uses.
+    """
+    if time.time() - _loaded_at > LAYOUT_REFRESH_SECONDS:
+        _refresh_layouts()
+    dims = _screen_layouts.get((cinema_id, screen_name))
+    if dims is not None:
+        return _compile((cinema_id, screen_name), screen_name, dims)
+    key = _template_for(screen_name)
+    return _compile(key, key, SCREEN_TEMPLATES[key])
+
+
+def layout_for_show(show) -> CompiledLayout:
+    return layout_for(show.cinema_id, show.screen_name)
@@ -0,0 +1,115 @@
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from datetime import datetime, timedelta
+import models
+
+# Secret shared by the API and door scanners; every worker must use the same one
+TICKET_SIGNING_KEY = os.getenv("TICKET_SIGNING_KEY", "")
+APP_ENV = os.getenv("APP_ENV", "development")
+
+TOKEN_PREFIX = "CX1"
+SIGNATURE_BYTES = 16  # 128-bit truncated HMAC-SHA256
+
+if not TICKET_SIGNING_KEY:
+    if APP_ENV == "production":
+        raise RuntimeError("TICKET_SIGNING_KEY must be set in production")
+    print("⚠️ TICKET_SIGNING_KEY not set; signing tickets with an insecure development key.")
+    TICKET_SIGNING_KEY = "cinex-development-ticket-key"
+
+_key = TICKET_SIGNING_KEY.encode("utf-8")
+
+
+class InvalidTicket(ValueError):
+    pass
+
+
+def _signature(message: str) -> str:
+    digest = hmac.new(_key, message.encode("ascii"), hashlib.sha256).digest()[:SIGNATURE_BYTES]
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def sign_ticket(booking_id: int, show_id: int, seat_numbers) -> str:
+    """
+    Signed ticket token for the QR code: CX1.<booking_id>.<show_id>.<seats>.<signature>
+
+    Seats are sorted and joined with "-". The token carries everything a
+    door scanner needs, so it can be verified with the key alone.
+    """
+    message = f"{TOKEN_PREFIX}.{booking_id}.{show_id}.{'-'.join(sorted(seat_numbers))}"
+    return f"{message}.{_signature(message)}"
+
+
+def verify_ticket(token: str):
+    """(booking_id, show_id, seat numbers) of a genuine token; raises InvalidTicket otherwise."""
+    message, _, signature = token.strip().rpartition(".")
+    parts = message.split(".")
+    if len(parts) != 4 or parts[0] != TOKEN_PREFIX:
+        raise InvalidTicket("Not a CineX ticket")
+    if not message.isascii() or not hmac.compare_digest(signature, _signature(message)):
+        raise InvalidTicket("Bad ticket signature")
+    try:
+        return int(parts[1]), int(parts[2]), parts[3].split("-") if parts[3] else []
+    except ValueError:
+        raise InvalidTicket("Malformed ticket")
+
+
+class CheckinRegistry:
+    """
+    Per-show memory of admitted and revoked bookings, so repeat scans and
+    cancelled tickets are answered without a database round trip.
+
+    The checkins table stays the authority (several workers may be letting
+    people in); this only remembers what this worker has already seen, until
+    forget_ended_shows() drops the shows that are over.
+    """
+
+    def __init__(self):
+        self._admitted = {}  # show_id -> {booking_id: first scan time}
+        self._revoked = {}  # show_id -> {booking_id}
+        self._lock = threading.Lock()
+
+    def admitted_at(self, show_id: int, booking_id: int):
+        return self._admitted.get(show_id, {}).get(booking_id)
+
+    def is_revoked(self, show_id: int, booking_id: int) -> bool:
+        return booking_id in self._revoked.get(show_id, ())
+
+    def admit(self, show_id: int, booking_id: int, scanned_at: datetime):
+        with self._lock:
+            self._admitted.setdefault(show_id, {}).setdefault(booking_id, scanned_at)
+
+    def revoke(self, show_id: int, booking_id: int):
+        with self._lock:
+            self._revoked.setdefault(show_id, set()).add(booking_id)
+
+    def show_ids(self) -> set:
+        with self._lock:
+            return set(self._admitted) | set(self._revoked)
+
+    def forget_show(self, show_id: int):
+        with self._lock:
+            self._admitted.pop(show_id, None)
+            self._revoked.pop(show_id, None)
+
+
+checkins = CheckinRegistry()
+
+
+def forget_ended_shows(db):
+    """Drop the check-in memory of shows that have ended (or were deleted)."""
+    show_ids = checkins.show_ids()
+    if not show_ids:
+        return
+    now = datetime.now()
+    rows = db.query(models.Show.show_id, models.Show.start_time, models.Movie.duration_mins).outerjoin(
+        models.Movie, models.Movie.movie_id == models.Show.movie_id
+    ).filter(models.Show.show_id.in_(show_ids)).all()
+    running = {
+        show_id for show_id, start_time, duration_mins in rows
+        if start_time + timedelta(minutes=duration_mins or 0) > now
+    }
+    for show_id in show_ids - running:
+        checkins.forget_show(show_id)
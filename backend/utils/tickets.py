@@ -0,0 +1,194 @@
+import asyncio
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+# Rendered tickets are cached here as {booking_id}-{version}.pdf
+TICKET_CACHE_DIR = os.getenv("TICKET_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "ticket_cache"))
+# Worker processes for PDF rendering (defaults to one per core)
+TICKET_RENDER_WORKERS = int(os.getenv("TICKET_RENDER_WORKERS", os.cpu_count() or 1))
+# Bump when the ticket design changes so cached PDFs are re-rendered
+TICKET_TEMPLATE_VERSION = 1
+
+_pool = None
+_pool_lock = threading.Lock()
+_in_flight = {}  # cache path -> Future, so concurrent requests share one render
+_in_flight_lock = threading.Lock()
+
+
+def ticket_data(booking, show) -> dict:
+    """Plain, picklable description of a booking's ticket; the QR code holds its signed token."""
+    from utils.ticket_tokens import sign_ticket  # not needed by the render workers
+    seats = sorted(seat.seat_number for seat in booking.seats)
+    return {
+        "booking_id": booking.booking_id,
+        "status": booking.status,
+        "movie_title": show.movie.title if show.movie else "",
+        "cinema_name": show.cinema.name if show.cinema else "",
+        "cinema_location": show.cinema.location if show.cinema else "",
+        "screen_name": show.screen_name,
+        "screen_type": show.screen_type or "",
+        "start_time": show.start_time.isoformat(),
+        "seats": seats,
+        "total_amount": float(booking.total_amount),
+        "qr_data": sign_ticket(booking.booking_id, show.show_id, seats),
+    }
+
+
+def ticket_version(data: dict) -> str:
+    """Short fingerprint of the ticket contents and template; changes whenever the PDF would."""
+    payload = json.dumps([TICKET_TEMPLATE_VERSION, data], sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def render_ticket_pdf(data: dict) -> bytes:
+    """
+    Render one e-ticket as PDF bytes.
+
+    Runs inside a worker process; reportlab is imported here so the API
+    process never loads it.
+    """
+    from datetime import datetime
+    from io import BytesIO
+    from reportlab.graphics import renderPDF
+    from reportlab.graphics.barcode.qr import QrCodeWidget
+    from reportlab.graphics.shapes import Drawing
+    from reportlab.lib.colors import HexColor
+    from reportlab.lib.pagesizes import A6, landscape
+    from reportlab.pdfgen import canvas
+
+    width, height = landscape(A6)
+    start = datetime.fromisoformat(data["start_time"])
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=(width, height))
+    pdf.setTitle(f"CineX E-Ticket BK{data['booking_id']}")
+
+    # Header band
+    pdf.setFillColor(HexColor("#e50914"))
+    pdf.rect(0, height - 40, width, 40, stroke=0, fill=1)
+    pdf.setFillColor(HexColor("#ffffff"))
+    pdf.setFont("Helvetica-Bold", 16)
+    pdf.drawString(16, height - 27, "CineX E-Ticket")
+    pdf.setFont("Helvetica", 10)
+    pdf.drawRightString(width - 16, height - 26, f"BK{data['booking_id']}")
+
+    # Details
+    pdf.setFillColor(HexColor("#222222"))
+    pdf.setFont("Helvetica-Bold", 14)
+    pdf.drawString(16, height - 66, data["movie_title"][:40])
+    lines = [
+        ("Cinema", data["cinema_name"]),
+        ("Screen", f"{data['screen_name']} {data['screen_type']}".strip()),
+        ("Date", start.strftime("%A, %B %d, %Y")),
+        ("Time", start.strftime("%I:%M %p")),
+        ("Seats", ", ".join(data["seats"])),
+        ("Total", f"LKR {data['total_amount']:,.2f}"),
+    ]
+    y = height - 88
+    for label, value in lines:
+        pdf.setFont("Helvetica-Bold", 9)
+        pdf.drawString(16, y, label)
+        pdf.setFont("Helvetica", 9)
+        pdf.drawString(66, y, value[:48])
+        y -= 16
+
+    if data["status"] == "cancelled":
+        pdf.setFillColor(HexColor("#e50914"))
+        pdf.setFont("Helvetica-Bold", 22)
+        pdf.drawString(16, 14, "CANCELLED")
+
+    # QR code
+    qr = QrCodeWidget(data["qr_data"])
+    x1, y1, x2, y2 = qr.getBounds()
+    size = 110
+    drawing = Drawing(size, size, transform=[size / (x2 - x1), 0, 0, size / (y2 - y1), 0, 0])
+    drawing.add(qr)
+    renderPDF.draw(drawing, pdf, width - size - 14, 24)
+    pdf.setFillColor(HexColor("#777777"))
+    pdf.setFont("Helvetica", 7)
+    pdf.drawCentredString(width - size / 2 - 14, 16, "Present at the cinema entrance")
+
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: never fork the API process with its threads and DB connections
+            _pool = ProcessPoolExecutor(
+                max_workers=TICKET_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _cache_path(booking_id: int, version: str) -> str:
+    return os.path.join(TICKET_CACHE_DIR, f"{booking_id}-{version}.pdf")
+
+
+def _store(path: str, booking_id: int, pdf: bytes):
+    os.makedirs(TICKET_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(pdf)
+    os.replace(tmp_path, path)
+    # Drop older versions of this booking's ticket
+    for old in glob.glob(os.path.join(TICKET_CACHE_DIR, f"{booking_id}-*.pdf")):
+        if old != path:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+def _ticket_future(data: dict) -> Future:
+    """Future with the PDF bytes: from the disk cache, a render in flight, or a new render."""
+    path = _cache_path(data["booking_id"], ticket_version(data))
+    if os.path.exists(path):
+        future = Future()
+        with open(path, "rb") as f:
+            future.set_result(f.read())
+        return future
+
+    with _in_flight_lock:
+        future = _in_flight.get(path)
+        if future is not None:
+            return future
+        future = _in_flight[path] = _get_pool().submit(render_ticket_pdf, data)
+
+    def _done(f: Future):
+        with _in_flight_lock:
+            _in_flight.pop(path, None)
+        if not f.cancelled() and f.exception() is None:
+            try:
+                _store(path, data["booking_id"], f.result())
+            except OSError as e:
+                print(f"⚠️ Could not cache ticket {path}: {e}")
+
+    future.add_done_callback(_done)
+    return future
+
+
+def get_ticket_pdf(data: dict) -> bytes:
+    """Blocking: cached or freshly rendered ticket PDF (for worker threads)."""
+    return _ticket_future(data).result()
+
+
+async def get_ticket_pdf_async(data: dict) -> bytes:
+    """Awaitable version for request handlers; the event loop never renders."""
+    return await asyncio.wrap_future(_ticket_future(data))
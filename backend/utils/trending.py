@@ -0,0 +1,179 @@
+import heapq
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import and_, func
+from database import shard_router
+import models
+from utils.partitions import partition_key
+
+# A booking counts half as much after this many hours
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", 72))
+# Bookings older than this are left out when the counters are rebuilt from the DB
+TRENDING_WINDOW_DAYS = int(os.getenv("TRENDING_WINDOW_DAYS", 21))
+# How often counters are rebuilt from the DB, picking up other workers' bookings (0 disables)
+TRENDING_RESYNC_SECONDS = int(os.getenv("TRENDING_RESYNC_SECONDS", 300))
+# Ranked lists are recomputed at most this often
+TRENDING_CACHE_SECONDS = float(os.getenv("TRENDING_CACHE_SECONDS", 10))
+TRENDING_TOP_N = int(os.getenv("TRENDING_TOP_N", 50))
+
+RANKINGS = ("seats", "bookings")
+
+# Re-anchor the counters before exp() gets large enough to lose precision
+_MAX_EXPONENT = 40.0
+
+
+class TrendingCounters:
+    """
+    Exponentially decayed booking and seat counts per movie and per cinema/movie.
+
+    Every event is stored scaled by exp(rate * (t - anchor)) instead of
+    decaying the existing counts, so recording is O(1) and no decay pass is
+    ever needed: every counter shrinks by the same factor over time, so the
+    stored values already rank correctly. Decayed values at `now` are the
+    stored ones times exp(-rate * (now - anchor)). When the scale grows too
+    large, all counters are re-anchored in one pass.
+    """
+
+    def __init__(self, half_life_hours: float = TRENDING_HALF_LIFE_HOURS):
+        self.rate = math.log(2) / (half_life_hours * 3600)
+        self._anchor = time.time()
+        self._movies = {}         # movie_id -> [bookings, seats]
+        self._cinema_movies = {}  # cinema_id -> {movie_id: [bookings, seats]}
+        self._lock = threading.Lock()
+
+    def record(self, movie_id: int, cinema_id: int, seats: int, at: float = None, bookings: int = 1):
+        """Add a booking made at `at` (epoch seconds, default now); negative counts remove one."""
+        at = time.time() if at is None else at
+        with self._lock:
+            exponent = self.rate * (at - self._anchor)
+            if exponent > _MAX_EXPONENT:
+                self._reanchor(at)
+                exponent = 0.0
+            weight = math.exp(exponent)
+            for counters in (self._movies, self._cinema_movies.setdefault(cinema_id, {})):
+                counts = counters.setdefault(movie_id, [0.0, 0.0])
+                # Cancellations subtract what the booking added; clamp float residue
+                counts[0] = max(counts[0] + bookings * weight, 0.0)
+                counts[1] = max(counts[1] + seats * weight, 0.0)
+
+    def top(self, n: int, cinema_id: int = None, by: str = "seats"):
+        """[(movie_id, decayed bookings, decayed seats)] for the n highest ranked movies."""
+        column = 0 if by == "bookings" else 1  # counters hold [bookings, seats]
+        with self._lock:
+            counters = self._movies if cinema_id is None else self._cinema_movies.get(cinema_id, {})
+            best = heapq.nlargest(n, counters.items(), key=lambda item: item[1][column])
+            decay = math.exp(-self.rate * (time.time() - self._anchor))
+        return [
+            (movie_id, counts[0] * decay, counts[1] * decay)
+            for movie_id, counts in best
+            if counts[column] * decay >= 0.01
+        ]
+
+    def replace(self, events):
+        """Rebuild from (movie_id, cinema_id, booked_at epoch seconds, seats) events."""
+        fresh = TrendingCounters()
+        fresh.rate = self.rate
+        for movie_id, cinema_id, booked_at, seats in events:
+            fresh.record(movie_id, cinema_id, seats, at=booked_at)
+        with self._lock:
+            self._anchor = fresh._anchor
+            self._movies = fresh._movies
+            self._cinema_movies = fresh._cinema_movies
+
+    def _reanchor(self, at: float):
+        scale = math.exp(-self.rate * (at - self._anchor))
+        for counters in [self._movies, *self._cinema_movies.values()]:
+            for counts in counters.values():
+                counts[0] *= scale
+                counts[1] *= scale
+        self._anchor = at
+
+
+trending_counters = TrendingCounters()
+
+
+class RankingCache:
+    """Encoded top-N lists per (cinema_id, ranking, limit), each kept for TRENDING_CACHE_SECONDS."""
+
+    def __init__(self, ttl: float = TRENDING_CACHE_SECONDS):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            return None
+        return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+
+rankings = RankingCache()
+
+
+def _epoch(booked_at: datetime) -> float:
+    # booking_date comes from the DB clock; events and resyncs both use it, so they agree
+    return booked_at.timestamp() if booked_at else time.time()
+
+
+def record_booking(show, seat_count: int, booked_at: datetime = None):
+    trending_counters.record(show.movie_id, show.cinema_id, seat_count, at=_epoch(booked_at))
+
+
+def record_cancellation(show, seat_count: int, booked_at: datetime = None):
+    """Take back exactly what the booking added (its weight depends on when it was made)."""
+    trending_counters.record(show.movie_id, show.cinema_id, -seat_count, at=_epoch(booked_at), bookings=-1)
+
+
+def resync(db):
+    """Rebuild the counters from live bookings made in the last TRENDING_WINDOW_DAYS."""
+    started = time.perf_counter()
+    since = datetime.now() - timedelta(days=TRENDING_WINDOW_DAYS)
+
+    def recent_bookings(booking_db):
+        return booking_db.query(
+            models.Booking.show_id,
+            models.Booking.booking_date,
+            func.count(models.BookingSeat.booking_seat_id)
+        ).join(
+            models.BookingSeat,
+            and_(
+                models.BookingSeat.booking_id == models.Booking.booking_id,
+                models.BookingSeat.show_date == models.Booking.show_date
+            )
+        ).filter(
+            models.Booking.booking_date >= since,
+            # A booking made since then is for a show starting since then: prunes old partitions
+            models.Booking.show_date >= partition_key(since),
+            models.BookingSeat.show_date >= partition_key(since),
+            models.Booking.status != "cancelled"
+        ).group_by(
+            models.Booking.booking_id, models.Booking.show_id, models.Booking.booking_date
+        ).all()
+
+    # Bookings may be spread over shards; their shows' movie and cinema come from the catalog
+    rows = [row for rows in shard_router.scatter(db, recent_bookings) for row in rows]
+    shows = {
+        show_id: (movie_id, cinema_id)
+        for show_id, movie_id, cinema_id in db.query(
+            models.Show.show_id, models.Show.movie_id, models.Show.cinema_id
+        ).filter(models.Show.show_id.in_({row[0] for row in rows})).all()
+    }
+    trending_counters.replace(
+        (*shows[show_id], _epoch(booked_at), seats)
+        for show_id, booked_at, seats in rows
+        if booked_at is not None and show_id in shows
+    )
+    rankings.clear()
+    print(f"📈 Trending counters rebuilt from {len(rows)} bookings in {(time.perf_counter() - started) * 1000:.0f} ms")
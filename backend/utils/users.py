@@ -0,0 +1,110 @@
+import os
+import threading
+from collections import OrderedDict
+import models
+
+# How many known user ids to remember per worker
+KNOWN_USERS_CACHE_SIZE = int(os.getenv("KNOWN_USERS_CACHE_SIZE", 50000))
+USER_SYNC_BATCH_SIZE = int(os.getenv("USER_SYNC_BATCH_SIZE", 500))
+
+
+class KnownUsers:
+    """Bounded LRU set of user ids that are known to exist in the users table."""
+
+    def __init__(self, max_size: int = KNOWN_USERS_CACHE_SIZE):
+        self.max_size = max_size
+        self._ids = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, user_id) -> bool:
+        with self._lock:
+            if user_id in self._ids:
+                self._ids.move_to_end(user_id)
+                return True
+            return False
+
+    def add(self, user_id):
+        with self._lock:
+            self._ids[user_id] = True
+            self._ids.move_to_end(user_id)
+            while len(self._ids) > self.max_size:
+                self._ids.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._ids.pop(user_id, None)
+
+
+known_users = KnownUsers()
+
+
+def _insert(db):
+    """Dialect-specific INSERT for users (both dialects support ON CONFLICT)."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(models.User)
+
+
+def ensure_user(db, user_id: str, contact_email: str):
+    """
+    Make sure a Clerk user has a users row, as part of the caller's transaction.
+
+    Known ids skip the database entirely; unknown ones get a single
+    INSERT ... ON CONFLICT (user_id) DO NOTHING. An email already taken by
+    another user still raises IntegrityError. Call remember_user() once the
+    transaction has committed.
+    """
+    if user_id in known_users:
+        return
+    email_name = contact_email.split('@')[0] if contact_email else 'User'
+    db.execute(_insert(db).values(
+        user_id=user_id,
+        first_name=email_name,
+        last_name='',
+        email=contact_email or '',
+        role='customer'
+    ).on_conflict_do_nothing(index_elements=[models.User.user_id]))
+
+
+def remember_user(user_id: str):
+    known_users.add(user_id)
+
+
+def sync_users(db, users, batch_size: int = USER_SYNC_BATCH_SIZE) -> int:
+    """
+    Bulk upsert Clerk users in batches; names and email are refreshed, role is kept.
+
+    Returns the number of batches written. Each batch commits on its own.
+    A user id listed twice is written once, with its last entry (Postgres
+    rejects an upsert that touches the same row twice).
+    """
+    users = list({u.user_id: u for u in users}.values())
+    batches = 0
+    for start in range(0, len(users), batch_size):
+        chunk = users[start:start + batch_size]
+        stmt = _insert(db).values([
+            {
+                "user_id": u.user_id,
+                "first_name": u.first_name,
+                "last_name": u.last_name,
+                "email": u.email,
+                "role": "customer",
+            }
+            for u in chunk
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.User.user_id],
+            set_={
+                "first_name": stmt.excluded.first_name,
+                "last_name": stmt.excluded.last_name,
+                "email": stmt.excluded.email,
+            }
+        )
+        db.execute(stmt)
+        db.commit()
+        for u in chunk:
+            known_users.add(u.user_id)
+        batches += 1
+    return batches
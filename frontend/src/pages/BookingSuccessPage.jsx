@@ -26,7 +26,7 @@ const BookingSuccessPage = () => {
     }
 
     // Extract data from booking state (passed from CheckoutPage)
-    const { id, seats, totalPrice, movie, show, date } = booking;
+    const { id, ticketToken, seats, totalPrice, movie, show, date } = booking;
 
     // Build display-friendly values with safe fallbacks
     const movieTitle = movie?.title || 'Movie';
@@ -48,8 +48,8 @@ const BookingSuccessPage = () => {
         ? new Date(show.start_time).toLocaleTimeString('en-US', { hour: '2-digit', minute: '2-digit' })
         : '';
 
-    // Generate a unique QR code URL using the booking ID
-    const qrData = encodeURIComponent(`CineX-Ticket-${id}`);
+    // QR code with the signed ticket token that door scanners verify
+    const qrData = encodeURIComponent(ticketToken || `CineX-Ticket-${id}`);
     const qrUrl = `https://api.qrserver.com/v1/create-qr-code/?size=150x150&data=${qrData}`;
 
     const handleDownload = () => {
@@ -10,12 +10,14 @@ const CheckoutPage = () => {
     const location = useLocation();
     const navigate = useNavigate();
     const { user, isLoaded } = useUser();
-    const { showId, selectedSeats, totalPrice } = location.state || {};
+    const { showId, selectedSeats, totalPrice, holdId } = location.state || {};
 
     const [show, setShow] = useState(null);
     const [movie, setMovie] = useState(null);
     const [loading, setLoading] = useState(true);
     const [submitting, setSubmitting] = useState(false);
+    // One key per checkout so retries of the same booking are deduplicated by the API
+    const [idempotencyKey] = useState(() => crypto.randomUUID());
 
     const [paymentMethod, setPaymentMethod] = useState('card');
     const [formData, setFormData] = useState({
@@ -140,11 +142,12 @@ const CheckoutPage = () => {
             seat_numbers: selectedSeats,
             total_amount: totalPrice,
             contact_email: formData.email,
-            contact_phone: formData.phone
+            contact_phone: formData.phone,
+            hold_id: holdId || null
         };
 
         try {
-            const result = await createBooking(bookingPayload);
+            const result = await createBooking(bookingPayload, idempotencyKey);
 
             toast.success('Booking confirmed!');
 
@@ -152,6 +155,7 @@ const CheckoutPage = () => {
                 state: {
                     booking: {
                         id: `BK${result.booking_id}`,
+                        ticketToken: result.ticket_token,
                         showId,
                         seats: selectedSeats,
                         totalPrice,
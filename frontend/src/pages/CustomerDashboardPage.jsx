@@ -17,7 +17,7 @@ const CustomerDashboardPage = () => {
         if (!isLoaded || !user) return;
         try {
             setLoading(true);
-            const data = await getUserBookings(user.id);
+            const data = await getUserBookings(user.id, { limit: 100 });
             setBookings(data);
         } catch (err) {
             console.error("Failed to fetch bookings:", err);
@@ -116,7 +116,7 @@ const OverviewSection = ({ setActiveSection, bookings, loading }) => {
     }
 
     const totalBookings = bookings.length;
-    const upcomingShows = bookings.filter(b => b.show?.start_time && new Date(b.show.start_time) > new Date()).length;
+    const upcomingShows = bookings.filter(b => b.start_time && new Date(b.start_time) > new Date()).length;
     // Calculate points: 10 points for every booking (dummy logic)
     const points = totalBookings * 10;
 
@@ -149,11 +149,11 @@ const OverviewSection = ({ setActiveSection, bookings, loading }) => {
                                 <div className="flex-grow">
                                     <h4 className="font-bold text-sm text-[var(--color-light)]">Ticket Purchased</h4>
                                     <p className="text-xs text-gray-500">
-                                        {booking.show?.movie?.title || 'Unknown Movie'} • {booking.show?.screen_name || 'N/A'}
+                                        {booking.movie_title || 'Unknown Movie'} • {booking.screen_name || 'N/A'}
                                     </p>
                                 </div>
                                 <span className="text-xs text-gray-400 font-medium">
-                                    {new Date(booking.booking_date || booking.show?.start_time).toLocaleDateString()}
+                                    {new Date(booking.booking_date || booking.start_time).toLocaleDateString()}
                                 </span>
                             </div>
                         ))
@@ -212,7 +212,7 @@ const MyBookingsSection = ({ bookings, loading, refreshBookings }) => {
                     {bookings.map((booking) => (
                         <div key={booking.booking_id} className="bg-white rounded-2xl p-4 md:p-6 border border-gray-100 flex flex-col md:flex-row gap-6 shadow-sm hover:shadow-md transition-all">
                             <img
-                                src={booking.show?.movie?.poster_url || "https://via.placeholder.com/96x128"}
+                                src={booking.poster_url || "https://via.placeholder.com/96x128"}
                                 alt=""
                                 className="w-full md:w-24 h-32 object-cover rounded-xl shadow-sm"
                             />
@@ -220,10 +220,10 @@ const MyBookingsSection = ({ bookings, loading, refreshBookings }) => {
                                 <div className="flex justify-between items-start mb-2">
                                     <div>
                                         <h3 className="font-bold text-lg text-[var(--color-light)]">
-                                            {booking.show?.movie?.title || `Show #${booking.show_id}`}
+                                            {booking.movie_title || `Show #${booking.show_id}`}
                                         </h3>
                                         <p className="text-sm text-gray-500">
-                                            {booking.show?.cinema?.name || 'Cinema'} • {booking.show?.screen_name}
+                                            {booking.cinema_name || 'Cinema'} • {booking.screen_name}
                                         </p>
                                     </div>
                                     <span className={`px-2.5 py-1 rounded-full text-xs font-bold ${booking.status === 'confirmed' ? 'bg-green-50 text-green-600' :
@@ -237,18 +237,18 @@ const MyBookingsSection = ({ bookings, loading, refreshBookings }) => {
                                 <div className="grid grid-cols-2 gap-4 my-4 text-sm">
                                     <div className="flex items-center gap-2 text-gray-600">
                                         <Calendar className="w-4 h-4 text-gray-400" />
-                                        {booking.show?.start_time ? new Date(booking.show.start_time).toLocaleDateString() : 'N/A'}
+                                        {booking.start_time ? new Date(booking.start_time).toLocaleDateString() : 'N/A'}
                                     </div>
                                     <div className="flex items-center gap-2 text-gray-600">
                                         <Clock className="w-4 h-4 text-gray-400" />
-                                        {booking.show?.start_time ? formatShowTime(booking.show.start_time) : 'N/A'}
+                                        {booking.start_time ? formatShowTime(booking.start_time) : 'N/A'}
                                     </div>
                                 </div>
 
                                 <div className="flex items-center gap-2 text-sm">
                                     <span className="font-bold text-gray-400">Seats:</span>
                                     <span className="font-bold text-[var(--color-primary)]">
-                                        {booking.seats?.map(s => s.seat_number).join(', ') || 'N/A'}
+                                        {booking.seat_numbers?.join(', ') || 'N/A'}
                                     </span>
                                 </div>
                             </div>
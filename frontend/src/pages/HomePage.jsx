@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
-import { getMovies } from '../services/api';
+import { getMovies, getTrendingMovies } from '../services/api';
 import { Star, Calendar, Clock, Ticket, Film, Users, Trophy, Loader, ChevronRight } from 'lucide-react';
 import a2 from '../assets/a2.jpg';
 
@@ -17,8 +17,14 @@ const HomePage = () => {
     useEffect(() => {
         const fetchMovies = async () => {
             try {
-                const data = await getMovies();
-                setNowShowing(data.slice(0, 10)); // Show first 10 movies
+                const [data, trending] = await Promise.all([
+                    getMovies(),
+                    getTrendingMovies({ limit: 10 }).catch(() => [])
+                ]);
+                // Trending movies first, then the rest of the catalog
+                const trendingIds = trending.map((t) => t.movie.movie_id);
+                const rest = data.filter((movie) => !trendingIds.includes(movie.movie_id));
+                setNowShowing([...trending.map((t) => t.movie), ...rest].slice(0, 10)); // Show first 10 movies
             } catch (err) {
                 console.error('Failed to fetch movies:', err);
             } finally {
@@ -212,6 +212,13 @@ const MovieDetailsPage = () => {
                                                     <span className="text-[10px] text-gray-400 font-bold uppercase tracking-wider z-10 group-hover/time:text-red-400">
                                                         {show.screenName}
                                                     </span>
+                                                    {show.availability && show.availability.status !== 'available' && (
+                                                        <span className="text-[10px] font-bold text-[var(--color-primary)] z-10">
+                                                            {show.availability.status === 'sold_out'
+                                                                ? 'Sold out'
+                                                                : `Almost full • ${show.availability.seats_left} left`}
+                                                        </span>
+                                                    )}
 
                                                     {/* Price Tag Badge */}
                                                     <div className="absolute top-0 right-0 bg-gray-100 text-[9px] font-bold text-gray-500 px-1.5 py-0.5 rounded-bl-lg group-hover/time:bg-[var(--color-primary)] group-hover/time:text-white transition-colors">
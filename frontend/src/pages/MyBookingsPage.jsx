@@ -6,32 +6,43 @@ import { useUser } from '@clerk/clerk-react';
 import { CheckCircle, Download, Ticket, MapPin, Calendar, Clock, ArrowUpRight, Check, X, Printer, Loader } from 'lucide-react';
 import toast from 'react-hot-toast';
 
+const PAGE_SIZE = 20;
+
 const MyBookingsPage = () => {
     const location = useLocation();
     const { user, isLoaded } = useUser();
     const [activeTab, setActiveTab] = useState('upcoming');
     const [bookings, setBookings] = useState([]);
+    const [hasMore, setHasMore] = useState(false);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [showSuccessModal, setShowSuccessModal] = useState(false);
     const [newBookingData, setNewBookingData] = useState(null);
 
-    const fetchBookings = async () => {
+    // Each tab is its own server-side view; pages are appended by "Load more"
+    const fetchBookings = async (append = false) => {
         if (!isLoaded || !user) return;
         try {
-            setLoading(true);
-            const data = await getUserBookings(user.id);
-            setBookings(data);
+            append ? setLoadingMore(true) : setLoading(true);
+            const data = await getUserBookings(user.id, {
+                view: activeTab === 'upcoming' ? 'upcoming' : 'past',
+                skip: append ? bookings.length : 0,
+                limit: PAGE_SIZE
+            });
+            setBookings(append ? [...bookings, ...data] : data);
+            setHasMore(data.length === PAGE_SIZE);
         } catch (err) {
             console.error("Failed to fetch bookings:", err);
             toast.error("Failed to load bookings");
         } finally {
             setLoading(false);
+            setLoadingMore(false);
         }
     };
 
     useEffect(() => {
         fetchBookings();
-    }, [isLoaded, user]);
+    }, [isLoaded, user, activeTab]);
 
     // Legacy support for redirect from checkout (if any)
     useEffect(() => {
@@ -55,13 +66,6 @@ const MyBookingsPage = () => {
         }
     };
 
-    const filteredBookings = bookings.filter(b => {
-        if (activeTab === 'upcoming') {
-            return b.status === 'confirmed' && new Date(b.show?.start_time) >= new Date();
-        }
-        return b.status !== 'confirmed' || new Date(b.show?.start_time) < new Date();
-    });
-
     const handleDownloadTicket = () => {
         toast.promise(new Promise(resolve => setTimeout(resolve, 2000)), {
             loading: 'Generating E-Ticket PDF...',
@@ -104,13 +108,13 @@ const MyBookingsPage = () => {
 
             {/* List */}
             <div className="space-y-6">
-                {filteredBookings.length > 0 ? filteredBookings.map((booking) => (
+                {bookings.length > 0 ? bookings.map((booking) => (
                     <div key={booking.booking_id} className="bg-white rounded-2xl overflow-hidden border border-gray-100 flex flex-col md:flex-row hover:shadow-lg hover:border-red-100 transition-all group shadow-sm">
                         {/* Poster */}
                         <div className="w-full md:w-32 aspect-[3/4] md:aspect-auto shrink-0 relative">
                             <img
-                                src={booking.show?.movie?.poster_url || "https://via.placeholder.com/150x200"}
-                                alt={booking.show?.movie?.title}
+                                src={booking.poster_url || "https://via.placeholder.com/150x200"}
+                                alt={booking.movie_title}
                                 className="w-full h-full object-cover"
                             />
                             <div className="absolute top-2 left-2 md:hidden">
@@ -125,7 +129,7 @@ const MyBookingsPage = () => {
                         <div className="p-6 flex-grow flex flex-col justify-between">
                             <div>
                                 <div className="flex justify-between items-start mb-2">
-                                    <h3 className="text-xl font-bold text-[var(--color-light)]">{booking.show?.movie?.title || 'Unknown Title'}</h3>
+                                    <h3 className="text-xl font-bold text-[var(--color-light)]">{booking.movie_title || 'Unknown Title'}</h3>
                                     <span className={`hidden md:block px-2.5 py-1 rounded-full text-xs font-bold ${booking.status === 'confirmed' ? 'bg-green-50 text-green-600 border border-green-100' : 'bg-gray-100 text-gray-500 border border-gray-200'
                                         }`}>
                                         {booking.status.toUpperCase()}
@@ -137,21 +141,21 @@ const MyBookingsPage = () => {
                                     <div className="flex items-start gap-3">
                                         <div className="mt-0.5 text-gray-400"><MapPin className="w-4 h-4" /></div>
                                         <div>
-                                            <p className="text-[var(--color-light)] font-bold">{booking.show?.cinema?.name}</p>
-                                            <p className="text-gray-500 text-xs font-medium">{booking.show?.screen_name}</p>
+                                            <p className="text-[var(--color-light)] font-bold">{booking.cinema_name}</p>
+                                            <p className="text-gray-500 text-xs font-medium">{booking.screen_name}</p>
                                         </div>
                                     </div>
                                     <div className="space-y-2">
                                         <div className="flex items-center gap-3">
                                             <div className="text-gray-400"><Calendar className="w-4 h-4" /></div>
                                             <span className="text-gray-600 font-medium">
-                                                {booking.show?.start_time ? new Date(booking.show.start_time).toLocaleDateString(undefined, { weekday: 'short', month: 'short', day: 'numeric' }) : 'N/A'}
+                                                {booking.start_time ? new Date(booking.start_time).toLocaleDateString(undefined, { weekday: 'short', month: 'short', day: 'numeric' }) : 'N/A'}
                                             </span>
                                         </div>
                                         <div className="flex items-center gap-3">
                                             <div className="text-gray-400"><Clock className="w-4 h-4" /></div>
                                             <span className="text-gray-600 font-medium">
-                                                {booking.show?.start_time ? formatShowTime(booking.show.start_time) : 'N/A'}
+                                                {booking.start_time ? formatShowTime(booking.start_time) : 'N/A'}
                                             </span>
                                         </div>
                                     </div>
@@ -160,7 +164,7 @@ const MyBookingsPage = () => {
                                 <div className="flex items-center gap-2 text-sm bg-gray-50 w-fit px-3 py-1.5 rounded-lg border border-gray-100">
                                     <span className="text-gray-500 font-bold">Seats:</span>
                                     <span className="font-bold text-[var(--color-primary)]">
-                                        {booking.seats?.map(s => s.seat_number).join(', ') || 'N/A'}
+                                        {booking.seat_numbers?.join(', ') || 'N/A'}
                                     </span>
                                 </div>
                             </div>
@@ -196,6 +200,18 @@ const MyBookingsPage = () => {
                         <Link to="/movies" className="btn btn-primary px-8 py-3 rounded-xl font-bold">Book a Movie</Link>
                     </div>
                 )}
+
+                {hasMore && (
+                    <div className="flex justify-center">
+                        <button
+                            onClick={() => fetchBookings(true)}
+                            disabled={loadingMore}
+                            className="px-6 py-2.5 rounded-xl text-sm font-bold text-gray-600 bg-white hover:bg-gray-50 border border-gray-200 transition-all flex items-center gap-2"
+                        >
+                            {loadingMore && <Loader className="w-4 h-4 animate-spin" />} Load more
+                        </button>
+                    </div>
+                )}
             </div>
 
             {/* Success Modal - styled as E-Ticket */}
@@ -10,11 +10,19 @@ import {
   ChevronRight,
   X,
   Loader,
+  Sparkles,
 } from "lucide-react";
 
 import { formatShowTime, formatPrice } from "../data/shows";
-import { getShowById, getMovieById, getBookedSeats } from "../services/api";
-import { generateSeatMap, calculateTotalPrice, seatTypes } from "../data/seats";
+import {
+  getShowById,
+  getMovieById,
+  getBookedSeats,
+  getShowSeatMap,
+  findBestSeats,
+  releaseSeatHold,
+} from "../services/api";
+import { calculateTotalPrice, seatTypes } from "../data/seats";
 
 const MAX_SEATS = 8;
 const BOOKING_FEE_PER_SEAT = 150;
@@ -79,9 +87,13 @@ export default function SeatSelectionPage() {
   const navigate = useNavigate();
 
   const [selectedSeats, setSelectedSeats] = useState([]);
+  const [bestCount, setBestCount] = useState(2);
+  const [holdId, setHoldId] = useState(null);
+  const [findingBest, setFindingBest] = useState(false);
   const [show, setShow] = useState(null);
   const [movie, setMovie] = useState(null);
   const [bookedSeatsList, setBookedSeatsList] = useState([]);
+  const [serverSeatMap, setServerSeatMap] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
@@ -98,8 +110,12 @@ export default function SeatSelectionPage() {
           setMovie(movieData);
         }
 
-        // Fetch already booked seats for this show
-        const bookedData = await getBookedSeats(id);
+        // Fetch the screen layout and already booked seats for this show
+        const [seatMapData, bookedData] = await Promise.all([
+          getShowSeatMap(id),
+          getBookedSeats(id),
+        ]);
+        setServerSeatMap(seatMapData);
         setBookedSeatsList(bookedData.booked_seats || []);
       } catch (err) {
         console.error("Failed to fetch seat selection data:", err);
@@ -111,25 +127,27 @@ export default function SeatSelectionPage() {
     fetchData();
   }, [id]);
 
-  // Generate seat map with booked seats marked as sold
+  // Build the seat map from the server layout with booked seats marked as sold
   const seatMap = useMemo(() => {
-    if (!show) return null;
-    const map = generateSeatMap(show.screen_name, show.show_id);
-
-    // Mark booked seats as sold
-    if (map && bookedSeatsList.length > 0) {
-      for (const row of map.rows) {
-        for (const seat of row.seats) {
-          const seatLabel = `${seat.row}${seat.number}`;
-          if (bookedSeatsList.includes(seatLabel)) {
-            seat.status = "sold";
-          }
-        }
-      }
-    }
-
-    return map;
-  }, [show, bookedSeatsList]);
+    if (!show || !serverSeatMap) return null;
+    const booked = new Set(bookedSeatsList);
+
+    return {
+      screenName: show.screen_name,
+      totalSeats: serverSeatMap.total_seats,
+      rows: serverSeatMap.seat_rows.map((row) => ({
+        rowLabel: row.row_label,
+        seats: row.seats.map((seat) => ({
+          id: seat.id,
+          row: row.row_label,
+          number: seat.number,
+          type: seat.type,
+          status: booked.has(seat.id) ? "sold" : "available",
+          priceMultiplier: seat.price / show.ticket_price,
+        })),
+      })),
+    };
+  }, [show, serverSeatMap, bookedSeatsList]);
 
   if (loading) {
     return (
@@ -163,6 +181,35 @@ export default function SeatSelectionPage() {
   const bookingFee = selectedSeats.length * BOOKING_FEE_PER_SEAT;
   const grandTotal = totalSeatPrice + bookingFee;
 
+  // Seats picked by hand no longer match the held block: give the hold back
+  const dropHold = () => {
+    if (!holdId) return;
+    releaseSeatHold(holdId).catch(() => {});
+    setHoldId(null);
+  };
+
+  const findBest = async () => {
+    try {
+      setFindingBest(true);
+      const best = await findBestSeats(show.show_id, {
+        count: bestCount,
+        release_hold_id: holdId,
+      });
+      setSelectedSeats(best.seat_numbers);
+      setHoldId(best.hold_id);
+      toast.success(
+        best.split
+          ? `Seats ${best.seat_numbers.join(", ")} held (split over two rows)`
+          : `Seats ${best.seat_numbers.join(", ")} held for you`
+      );
+    } catch (err) {
+      setHoldId(null);
+      toast.error(err.response?.data?.detail || "Could not find seats together");
+    } finally {
+      setFindingBest(false);
+    }
+  };
+
   const toggleSeat = (seatId) => {
     const seat = getSeatById(seatMap, seatId);
     if (!seat) return;
@@ -170,6 +217,7 @@ export default function SeatSelectionPage() {
     if (seat.status === "sold" || seat.status === "held") return;
 
     if (selectedSeats.includes(seatId)) {
+      dropHold();
       setSelectedSeats((prev) => prev.filter((s) => s !== seatId));
       return;
     }
@@ -179,10 +227,14 @@ export default function SeatSelectionPage() {
       return;
     }
 
+    dropHold();
     setSelectedSeats((prev) => [...prev, seatId]);
   };
 
-  const clearSelection = () => setSelectedSeats([]);
+  const clearSelection = () => {
+    dropHold();
+    setSelectedSeats([]);
+  };
 
   const proceed = () => {
     if (selectedSeats.length === 0) {
@@ -198,6 +250,7 @@ export default function SeatSelectionPage() {
         showId: show.show_id,
         selectedSeats: seatLabels,
         totalPrice: grandTotal,
+        holdId,
       },
     });
   };
@@ -319,6 +372,32 @@ export default function SeatSelectionPage() {
                   />
                 </div>
 
+                <div className="mt-5 border-t border-gray-100 pt-4">
+                  <p className="text-sm font-bold text-[var(--color-light)] mb-2">Best available</p>
+                  <div className="flex items-center gap-2">
+                    <select
+                      value={bestCount}
+                      onChange={(e) => setBestCount(Number(e.target.value))}
+                      className="border border-gray-200 rounded-xl px-3 py-2 text-sm font-semibold text-[var(--color-light)]"
+                    >
+                      {Array.from({ length: MAX_SEATS }, (_, i) => i + 1).map((n) => (
+                        <option key={n} value={n}>
+                          {n} {n === 1 ? "seat" : "seats"}
+                        </option>
+                      ))}
+                    </select>
+                    <button
+                      type="button"
+                      onClick={findBest}
+                      disabled={findingBest}
+                      className="flex-1 btn btn-secondary py-2 rounded-xl text-sm font-bold flex items-center justify-center gap-2 disabled:opacity-50"
+                    >
+                      {findingBest ? <Loader className="w-4 h-4 animate-spin" /> : <Sparkles className="w-4 h-4" />}
+                      Find best seats
+                    </button>
+                  </div>
+                </div>
+
                 <div className="mt-5 border-t border-gray-100 pt-4">
                   <p className="text-sm font-bold text-[var(--color-light)] mb-2">
                     Selected seats ({selectedSeats.length}/{MAX_SEATS})
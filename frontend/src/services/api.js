@@ -4,6 +4,8 @@ const API_URL = 'http://localhost:8000'; // Update this if your backend runs on
 
 export const api = axios.create({
     baseURL: API_URL,
+    // Sends the read-your-writes cookie so reads right after a booking see it
+    withCredentials: true,
     headers: {
         'Content-Type': 'application/json',
     },
@@ -15,6 +17,11 @@ export const getMovies = async (params = {}) => {
     return response.data;
 };
 
+export const getTrendingMovies = async (params = {}) => {
+    const response = await api.get('/movies/trending', { params });
+    return response.data;
+};
+
 export const getMovieById = async (id) => {
     const response = await api.get(`/movies/${id}`);
     return response.data;
@@ -71,11 +78,35 @@ export const createShowsBatch = async (batchData) => {
     return response.data;
 };
 
+// What's on at a cinema per day, grouped by movie and screen (dates as YYYY-MM-DD; dateTo defaults to dateFrom)
+export const getCinemaSchedule = async (cinemaId, dateFrom, dateTo) => {
+    const response = await api.get('/shows/schedule', {
+        params: { cinema_id: cinemaId, date_from: dateFrom, date_to: dateTo }
+    });
+    return response.data;
+};
+
+export const getShowSeatMap = async (showId) => {
+    const response = await api.get(`/shows/${showId}/seat-map`);
+    return response.data;
+};
+
 export const getBookedSeats = async (showId) => {
     const response = await api.get(`/bookings/show/${showId}/booked-seats`);
     return response.data;
 };
 
+// Best adjacent seats for a group, held for a few minutes (pass hold_id when booking)
+export const findBestSeats = async (showId, request) => {
+    const response = await api.post(`/bookings/show/${showId}/best-seats`, request);
+    return response.data;
+};
+
+export const releaseSeatHold = async (holdId) => {
+    const response = await api.delete(`/bookings/holds/${holdId}`);
+    return response.data;
+};
+
 // --- Cinemas ---
 export const getAllCinemas = async () => {
     const response = await api.get('/shows/cinemas/all');
@@ -98,13 +129,16 @@ export const updateCinema = async (id, cinemaData) => {
 };
 
 // --- Bookings ---
-export const createBooking = async (bookingData) => {
-    const response = await api.post('/bookings/', bookingData);
+export const createBooking = async (bookingData, idempotencyKey) => {
+    // The same key on a retry returns the original booking instead of booking twice
+    const config = idempotencyKey ? { headers: { 'Idempotency-Key': idempotencyKey } } : undefined;
+    const response = await api.post('/bookings/', bookingData, config);
     return response.data;
 };
 
-export const getUserBookings = async (userId) => {
-    const response = await api.get(`/bookings/user/${userId}`);
+// params: { view: 'all' | 'upcoming' | 'past', skip, limit, detail }
+export const getUserBookings = async (userId, params = {}) => {
+    const response = await api.get(`/bookings/user/${userId}`, { params });
     return response.data;
 };
 